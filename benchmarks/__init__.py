@@ -0,0 +1 @@
+"""Micro-benchmarks for MeasureIt, run with: python -m benchmarks.<name>."""
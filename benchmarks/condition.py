@@ -0,0 +1,87 @@
+"""
+Compare rendering condition templates with evaluating structured conditions.
+
+For every condition, the state of its entities changes 10k times. A template
+tracker renders the template with dependency analysis on every change, while a
+structured condition is evaluated directly from the state machine.
+
+Run with: python -m benchmarks.condition
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import timeit
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.condition import parse_condition
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+NOF_CHANGES = 10_000
+CONDITIONS = {
+    "is_state": "{{ is_state('input_boolean.production', 'on') }}",
+    "threshold": "{{ states('sensor.power') | float(0) > 100 }}",
+    "and/or": "{{ is_state('input_boolean.production', 'on') and "
+    "states('sensor.power') | float(0) > 100 or "
+    "is_state('input_boolean.override', 'on') }}",
+}
+STATES = [
+    {
+        "input_boolean.production": "on" if index % 2 else "off",
+        "sensor.power": str(index % 200),
+        "input_boolean.override": "on" if index % 7 == 0 else "off",
+    }
+    for index in range(NOF_CHANGES)
+]
+
+
+def _run(hass: HomeAssistant, evaluate: Callable[[], object]) -> float:
+    """Return the cost in microseconds per state change."""
+
+    def changes() -> None:
+        for states in STATES:
+            for entity_id, state in states.items():
+                hass.states.async_set(entity_id, state)
+            evaluate()
+
+    def changes_only() -> None:
+        for states in STATES:
+            for entity_id, state in states.items():
+                hass.states.async_set(entity_id, state)
+
+    cost = min(timeit.repeat(changes, number=1, repeat=3))
+    overhead = min(timeit.repeat(changes_only, number=1, repeat=3))
+    return (cost - overhead) / NOF_CHANGES * 1e6
+
+
+async def _async_main() -> None:
+    """Run the benchmark in the event loop, like Home Assistant does."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        print(f"{NOF_CHANGES} state changes")
+        for name, source in CONDITIONS.items():
+            template = Template(source, hass)
+            condition = parse_condition(source)
+            template_cost = _run(hass, template.async_render_to_info)
+            condition_cost = _run(hass, lambda c=condition: c.evaluate(hass.states))
+            print(
+                f"{name:<10} template: {template_cost:.2f} us/change, "
+                f"condition: {condition_cost:.2f} us/change, "
+                f"speedup: {template_cost / condition_cost:.1f}x"
+            )
+        await hass.async_stop(force=True)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    asyncio.run(_async_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare the per-update cost of the Decimal and the fixed-point numeric engine.
+
+Simulates a source entity event for an entry with 5 total_increasing sensors:
+the state is parsed once, the meter store checks for a reset and stores the new
+value, after which every sensor renders its measured value (rounded to 3 digits,
+as source sensors without a value template do). The parse and update part is
+reported separately as well.
+
+Run with: python -m benchmarks.meter_engine
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from custom_components.measureit.meter_store import SourceMeterStore
+from custom_components.measureit.numeric import (
+    DECIMAL_ENGINE,
+    FixedPointEngine,
+    NumericEngine,
+)
+
+NOF_SENSORS = 5
+NOF_EVENTS = 100_000
+
+
+def _states() -> list[str]:
+    """Return an increasing series of energy readings with 3 decimals."""
+    return [f"{12345 + index * 0.001:.3f}" for index in range(NOF_EVENTS)]
+
+
+def _run(engine: NumericEngine, states: list[str], *, render: bool) -> float:
+    """Return the cost per event in microseconds."""
+    store = SourceMeterStore(engine)
+    meters = [store.create_meter(check_reset=True) for _ in range(NOF_SENSORS)]
+    store.update(engine.parse(states[0]))
+    for meter in meters:
+        meter.update()
+        meter.start()
+
+    def process() -> None:
+        for state in states:
+            store.update(engine.parse(state))
+            if render:
+                for meter in meters:
+                    round(meter.measured_value, 3)
+
+    seconds = min(timeit.repeat(process, number=1, repeat=5))
+    return seconds / len(states) * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    states = _states()
+    print(f"{NOF_SENSORS} sensors, {NOF_EVENTS} events")
+    for name, render in (("parse and update", False), ("with rendering", True)):
+        decimal_cost = _run(DECIMAL_ENGINE, states, render=render)
+        fixed_cost = _run(FixedPointEngine(3), states, render=render)
+        print(
+            f"{name:<17} decimal: {decimal_cost:.2f} us/event, "
+            f"fixed-point: {fixed_cost:.2f} us/event, "
+            f"speedup: {decimal_cost / fixed_cost:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
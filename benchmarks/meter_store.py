@@ -0,0 +1,83 @@
+"""
+Compare a meter store per sensor with one meter store for a source entry.
+
+Simulates the meter work of a source event for an entry with hour, day, week,
+month and year sensors (total_increasing, so all of them check for a reset).
+
+Run with: python -m benchmarks.meter_store
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from custom_components.measureit.meter_store import SourceMeterStore
+from custom_components.measureit.numeric import (
+    DECIMAL_ENGINE,
+    FixedPointEngine,
+    NumericEngine,
+)
+
+NOF_SENSORS = 5
+NOF_EVENTS = 100_000
+
+
+def _values(engine: NumericEngine) -> list:
+    """Return an increasing series of parsed energy readings."""
+    return [engine.parse(f"{12345 + index * 0.001:.3f}") for index in range(NOF_EVENTS)]
+
+
+def _run_meters(engine: NumericEngine, values: list) -> float:
+    """Return the cost per event in microseconds for a store per meter."""
+    stores = [SourceMeterStore(engine) for _ in range(NOF_SENSORS)]
+    for store in stores:
+        meter = store.create_meter(check_reset=True)
+        store.update(values[0])
+        meter.update()
+        meter.start()
+
+    def process() -> None:
+        for value in values:
+            for store in stores:
+                store.update(value)
+
+    seconds = min(timeit.repeat(process, number=1, repeat=5))
+    return seconds / len(values) * 1_000_000
+
+
+def _run_store(engine: NumericEngine, values: list) -> float:
+    """Return the cost per event in microseconds for a meter store."""
+    store = SourceMeterStore(engine)
+    meters = [store.create_meter(check_reset=True) for _ in range(NOF_SENSORS)]
+    store.update(values[0])
+    for meter in meters:
+        meter.update()
+        meter.start()
+
+    def process() -> None:
+        for value in values:
+            store.update(value)
+
+    seconds = min(timeit.repeat(process, number=1, repeat=5))
+    return seconds / len(values) * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{NOF_SENSORS} sensors, {NOF_EVENTS} events")
+    for name, engine in (
+        ("decimal", DECIMAL_ENGINE),
+        ("fixed-point", FixedPointEngine(3)),
+    ):
+        values = _values(engine)
+        meters_cost = _run_meters(engine, values)
+        store_cost = _run_store(engine, values)
+        print(
+            f"{name:<12} store per meter: {meters_cost:.2f} us/event, "
+            f"shared store: {store_cost:.2f} us/event, "
+            f"speedup: {meters_cost / store_cost:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare cronsim with the calendar schedule for the predefined periods.
+
+Computes the next reset of 10k sensors, each at a different moment of a year, for
+every calendar period.
+
+Run with: python -m benchmarks.reset_schedule
+"""
+
+from __future__ import annotations
+
+import timeit
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.measureit.const import PREDEFINED_PERIODS
+from custom_components.measureit.cron import CalendarSchedule, CronSchedule
+
+NOF_SENSORS = 10_000
+PERIODS = ("hour", "day", "week", "month", "year")
+
+
+def _moments() -> list[datetime]:
+    """Return a moment for every sensor, spread over a year."""
+    start = datetime(2024, 1, 1, tzinfo=dt_util.UTC)
+    step = timedelta(days=366) / NOF_SENSORS
+    return [dt_util.as_local(start + step * index) for index in range(NOF_SENSORS)]
+
+
+def _run(schedule: CronSchedule | CalendarSchedule, moments: list) -> float:
+    """Return the cost per sensor in microseconds."""
+
+    def process() -> None:
+        for moment in moments:
+            schedule.next_after(moment)
+
+    seconds = min(timeit.repeat(process, number=1, repeat=5))
+    return seconds / len(moments) * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    dt_util.set_default_time_zone(ZoneInfo("Europe/Brussels"))
+    moments = _moments()
+    print(f"{NOF_SENSORS} sensors")
+    for period in PERIODS:
+        expression = PREDEFINED_PERIODS[period]
+        cron_cost = _run(CronSchedule(expression), moments)
+        calendar_cost = _run(CalendarSchedule(expression, period), moments)
+        print(
+            f"{period:<6} cronsim: {cron_cost:.2f} us/sensor, "
+            f"calendar: {calendar_cost:.2f} us/sensor, "
+            f"speedup: {cron_cost / calendar_cost:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the compiled time window with the previous implementation.
+
+Evaluates is_active and next_change every minute of two weeks around the start
+of DST in Europe/Brussels, for a window on weekdays and one that crosses
+midnight.
+
+Run with: python -m benchmarks.time_window
+"""
+
+from __future__ import annotations
+
+import timeit
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.measureit.time_window import TimeWindow
+
+TIME_ZONE = ZoneInfo("Europe/Brussels")
+WINDOWS = {
+    "weekdays": (["0", "1", "2", "3", "4"], "09:00:00", "17:00:00"),
+    "overnight": (["4", "5"], "22:00:00", "02:30:00"),
+}
+
+
+class PreviousTimeWindow:
+    """The time window before it was compiled, for comparison."""
+
+    def __init__(self, days: list[str], from_time: str, till_time: str) -> None:
+        """Initialize the time window."""
+        self._days = [int(day) for day in days]
+        self._start = datetime.strptime(from_time, "%H:%M:%S").time()  # noqa: DTZ007
+        self._end = datetime.strptime(till_time, "%H:%M:%S").time()  # noqa: DTZ007
+
+    def is_active(self, tznow: datetime) -> bool:
+        """Check if a given datetime is inside the time window."""
+        check_time = tznow.time()
+        if self._start < self._end:
+            if check_time >= self._start and check_time < self._end:
+                return tznow.weekday() in self._days
+        elif check_time >= self._start or check_time <= self._end:
+            if check_time < self._start:
+                return (tznow.weekday() - 1) % 7 in self._days
+            return tznow.weekday() in self._days
+        return False
+
+    def next_change(self, tznow: datetime) -> datetime:
+        """Return the next time the time window will change state."""
+        if self.is_active(tznow):
+            if tznow.time() < self._end:
+                return datetime.combine(tznow.date(), self._end, tznow.tzinfo)
+            return datetime.combine(
+                tznow.date() + timedelta(days=1), self._end, tznow.tzinfo
+            )
+        if tznow.time() < self._start and tznow.weekday() in self._days:
+            return datetime.combine(tznow.date(), self._start, tznow.tzinfo)
+        for days_ahead in range(1, 8):
+            next_day = tznow + timedelta(days=days_ahead)
+            if next_day.weekday() in self._days:
+                return datetime.combine(next_day.date(), self._start, tznow.tzinfo)
+        raise ValueError
+
+
+def _moments() -> list[datetime]:
+    """Return every minute of two weeks around the start of DST."""
+    start = datetime(2024, 3, 24, tzinfo=ZoneInfo("UTC"))
+    return [
+        (start + timedelta(minutes=minute)).astimezone(TIME_ZONE)
+        for minute in range(14 * 24 * 60)
+    ]
+
+
+def _run(window: TimeWindow | PreviousTimeWindow, moments: list) -> float:
+    """Return the cost per moment in microseconds."""
+
+    def process() -> None:
+        for moment in moments:
+            window.is_active(moment)
+            window.next_change(moment)
+
+    seconds = min(timeit.repeat(process, number=1, repeat=5))
+    return seconds / len(moments) * 1_000_000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    moments = _moments()
+    print(f"{len(moments)} moments")
+    for name, args in WINDOWS.items():
+        previous_cost = _run(PreviousTimeWindow(*args), moments)
+        compiled_cost = _run(TimeWindow(*args), moments)
+        print(
+            f"{name:<10} previous: {previous_cost:.2f} us/moment, "
+            f"compiled: {compiled_cost:.2f} us/moment, "
+            f"speedup: {previous_cost / compiled_cost:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
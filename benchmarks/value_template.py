@@ -0,0 +1,72 @@
+"""
+Compare rendering value templates with Jinja and as compiled expressions.
+
+Renders 10k measured values with every template, like a sensor does for its
+state and attributes.
+
+Run with: python -m benchmarks.value_template
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import timeit
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.value_expression import compile_value_template
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+NOF_VALUES = 10_000
+TEMPLATES = {
+    "divide": "{{ value / 3600 }}",
+    "round": "{{ value | round(2) }}",
+    "scale": "{{ (value | float * 0.23) | round(2) }}",
+}
+VALUES = [Decimal(index) / 7 for index in range(NOF_VALUES)]
+
+
+def _run(render: Callable[[Any], Any]) -> float:
+    """Return the cost in microseconds per render."""
+
+    def renders() -> None:
+        for value in VALUES:
+            render(value)
+
+    return min(timeit.repeat(renders, number=1, repeat=3)) / NOF_VALUES * 1e6
+
+
+async def _async_main() -> None:
+    """Run the benchmark in the event loop, like Home Assistant does."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        print(f"{NOF_VALUES} values")
+        for name, source in TEMPLATES.items():
+            template = Template(source, hass)
+            jinja_cost = _run(
+                lambda value, t=template: t.async_render(
+                    {"value": value}, parse_result=False
+                )
+            )
+            compiled_cost = _run(compile_value_template(source))
+            print(
+                f"{name:<7} jinja: {jinja_cost:.2f} us/render, "
+                f"compiled: {compiled_cost:.2f} us/render, "
+                f"speedup: {jinja_cost / compiled_cost:.1f}x"
+            )
+        await hass.async_stop(force=True)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    asyncio.run(_async_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,45 @@
 """MeasureIt integration."""
 
 import logging
+from datetime import timedelta
 
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, Platform
 from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.template import Template
 
 from .const import (
+    CONF_COALESCE_INTERVAL,
     CONF_CONDITION,
+    CONF_CONDITION_MIN_OFF,
+    CONF_CONDITION_MIN_ON,
     CONF_CONFIG_NAME,
     CONF_COUNTER_TEMPLATE,
+    CONF_FIXED_POINT_SCALE,
     CONF_METER_TYPE,
     CONF_SOURCE,
+    CONF_TW_CALENDAR,
     CONF_TW_DAYS,
+    CONF_TW_EXCLUDED_DATES,
     CONF_TW_FROM,
+    CONF_TW_RANGES,
     CONF_TW_TILL,
+    CONF_WRITE_BUDGET,
     COORDINATOR,
     DOMAIN_DATA,
     MeterType,
 )
 from .coordinator import MeasureItCoordinator
+from .holiday_calendar import (
+    async_get_holiday_calendar,
+    async_release_holiday_calendars,
+)
+from .numeric import DECIMAL_ENGINE, FixedPointEngine
+from .template_cache import async_get_template_cache
 from .time_window import TimeWindow
+from .write_scheduler import async_get_write_scheduler
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
@@ -35,13 +51,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     config_name: str = entry.options[CONF_CONFIG_NAME]
     meter_type: MeterType = entry.options[CONF_METER_TYPE]
 
-    if condition_template := entry.options.get(CONF_CONDITION):
-        condition_template = Template(condition_template, hass)
-        condition_template.ensure_valid()
+    # Entries with the same templates share them, compiled once
+    template_cache = async_get_template_cache(hass)
+    try:
+        if condition_template := entry.options.get(CONF_CONDITION):
+            condition_template = template_cache.async_get(
+                condition_template, entry.entry_id
+            )
 
-    if counter_template := entry.options.get(CONF_COUNTER_TEMPLATE):
-        counter_template = Template(counter_template, hass)
-        counter_template.ensure_valid()
+        if counter_template := entry.options.get(CONF_COUNTER_TEMPLATE):
+            counter_template = template_cache.async_get(
+                counter_template, entry.entry_id
+            )
+    except TemplateError:
+        template_cache.async_release(entry.entry_id)
+        raise
 
     source_entity = None
 
@@ -59,14 +83,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 config_name,
                 entry.options[CONF_SOURCE],
             )
+            template_cache.async_release(entry.entry_id)
             return False
 
+    calendar = None
+    if calendar_path := entry.options.get(CONF_TW_CALENDAR):
+        # Shared by all entries with the same file, which is only read when changed
+        calendar = async_get_holiday_calendar(hass, calendar_path, entry.entry_id)
+        await calendar.async_refresh()
+
     time_window = TimeWindow(
         entry.options[CONF_TW_DAYS],
         entry.options[CONF_TW_FROM],
         entry.options[CONF_TW_TILL],
+        entry.options.get(CONF_TW_RANGES),
+        entry.options.get(CONF_TW_EXCLUDED_DATES),
+        calendar,
     )
 
+    if (scale := entry.options.get(CONF_FIXED_POINT_SCALE)) is not None:
+        engine = FixedPointEngine(int(scale))
+    else:
+        engine = DECIMAL_ENGINE
+
     coordinator = MeasureItCoordinator(
         hass,
         config_name,
@@ -75,6 +114,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         condition_template,
         counter_template,
         source_entity,
+        engine,
+        _get_duration_option(entry, CONF_COALESCE_INTERVAL),
+        _get_duration_option(entry, CONF_CONDITION_MIN_ON),
+        _get_duration_option(entry, CONF_CONDITION_MIN_OFF),
     )
     hass.data.setdefault(DOMAIN_DATA, {}).setdefault(entry.entry_id, {}).update(
         {
@@ -82,6 +125,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         }
     )
 
+    async_get_write_scheduler(hass).async_set_budget(
+        coordinator, entry.options.get(CONF_WRITE_BUDGET)
+    )
+
     await hass.config_entries.async_forward_entry_setups(entry, ([Platform.SENSOR]))
 
     @callback
@@ -98,6 +145,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _get_duration_option(entry: ConfigEntry, option: str) -> timedelta | None:
+    """Return an option in seconds as a duration, None when not set or zero."""
+    if seconds := entry.options.get(option):
+        return timedelta(seconds=float(seconds))
+    return None
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update listener, called when the config entry options are changed."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -113,5 +167,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         (Platform.SENSOR,),
     ):
         hass.data[DOMAIN_DATA].pop(entry.entry_id)
+        async_get_write_scheduler(hass).async_set_budget(coordinator, None)
+        async_get_template_cache(hass).async_release(entry.entry_id)
+        async_release_holiday_calendars(hass, entry.entry_id)
 
     return unload_ok
@@ -0,0 +1,65 @@
+"""Clocks for MeasureIt time meters, in integer nanoseconds since the epoch."""
+
+from __future__ import annotations
+
+import time
+from decimal import Decimal
+from typing import Protocol
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class MeterClock(Protocol):
+    """Protocol for clocks used by time meters."""
+
+    def anchor(self) -> None:
+        """Align the clock with the wall clock, called when a session starts."""
+
+    def now_ns(self) -> int:
+        """Return the current time in nanoseconds since the epoch."""
+
+
+class WallClock:
+    """Clock that follows the system wall clock, including any jumps."""
+
+    def anchor(self) -> None:
+        """Align the clock with the wall clock (always aligned)."""
+
+    def now_ns(self) -> int:
+        """Return the current time in nanoseconds since the epoch."""
+        return time.time_ns()
+
+
+class MonotonicClock:
+    """
+    Monotonic clock anchored to the wall clock.
+
+    Between two anchors the clock only advances with the monotonic clock, so wall
+    clock adjustments (e.g. by NTP) do not affect a running session. Timestamps are
+    still wall clock based, which keeps them valid across restarts.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the clock."""
+        self.anchor()
+
+    def anchor(self) -> None:
+        """Align the clock with the wall clock."""
+        self._wall_anchor_ns = time.time_ns()
+        self._monotonic_anchor_ns = time.monotonic_ns()
+
+    def now_ns(self) -> int:
+        """Return the current time in nanoseconds since the epoch."""
+        return self._wall_anchor_ns + time.monotonic_ns() - self._monotonic_anchor_ns
+
+
+def ns_to_seconds(value: int) -> Decimal:
+    """Convert nanoseconds to a Decimal number of seconds without trailing zeros."""
+    if value % NS_PER_SECOND == 0:
+        return Decimal(value // NS_PER_SECOND)
+    return Decimal(value).scaleb(-9).normalize()
+
+
+def seconds_to_ns(value: Decimal | float | str) -> int:
+    """Convert a number of seconds to nanoseconds, truncating any sub-ns digits."""
+    return int(Decimal(value).scaleb(9))
@@ -0,0 +1,177 @@
+"""
+Structured conditions for MeasureIt, evaluated without Jinja.
+
+Most condition templates test the state of an entity, e.g.
+"{{ is_state('input_boolean.production', 'on') }}" or a numeric threshold like
+"{{ states('sensor.power') | float(0) > 100 }}", optionally combined with and/or.
+Such templates are recognized by parse_condition() and evaluated natively from
+the state machine, with the same result as rendering the template. Any other
+template is not recognized and remains a template.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from homeassistant.const import STATE_UNKNOWN
+
+if TYPE_CHECKING:
+    from homeassistant.core import StateMachine
+
+_ENTITY = r"['\"]([a-z0-9_]+\.[a-z0-9_]+)['\"]"
+_TEXT = r"['\"]([^'\"]*)['\"]"
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_OPERATOR = r"==|!=|<=|>=|<|>"
+_TEMPLATE = re.compile(r"\s*\{\{(.*)\}\}\s*", re.DOTALL)
+_IS_STATE = re.compile(rf"(not\s+)?is_state\(\s*{_ENTITY}\s*,\s*{_TEXT}\s*\)")
+_STATES_COMPARE = re.compile(rf"states\(\s*{_ENTITY}\s*\)\s*(==|!=)\s*{_TEXT}")
+_STATES_NUMERIC = re.compile(
+    rf"states\(\s*{_ENTITY}\s*\)\s*\|\s*float(?:\(\s*({_NUMBER})\s*\))?"
+    rf"\s*({_OPERATOR})\s*({_NUMBER})"
+)
+_COMPARE = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+}
+
+
+class StateCondition:
+    """
+    Condition on the state of one entity.
+
+    The operators "is" and "is not" work like is_state(), which is false for an
+    entity that does not exist. The other operators compare the state like
+    states() does, as text for a text value and as a number for a numeric
+    value. A state that is not a number is compared as the default, or raises
+    ValueError without a default, like the float filter.
+    """
+
+    def __init__(
+        self,
+        entity_id: str,
+        operator: str,
+        value: str | float,
+        default: float | None = None,
+    ) -> None:
+        """Initialize the condition."""
+        if operator not in _COMPARE and operator not in ("is", "is not"):
+            msg = f"Invalid operator: {operator}"
+            raise ValueError(msg)
+        self.entity_id = entity_id
+        self.operator = operator
+        self.value = value
+        self.default = default
+        self._compare = _COMPARE.get(operator)
+
+    @property
+    def entity_ids(self) -> set[str]:
+        """Return the entities of which the condition depends on the state."""
+        return {self.entity_id}
+
+    def evaluate(self, states: StateMachine) -> bool:
+        """Return if the condition holds for the current states."""
+        state = states.get(self.entity_id)
+        if self.operator in ("is", "is not"):
+            matches = state is not None and state.state == self.value
+            return matches if self.operator == "is" else not matches
+        current = state.state if state is not None else STATE_UNKNOWN
+        if isinstance(self.value, str):
+            return self._compare(current, self.value)
+        try:
+            number = float(current)
+        except ValueError:
+            if self.default is None:
+                msg = f"float got invalid input '{current}' for {self.entity_id}"
+                raise ValueError(msg) from None
+            number = self.default
+        return self._compare(number, self.value)
+
+    def __repr__(self) -> str:
+        """Return the condition as text."""
+        return f"{self.entity_id} {self.operator} {self.value!r}"
+
+
+class AndCondition:
+    """Condition that holds when all of its conditions hold."""
+
+    def __init__(self, conditions: list[StateCondition]) -> None:
+        """Initialize the condition."""
+        self.conditions = conditions
+
+    @property
+    def entity_ids(self) -> set[str]:
+        """Return the entities of which the condition depends on the state."""
+        return set().union(*(condition.entity_ids for condition in self.conditions))
+
+    def evaluate(self, states: StateMachine) -> bool:
+        """Return if all conditions hold, evaluated from left to right like Jinja."""
+        return all(condition.evaluate(states) for condition in self.conditions)
+
+    def __repr__(self) -> str:
+        """Return the condition as text."""
+        return " and ".join(repr(condition) for condition in self.conditions)
+
+
+class OrCondition:
+    """Condition that holds when any of its conditions holds."""
+
+    def __init__(self, conditions: list[StateCondition | AndCondition]) -> None:
+        """Initialize the condition."""
+        self.conditions = conditions
+
+    @property
+    def entity_ids(self) -> set[str]:
+        """Return the entities of which the condition depends on the state."""
+        return set().union(*(condition.entity_ids for condition in self.conditions))
+
+    def evaluate(self, states: StateMachine) -> bool:
+        """Return if any condition holds, evaluated from left to right like Jinja."""
+        return any(condition.evaluate(states) for condition in self.conditions)
+
+    def __repr__(self) -> str:
+        """Return the condition as text."""
+        return " or ".join(f"({condition!r})" for condition in self.conditions)
+
+
+Condition = StateCondition | AndCondition | OrCondition
+
+
+def parse_condition(template: str) -> Condition | None:
+    """Return the structured condition of a template, None if not recognized."""
+    if (match := _TEMPLATE.fullmatch(template)) is None:
+        return None
+    expression = match.group(1)
+    # Splitting inside a quoted value leaves parts that are not recognized
+    alternatives = []
+    for alternative in re.split(r"\s+or\s+", expression.strip()):
+        parts = []
+        for part in re.split(r"\s+and\s+", alternative.strip()):
+            if (condition := _parse_state_condition(part.strip())) is None:
+                return None
+            parts.append(condition)
+        alternatives.append(parts[0] if len(parts) == 1 else AndCondition(parts))
+    return alternatives[0] if len(alternatives) == 1 else OrCondition(alternatives)
+
+
+def _parse_state_condition(part: str) -> StateCondition | None:
+    """Return the condition of a single test, None if not recognized."""
+    if match := _IS_STATE.fullmatch(part):
+        negate, entity_id, value = match.groups()
+        return StateCondition(entity_id, "is not" if negate else "is", value)
+    if match := _STATES_COMPARE.fullmatch(part):
+        entity_id, operator, value = match.groups()
+        return StateCondition(entity_id, operator, value)
+    if match := _STATES_NUMERIC.fullmatch(part):
+        entity_id, default, operator, value = match.groups()
+        return StateCondition(
+            entity_id,
+            operator,
+            float(value),
+            float(default) if default is not None else None,
+        )
+    return None
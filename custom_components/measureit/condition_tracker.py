@@ -0,0 +1,170 @@
+"""
+Shared condition template tracking for MeasureIt coordinators.
+
+Config entries often use the very same condition template, e.g. the state of an
+input boolean. All coordinators with the same template source share a single
+template tracker, so the template is rendered once per relevant state change and
+its result is passed to all subscribers. The tracker is removed when the last
+subscriber stops tracking.
+
+Templates that only test entity states are recognized as structured conditions.
+These are evaluated natively on state changes of their entities, without Jinja.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    TrackTemplateResult,
+    async_track_state_change_event,
+    async_track_template_result,
+)
+
+from .condition import parse_condition
+from .const import CONDITION_TRACKER_DATA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from homeassistant.helpers.template import Template
+
+    from .condition import Condition
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+_NO_RESULT = object()
+
+
+class _TrackedCondition:
+    """A condition template with its subscribers and its last result."""
+
+    def __init__(self) -> None:
+        """Initialize the tracked condition."""
+        self.actions: dict[Callable, Callable[[Any, datetime | None], None]] = {}
+        self.remove: Callable[[], None] | None = None
+        self.result: Any = _NO_RESULT
+
+    def notify(self, result: Any, event: Event | None = None) -> None:
+        """Pass a new result to all subscribers, with the time of its state change."""
+        self.result = result
+        time_fired = event.time_fired if event is not None else None
+        # A subscriber can stop tracking while being notified
+        for subscriber in list(self.actions.values()):
+            subscriber(result, time_fired)
+
+
+class MeasureItConditionTracker:
+    """Domain wide tracker of condition template results."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass: HomeAssistant = hass
+        self._tracked: dict[str, _TrackedCondition] = {}
+
+    @property
+    def tracked_templates(self) -> int:
+        """Return the number of distinct templates with subscribers."""
+        return len(self._tracked)
+
+    @callback
+    def async_track(
+        self, template: Template, action: Callable[[Any, datetime | None], None]
+    ) -> Callable[[], None]:
+        """
+        Call the action with the result of the template whenever it changes.
+
+        The result is the rendered value, or a TemplateError when rendering failed.
+        It is passed with the time of the state change that changed it, or None
+        when not caused by a state change. The action is called with the current
+        result right away. Returns a callback to stop tracking.
+        """
+        key = template.template
+        if (tracked := self._tracked.get(key)) is None:
+            tracked = self._tracked[key] = _TrackedCondition()
+
+        @callback
+        def untrack() -> None:
+            """Stop tracking the template for this action."""
+            if tracked.actions.pop(untrack, None) is None:
+                return
+            if not tracked.actions:
+                if tracked.remove is not None:
+                    tracked.remove()
+                    tracked.remove = None
+                if self._tracked.get(key) is tracked:
+                    del self._tracked[key]
+
+        tracked.actions[untrack] = action
+        if tracked.remove is None:
+            if (condition := parse_condition(key)) is not None:
+                self._track_condition(tracked, condition)
+            else:
+                self._track_template(tracked, template)
+        elif tracked.result is not _NO_RESULT:
+            action(tracked.result, None)
+        return untrack
+
+    def _track_template(self, tracked: _TrackedCondition, template: Template) -> None:
+        """Render the template whenever one of the entities it uses changes."""
+
+        @callback
+        def on_update(
+            event: Event | None,
+            updates: list[TrackTemplateResult],
+        ) -> None:
+            """Pass the new result to all subscribers."""
+            _LOGGER.debug(
+                "Condition template %s changed to %s for %s subscribers",
+                template.template,
+                updates[-1].result,
+                len(tracked.actions),
+            )
+            tracked.notify(updates[-1].result, event)
+
+        info = async_track_template_result(
+            self.hass, [TrackTemplate(template, None)], on_update
+        )
+        tracked.remove = info.async_remove
+        info.async_refresh()
+
+    def _track_condition(
+        self, tracked: _TrackedCondition, condition: Condition
+    ) -> None:
+        """Evaluate the structured condition whenever one of its entities changes."""
+
+        @callback
+        def evaluate(event: Event | None = None) -> None:
+            """Pass the result to all subscribers when it changed."""
+            try:
+                result: Any = condition.evaluate(self.hass.states)
+            except ValueError as ex:
+                result = TemplateError(ex)
+            # Like a template tracker, only a changed result is passed on
+            if result == tracked.result and not isinstance(result, TemplateError):
+                return
+            _LOGGER.debug(
+                "Condition %s changed to %s for %s subscribers",
+                condition,
+                result,
+                len(tracked.actions),
+            )
+            tracked.notify(result, event)
+
+        tracked.remove = async_track_state_change_event(
+            self.hass, condition.entity_ids, evaluate
+        )
+        evaluate()
+
+
+@callback
+def async_get_condition_tracker(hass: HomeAssistant) -> MeasureItConditionTracker:
+    """Return the shared condition tracker, creating it on first use."""
+    if (tracker := hass.data.get(CONDITION_TRACKER_DATA)) is None:
+        tracker = hass.data[CONDITION_TRACKER_DATA] = MeasureItConditionTracker(hass)
+    return tracker
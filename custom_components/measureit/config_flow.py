@@ -5,6 +5,8 @@
 from __future__ import annotations
 
 import uuid
+from datetime import date
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
@@ -39,23 +41,36 @@ from homeassistant.helpers.template import Template
 from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_COALESCE_INTERVAL,
     CONF_CONDITION,
+    CONF_CONDITION_MIN_OFF,
+    CONF_CONDITION_MIN_ON,
     CONF_CONFIG_NAME,
     CONF_COUNTER_TEMPLATE,
     CONF_CRON,
+    CONF_DEADBAND,
+    CONF_FIXED_POINT_SCALE,
     CONF_INDEX,
+    CONF_LAZY_UPDATE,
+    CONF_MAX_AGE,
     CONF_METER_TYPE,
     CONF_PERIOD,
     CONF_PERIODS,
     CONF_SENSOR_NAME,
     CONF_SOURCE,
+    CONF_TW_CALENDAR,
     CONF_TW_DAYS,
+    CONF_TW_EXCLUDED_DATES,
     CONF_TW_FROM,
+    CONF_TW_RANGES,
     CONF_TW_TILL,
+    CONF_WRITE_BUDGET,
     DOMAIN,
     PREDEFINED_PERIODS,
     MeterType,
 )
+from .holiday_calendar import parse_ics
+from .time_window import TimeWindow
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
@@ -149,11 +164,11 @@ def validate_period(period: str) -> bool:
 
 
 async def validate_edit_main_config(
-    handler: SchemaCommonFlowHandler,  # noqa: ARG001
+    handler: SchemaCommonFlowHandler,
     user_input: dict[str, Any],
 ) -> dict[str, Any]:
-    """Validate edit main config."""
-    return user_input
+    """Validate edit main config, like the when config of a new entry."""
+    return await validate_when(handler, user_input)
 
 
 async def validate_time_config(
@@ -191,6 +206,26 @@ async def validate_when(
     if len(user_input[CONF_TW_DAYS]) == 0:
         msg = "tw_days_minimum"
         raise SchemaFlowError(msg)
+    for time_range in user_input.get(CONF_TW_RANGES, []):
+        try:
+            TimeWindow(user_input[CONF_TW_DAYS], "00:00:00", "00:00:00", [time_range])
+        except ValueError as ex:
+            msg = "tw_range_invalid"
+            raise SchemaFlowError(msg) from ex
+    for excluded_date in user_input.get(CONF_TW_EXCLUDED_DATES, []):
+        try:
+            date.fromisoformat(excluded_date.strip())
+        except ValueError as ex:
+            msg = "tw_date_invalid"
+            raise SchemaFlowError(msg) from ex
+    if calendar_path := user_input.get(CONF_TW_CALENDAR):
+        try:
+            await async_get_hass().async_add_executor_job(
+                _validate_calendar, calendar_path
+            )
+        except (OSError, ValueError) as ex:
+            msg = "tw_calendar_invalid"
+            raise SchemaFlowError(msg) from ex
     if user_input.get(CONF_CONDITION):
         template = Template(user_input[CONF_CONDITION], hass=async_get_hass())
         try:
@@ -202,6 +237,11 @@ async def validate_when(
     return user_input
 
 
+def _validate_calendar(path: str) -> None:
+    """Parse a holiday calendar, raises OSError or ValueError if invalid."""
+    parse_ics(Path(path).read_text(encoding="utf-8", errors="replace"))
+
+
 async def get_select_sensor_schema(handler: SchemaCommonFlowHandler) -> vol.Schema:
     """Return schema for selecting a sensor."""
     return vol.Schema(
@@ -337,10 +377,39 @@ SENSOR_CONFIG = {
             mode=selector.SelectSelectorMode.DROPDOWN,
         )
     ),
+    vol.Optional(CONF_DEADBAND): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0, step="any", mode=selector.NumberSelectorMode.BOX
+        )
+    ),
+    vol.Optional(CONF_MAX_AGE): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            step=1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
 }
 
 WHEN_CONFIG = {
     vol.Optional(CONF_CONDITION): selector.TemplateSelector(),
+    vol.Optional(CONF_CONDITION_MIN_ON): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            step="any",
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(CONF_CONDITION_MIN_OFF): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            step="any",
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
     vol.Required(CONF_TW_DAYS, default=DEFAULT_DAYS): selector.SelectSelector(
         selector.SelectSelectorConfig(
             translation_key="day_selector",
@@ -351,6 +420,13 @@ WHEN_CONFIG = {
     ),
     vol.Required(CONF_TW_FROM): selector.TimeSelector(),
     vol.Required(CONF_TW_TILL): selector.TimeSelector(),
+    vol.Optional(CONF_TW_RANGES): selector.TextSelector(
+        selector.TextSelectorConfig(multiple=True)
+    ),
+    vol.Optional(CONF_TW_EXCLUDED_DATES): selector.TextSelector(
+        selector.TextSelectorConfig(multiple=True)
+    ),
+    vol.Optional(CONF_TW_CALENDAR): selector.TextSelector(),
 }
 
 SENSORS_CONFIG = {
@@ -365,17 +441,70 @@ SENSORS_CONFIG = {
     **SENSOR_CONFIG,
 }
 
-DATA_SCHEMA_TIME = vol.Schema(MAIN_CONFIG)
+FIXED_POINT_CONFIG = {
+    vol.Optional(CONF_FIXED_POINT_SCALE): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0, max=12, step=1, mode=selector.NumberSelectorMode.BOX
+        )
+    ),
+}
+
+WRITE_BUDGET_CONFIG = {
+    vol.Optional(CONF_WRITE_BUDGET): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            step="any",
+            unit_of_measurement="writes/s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+}
+
+LAZY_UPDATE_CONFIG = {
+    vol.Optional(CONF_LAZY_UPDATE): selector.BooleanSelector(),
+}
+
+COALESCE_CONFIG = {
+    vol.Optional(CONF_COALESCE_INTERVAL): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=60,
+            step=0.1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+}
+
+# Options of each meter type that can be changed after the entry is created
+METER_OPTIONS_CONFIG = {
+    MeterType.TIME: {**LAZY_UPDATE_CONFIG, **WRITE_BUDGET_CONFIG},
+    MeterType.SOURCE: {
+        **FIXED_POINT_CONFIG,
+        **COALESCE_CONFIG,
+        **WRITE_BUDGET_CONFIG,
+    },
+    MeterType.COUNTER: {**FIXED_POINT_CONFIG, **WRITE_BUDGET_CONFIG},
+}
+
+DATA_SCHEMA_TIME = vol.Schema(
+    {
+        **MAIN_CONFIG,
+        **METER_OPTIONS_CONFIG[MeterType.TIME],
+    }
+)
 DATA_SCHEMA_SOURCE = vol.Schema(
     {
         **MAIN_CONFIG,
         vol.Required(CONF_SOURCE): selector.EntitySelector(),
+        **METER_OPTIONS_CONFIG[MeterType.SOURCE],
     }
 )
 DATA_SCHEMA_COUNT = vol.Schema(
     {
         **MAIN_CONFIG,
         vol.Required(CONF_COUNTER_TEMPLATE): selector.TemplateSelector(),
+        **METER_OPTIONS_CONFIG[MeterType.COUNTER],
     }
 )
 DATA_SCHEMA_WHEN = vol.Schema(WHEN_CONFIG)
@@ -384,15 +513,16 @@ DATA_SCHEMA_EDIT_SENSOR = vol.Schema(
 )
 DATA_SCHEMA_SENSORS = vol.Schema(SENSORS_CONFIG)
 
-DATA_SCHEMA_EDIT_MAIN = vol.Schema(
-    {
-        **WHEN_CONFIG,
-    }
-)
-
 DATA_SCHEMA_THANK_YOU = vol.Schema({})
 
 
+async def get_edit_main_schema(handler: SchemaCommonFlowHandler) -> vol.Schema:
+    """Return schema for editing the main config, with the options of the meter."""
+    return vol.Schema(
+        {**WHEN_CONFIG, **METER_OPTIONS_CONFIG[handler.options[CONF_METER_TYPE]]}
+    )
+
+
 async def get_sensors_step_placeholders(
     handler: SchemaCommonFlowHandler,  # noqa: ARG001
 ) -> dict[str, str]:
@@ -462,7 +592,7 @@ OPTIONS_FLOW = {
         ["edit_main", "add_sensors", "select_edit_sensor", "remove_sensor"]
     ),
     "edit_main": SchemaFlowFormStep(
-        DATA_SCHEMA_EDIT_MAIN,
+        get_edit_main_schema,
         validate_user_input=validate_edit_main_config,
     ),
     "add_sensors": SchemaFlowFormStep(
@@ -8,6 +8,13 @@ LOGGER: Logger = getLogger(__package__)
 NAME = "MeasureIt"
 DOMAIN = "measureit"
 DOMAIN_DATA = "measureit_data"
+HEARTBEAT_DATA = "measureit_heartbeat"
+WRITE_SCHEDULER_DATA = "measureit_write_scheduler"
+TIMER_SCHEDULER_DATA = "measureit_timer_scheduler"
+TIME_WINDOW_TRACKER_DATA = "measureit_time_window_tracker"
+HOLIDAY_CALENDAR_DATA = "measureit_holiday_calendars"
+CONDITION_TRACKER_DATA = "measureit_condition_tracker"
+TEMPLATE_CACHE_DATA = "measureit_template_cache"
 VERSION = "0.0.1"
 COORDINATOR = "coordinator"
 STORE = "store"
@@ -32,10 +39,21 @@ CONF_STATE_CLASS = "state_class"
 CONF_TW_DAYS = "when_days"
 CONF_TW_FROM = "when_from"
 CONF_TW_TILL = "when_till"
+CONF_TW_RANGES = "when_ranges"
+CONF_TW_EXCLUDED_DATES = "when_excluded_dates"
+CONF_TW_CALENDAR = "when_calendar"
 CONF_CONFIG_NAME = "config_name"
 CONF_SENSOR_NAME = "sensor_name"
 CONF_INDEX = "index"
 CONF_COUNTER_TEMPLATE = "counter_template"
+CONF_LAZY_UPDATE = "lazy_update"
+CONF_FIXED_POINT_SCALE = "fixed_point_scale"
+CONF_COALESCE_INTERVAL = "coalesce_interval"
+CONF_CONDITION_MIN_ON = "condition_min_on"
+CONF_CONDITION_MIN_OFF = "condition_min_off"
+CONF_DEADBAND = "deadband"
+CONF_MAX_AGE = "max_age"
+CONF_WRITE_BUDGET = "write_budget"
 
 EVENT_TYPE_RESET = "measureit_reset"
 EVENT_TYPE_CALIBRATE = "measureit_calibrate"
@@ -7,37 +7,124 @@ Note that this coordinator is not derived from the core DataUpdateCoordinator.
 from __future__ import annotations
 
 import logging
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from decimal import Decimal, InvalidOperation
+from decimal import InvalidOperation
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.core import Event, HomeAssistant, State, callback
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.event import (
-    TrackTemplate,
-    TrackTemplateResult,
-    TrackTemplateResultInfo,
-    async_track_point_in_time,
-    async_track_point_in_utc_time,
+    async_call_later,
     async_track_state_change_event,
     async_track_template,
-    async_track_template_result,
 )
 from homeassistant.util import dt as dt_util
 
+from .condition_tracker import async_get_condition_tracker
 from .const import MeterType
+from .heartbeat import async_get_heartbeat
+from .meter import Backdate
+from .meter_store import SourceMeterStore
+from .numeric import DECIMAL_ENGINE, NumericEngine
+from .time_window_tracker import async_get_time_window_tracker
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from decimal import Decimal
 
     from homeassistant.helpers.template import Template
 
     from .time_window import TimeWindow
 
-UPDATE_INTERVAL = timedelta(minutes=1)
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
+# Number of source readings kept to find the source value at a late condition change
+SOURCE_HISTORY_SIZE = 64
+
+
+class EventLag:
+    """
+    Observed delay between state changes and their handling by a coordinator.
+
+    Under load, callbacks run later than the state changes that trigger them.
+    Starts and stops are back-dated by this lag, so it does not affect totals.
+    Source meters start or stop at the source value of the moment the condition
+    changed, even when later source readings were handled before the change.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.count: int = 0
+        self.last: timedelta = timedelta(0)
+        self.max: timedelta = timedelta(0)
+        self.total: timedelta = timedelta(0)
+
+    @property
+    def mean(self) -> timedelta:
+        """Return the mean lag."""
+        return self.total / self.count if self.count else timedelta(0)
+
+    def record(self, time_fired: datetime) -> timedelta:
+        """Record the lag of a state change that is handled now and return it."""
+        lag = max(dt_util.utcnow() - time_fired, timedelta(0))
+        self.count += 1
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.total += lag
+        return lag
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in seconds."""
+        return {
+            "count": self.count,
+            "last": self.last.total_seconds(),
+            "mean": self.mean.total_seconds(),
+            "max": self.max.total_seconds(),
+        }
+
+
+class _PendingCondition:
+    """
+    A condition change that has not lasted for its minimum duration yet.
+
+    A reset or calibration of a sensor, a time window change or a drop of the
+    source value while the change is pending is a boundary: once the change is
+    passed on, it applies as of the change or the last boundary after it.
+    """
+
+    def __init__(
+        self, *, active: bool, source_value: Any, count: Any, lag_ns: int
+    ) -> None:
+        """Initialize the pending change, at the moment it happened."""
+        self.active = active
+        self.count = count
+        self.listener: Callable | None = None
+        # Moment, source value and count of the last boundary, for all sensors
+        # and for the sensors that had a boundary of their own after it.
+        self._boundary = (time.monotonic_ns() - lag_ns, source_value, count)
+        self._sensor_boundaries: dict[Any, tuple[int, Any, Any]] = {}
+
+    def split(self, source_value: Any, sensor: Any = None) -> None:
+        """Add a boundary now, for one sensor or for all of them."""
+        boundary = (time.monotonic_ns(), source_value, self.count)
+        if sensor is None:
+            self._boundary = boundary
+            self._sensor_boundaries.clear()
+        else:
+            self._sensor_boundaries[sensor] = boundary
+
+    def backdate(self, sensor: Any) -> Backdate:
+        """Return the moment a sensor starts or stops as of, when it does so now."""
+        since_ns, source_value, count = self._sensor_boundaries.get(
+            sensor, self._boundary
+        )
+        return Backdate(
+            time.monotonic_ns() - since_ns, source_value, self.count - count
+        )
+
 
 class MeasureItCoordinator:
     """MeasureIt Coordinator."""
@@ -51,6 +138,10 @@ class MeasureItCoordinator:
         condition_template: Template | None = None,
         counter_template: Template | None = None,
         source_entity: str | None = None,
+        engine: NumericEngine | None = None,
+        coalesce_interval: timedelta | None = None,
+        condition_min_on: timedelta | None = None,
+        condition_min_off: timedelta | None = None,
     ) -> None:
         """Initialize the coordinator."""
         self.hass: HomeAssistant = hass
@@ -64,24 +155,61 @@ class MeasureItCoordinator:
         if time_window is None:
             msg = "Time window must be provided."
             raise ValueError(msg)
-        self._time_window: TimeWindow = time_window
+        self._time_window_tracker = async_get_time_window_tracker(hass)
+        self._time_window: TimeWindow = self._time_window_tracker.async_intern(
+            time_window
+        )
 
         self._condition_template: Template | None = condition_template
         self._counter_template: Template | None = counter_template
         self._source_entity: str | None = source_entity
+        self._engine: NumericEngine = engine or DECIMAL_ENGINE
+        self._coalesce_interval: timedelta | None = coalesce_interval
+        self._source_value: Any = None
+        self._pending_source_value: Any = None
+        # Time fired of recent source readings, with the source value before each
+        self._source_history: deque[tuple[datetime, Any]] = deque(
+            maxlen=SOURCE_HISTORY_SIZE
+        )
+        self._coalesce_listener: Callable | None = None
+        self._condition_min_on: timedelta | None = condition_min_on
+        self._condition_min_off: timedelta | None = condition_min_off
+        self._condition_active: bool | None = None
+        self._pending_condition: _PendingCondition | None = None
+        self._event_lag = EventLag()
 
         self._sensors: dict[Callable, MeasureItCoordinatorEntity] = {}
         self._time_window_listener: Callable | None = None
-        self._condition_template_listener: TrackTemplateResultInfo | None = None
+        self._condition_template_listener: Callable | None = None
         self._counter_template_listener: Callable | None = None
         self._source_entity_update_listener: Callable | None = None
-        self._heartbeat_listener: Callable | None = None
+        self._heartbeat = (
+            async_get_heartbeat(hass) if meter_type == MeterType.TIME else None
+        )
+        self._meter_store = (
+            SourceMeterStore(self._engine) if meter_type == MeterType.SOURCE else None
+        )
 
     @property
     def source_entity(self) -> str | None:
         """Return the source entity."""
         return self._source_entity
 
+    @property
+    def engine(self) -> NumericEngine:
+        """Return the numeric engine for the meters of this coordinator."""
+        return self._engine
+
+    @property
+    def meter_store(self) -> SourceMeterStore | None:
+        """Return the store with the source meters of this coordinator."""
+        return self._meter_store
+
+    @property
+    def event_lag(self) -> EventLag:
+        """Return the observed lag of handling state changes."""
+        return self._event_lag
+
     @callback
     def async_register_sensor(
         self, sensor: MeasureItCoordinatorEntity
@@ -92,10 +220,24 @@ class MeasureItCoordinator:
         def unregister_sensor() -> None:
             """Unregister the sensor."""
             self._sensors.pop(unregister_sensor)
+            if self._heartbeat:
+                self._heartbeat.async_untrack(sensor)
 
         self._sensors[unregister_sensor] = sensor
         return unregister_sensor
 
+    @callback
+    def async_on_sensor_measuring_change(
+        self, sensor: MeasureItCoordinatorEntity, *, measuring: bool
+    ) -> None:
+        """Keep the heartbeat informed about which time sensors are measuring."""
+        if not self._heartbeat:
+            return
+        if measuring:
+            self._heartbeat.async_track(sensor)
+        else:
+            self._heartbeat.async_untrack(sensor)
+
     def _get_sensor_state(self, entity_id: str) -> Any:
         """Get the state of a sensor."""
         state = self.hass.states.get(entity_id)
@@ -111,28 +253,24 @@ class MeasureItCoordinator:
             self._setup_source_meter()
         elif self._meter_type == MeterType.COUNTER:
             self._setup_counter_meter()
-        elif self._meter_type == MeterType.TIME:
-            self._setup_time_meter()
 
         if self._time_window.always_active:
             time_window_active = True
         else:
-            self._time_window_listener = async_track_point_in_time(
-                self.hass,
-                self.async_on_time_window_active_change,
-                self._time_window.next_change(tznow),
+            self._time_window_listener = self._time_window_tracker.async_track(
+                self._time_window, self.async_on_time_window_active_change
             )
             time_window_active = self._time_window.is_active(tznow)
         for sensor in self._sensors.values():
             sensor.on_time_window_change(active=time_window_active)
 
         if self._condition_template:
-            self._condition_template_listener = async_track_template_result(
-                self.hass,
-                [TrackTemplate(self._condition_template, None)],
-                self.async_on_condition_template_update,
+            # Coordinators with the same condition share one template tracker
+            self._condition_template_listener = async_get_condition_tracker(
+                self.hass
+            ).async_track(
+                self._condition_template, self.async_on_condition_template_update
             )
-            self._condition_template_listener.async_refresh()
         else:
             _LOGGER.debug(
                 """%s # No condition template in configuration
@@ -162,9 +300,7 @@ class MeasureItCoordinator:
             )
 
         try:
-            new_state = Decimal(source_state)
-            for sensor in self._sensors.values():
-                sensor.on_value_change(new_state)
+            self._on_source_value(self._engine.parse(source_state))
         except (InvalidOperation, TypeError):
             _LOGGER.warning(
                 """%s # Could not convert source state to a number: %s. Make sure
@@ -186,23 +322,29 @@ class MeasureItCoordinator:
             self.async_on_counter_template_update,
         )
 
-    def _setup_time_meter(self) -> None:
-        """Set up time meter."""
-        self.async_on_heartbeat()
-
     def stop(self) -> None:
         """Stop the coordinator."""
         _LOGGER.debug("Stopping coordinator")
+        self.async_flush_source()
+        if (pending := self._pending_condition) is not None:
+            # A change that did not last for its minimum duration is dropped
+            self._pending_condition = None
+            pending.listener()
         if self._time_window_listener:
             self._time_window_listener()
+            self._time_window_listener = None
         if self._condition_template_listener:
-            self._condition_template_listener.async_remove()
+            self._condition_template_listener()
+            self._condition_template_listener = None
         if self._counter_template_listener:
             self._counter_template_listener()
-        if self._heartbeat_listener:
-            self._heartbeat_listener()
+            self._counter_template_listener = None
+        if self._heartbeat:
+            for sensor in self._sensors.values():
+                self._heartbeat.async_untrack(sensor)
         if self._source_entity_update_listener:
             self._source_entity_update_listener()
+            self._source_entity_update_listener = None
 
     @callback
     def async_on_time_window_active_change(self, now: datetime) -> None:
@@ -211,27 +353,19 @@ class MeasureItCoordinator:
             "%s # Time window active change triggered at: %s. Next change: %s",
             self._config_name,
             now.isoformat(),
-            self._time_window.next_change(now).isoformat(),
+            self._time_window.next_change(now),
         )
         active = self._time_window.is_active(now)
+        self.async_flush_source()
+        self.async_split_condition()
         for sensor in self._sensors.values():
             sensor.on_time_window_change(active=active)
 
-        self._time_window_listener = async_track_point_in_time(
-            self.hass,
-            self.async_on_time_window_active_change,
-            self._time_window.next_change(now),
-        )
-
     @callback
     def async_on_condition_template_update(
-        self,
-        event: Event,  # noqa: ARG002
-        updates: list[TrackTemplateResult],
+        self, result: Any, time_fired: datetime | None = None
     ) -> None:
-        """Handle changes in the condition template."""
-        result = updates.pop().result
-
+        """Handle changes in the condition template, caused at the time fired."""
         if isinstance(result, TemplateError):
             _LOGGER.error(
                 """%s # Encountered a template error: %s.
@@ -243,12 +377,108 @@ class MeasureItCoordinator:
             _LOGGER.debug(
                 "%s # Condition template changed to: %s.", self._config_name, result
             )
+            lag_ns = 0
+            source_value = None
+            if time_fired is not None:
+                lag = self._event_lag.record(time_fired)
+                lag_ns = lag // timedelta(microseconds=1) * 1000
+                source_value = self._source_value_at(time_fired)
+            self._async_flush_source_reading()
+            self._on_condition_change(
+                active=bool(result), lag_ns=lag_ns, source_value=source_value
+            )
+
+    def _source_value_at(self, time_fired: datetime) -> Any:
+        """
+        Return the source value at a moment, None if it is the current value.
+
+        Readings fired at the same moment count as after it. The readings up to the
+        moment are no longer needed, as changes are handled in order.
+        """
+        history = self._source_history
+        while history and history[0][0] < time_fired:
+            history.popleft()
+        return history[0][1] if history else None
+
+    def _on_condition_change(
+        self, *, active: bool, lag_ns: int = 0, source_value: Any = None
+    ) -> None:
+        """
+        Pass a condition change on, once it lasted for its minimum duration.
+
+        The change happened the lag before now, at the source value if given. The
+        sensors start or stop as of that moment.
+        """
+        if (pending := self._pending_condition) is not None:
+            if pending.active != active:
+                _LOGGER.debug(
+                    "%s # Condition changed back within its minimum duration.",
+                    self._config_name,
+                )
+                self._pending_condition = None
+                pending.listener()
+            return
+        min_duration = self._condition_min_on if active else self._condition_min_off
+        if not min_duration or self._condition_active in (None, active):
+            self._condition_active = active
+            backdate = (
+                Backdate(lag_ns, source_value, self._engine.zero)
+                if lag_ns or source_value is not None
+                else None
+            )
             for sensor in self._sensors.values():
-                sensor.on_condition_template_change(active=bool(result))
+                sensor.on_condition_template_change(active=active, backdate=backdate)
+            return
+        pending = self._pending_condition = _PendingCondition(
+            active=active,
+            source_value=self._source_value if source_value is None else source_value,
+            count=self._engine.zero,
+            lag_ns=lag_ns,
+        )
+        pending.listener = async_call_later(
+            self.hass, min_duration, self._async_on_condition_min_duration
+        )
+
+    @callback
+    def _async_on_condition_min_duration(self, now: datetime) -> None:  # noqa: ARG002
+        """
+        Pass the pending condition change on, now that it lasted long enough.
+
+        The sensors start or stop as of the moment the condition changed, or the
+        last boundary after it, so nothing is lost or added while waiting.
+        """
+        if (pending := self._pending_condition) is None:
+            return
+        self._pending_condition = None
+        _LOGGER.debug(
+            "%s # Condition changed to %s, at least %s ago.",
+            self._config_name,
+            pending.active,
+            self._condition_min_on if pending.active else self._condition_min_off,
+        )
+        self._condition_active = pending.active
+        for sensor in self._sensors.values():
+            sensor.on_condition_template_change(
+                active=pending.active, backdate=pending.backdate(sensor)
+            )
+
+    @callback
+    def async_split_condition(
+        self, sensor: MeasureItCoordinatorEntity | None = None
+    ) -> None:
+        """
+        Add a boundary to a pending condition change, for one sensor or all of them.
+
+        Called when a sensor resets or calibrates, or the time window changes. When
+        the change is passed on, it does not apply to what happened before.
+        """
+        if self._pending_condition is not None:
+            self._pending_condition.split(self._source_value, sensor)
 
     @callback
     def async_on_source_entity_state_change(self, event: Event) -> None:
         """Handle changes in the source entity state."""
+        self._event_lag.record(event.time_fired)
         old_state = (
             event.data.get("old_state").state if event.data.get("old_state") else None
         )
@@ -272,9 +502,7 @@ class MeasureItCoordinator:
             return
 
         try:
-            new_state = Decimal(new_state)
-            for sensor in self._sensors.values():
-                sensor.on_value_change(new_state)
+            self._on_source_reading(self._engine.parse(new_state), event.time_fired)
         except (InvalidOperation, TypeError):
             _LOGGER.warning(
                 """%s # Could not convert source state to a number: %s.
@@ -284,6 +512,74 @@ class MeasureItCoordinator:
                 exc_info=True,
             )
 
+    def _on_source_reading(
+        self, value: Any, time_fired: datetime | None = None
+    ) -> None:
+        """Pass a source reading on, or keep it until the coalescing interval ends."""
+        last_value = (
+            self._source_value
+            if self._pending_source_value is None
+            else self._pending_source_value
+        )
+        if last_value is None or value < last_value:
+            # A late condition change is not back-dated across a source reset
+            self._source_history.clear()
+        elif time_fired is not None:
+            self._source_history.append((time_fired, last_value))
+        if self._coalesce_interval is None or last_value is None or value < last_value:
+            # A decrease can be a source reset, which must be handled with the
+            # exact value before it, so it is never coalesced. Nor can a pending
+            # condition change be back-dated across it.
+            self._async_flush_source_reading()
+            self._on_source_value(value)
+            if last_value is not None and value < last_value:
+                self.async_split_condition()
+            return
+        self._pending_source_value = value
+        if self._coalesce_listener is None:
+            self._coalesce_listener = async_call_later(
+                self.hass, self._coalesce_interval, self._async_on_coalesce_timeout
+            )
+
+    @callback
+    def _async_on_coalesce_timeout(self, now: datetime) -> None:  # noqa: ARG002
+        """Pass the latest source reading on at the end of the interval."""
+        self._coalesce_listener = None
+        self._async_flush_source_reading()
+
+    @callback
+    def async_flush_source(self) -> None:
+        """
+        Pass a coalesced source reading on right away.
+
+        Called before sensors start, stop, reset or calibrate, so these happen at
+        the exact source value.
+        """
+        self._async_flush_source_reading()
+
+    @callback
+    def _async_flush_source_reading(self) -> None:
+        """Pass a coalesced source reading on to the sensors right away."""
+        if self._coalesce_listener is not None:
+            self._coalesce_listener()
+            self._coalesce_listener = None
+        if self._pending_source_value is not None:
+            value, self._pending_source_value = self._pending_source_value, None
+            self._on_source_value(value)
+
+    def _on_source_value(self, value: Any) -> None:
+        """Update the meters with a new source value and notify the sensors."""
+        self._source_value = value
+        if self._meter_store is None:
+            for sensor in self._sensors.values():
+                sensor.on_value_change(value)
+            return
+        # The store updates all meters in one pass, the sensors only have to
+        # pick up their new value.
+        self._meter_store.update(value)
+        for sensor in self._sensors.values():
+            sensor.on_value_change()
+
     @callback
     def async_on_counter_template_update(
         self, entity_id: str, old_state: State | None, new_state: State | None
@@ -297,31 +593,19 @@ class MeasureItCoordinator:
             new_state.state,
             entity_id,
         )
+        if self._pending_condition is not None:
+            self._pending_condition.count += self._engine.one
         for sensor in self._sensors.values():
-            sensor.on_value_change(Decimal(1))
-
-    @callback
-    def async_on_heartbeat(self, now: datetime | None = None) -> None:  # noqa: ARG002
-        """Configure the coordinator heartbeat."""
-        for sensor in self._sensors.values():
-            sensor.on_value_change()
-
-        # We _floor_ utcnow to create a schedule on a rounded minute,
-        # minimizing the time between the point and the real activation.
-        # That way we obtain a constant update frequency,
-        # as long as the update process takes less than a minute
-        self._heartbeat_listener = async_track_point_in_utc_time(
-            self.hass,
-            self.async_on_heartbeat,
-            dt_util.utcnow().replace(second=0, microsecond=150) + UPDATE_INTERVAL,
-        )
+            sensor.on_value_change(self._engine.one)
 
 
 class MeasureItCoordinatorEntity:
     """Coordinator entity for the MeasureIt component."""
 
     @callback
-    def on_condition_template_change(self, *, active: bool) -> None:
+    def on_condition_template_change(
+        self, *, active: bool, backdate: Backdate | None = None
+    ) -> None:
         """Abstract method for handling changes in the condition template."""
         msg = "Entity should implement on_condition_template_change()"
         raise NotImplementedError(msg)
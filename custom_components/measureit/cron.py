@@ -0,0 +1,288 @@
+"""
+Cron schedules for MeasureIt resets.
+
+A schedule computes the first fire time after any moment directly, by seeking
+field by field from that moment (with cronsim, which handles DST transitions),
+instead of iterating over all fire times since the sensor was created. This keeps
+rescheduling after a long downtime as cheap as after a normal restart.
+
+The predefined hour, day, week, month and year periods are plain calendar
+boundaries, which a CalendarSchedule computes with date arithmetic instead.
+Use create_schedule() to get the fastest schedule for an expression.
+
+Sensors look up their next reset in the process wide SCHEDULE_CACHE, so sensors
+with the same expression share a schedule and its last computed fire time.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from cronsim import CronSim
+from homeassistant.util import dt as dt_util
+
+from .const import PREDEFINED_PERIODS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class CronSchedule:
+    """Schedule of a cron expression, evaluated in local time."""
+
+    def __init__(self, expression: str) -> None:
+        """Initialize the schedule, raises CronSimError for invalid expressions."""
+        self._expression = expression
+        self._fields = CronSim(expression, dt_util.now())
+
+    @property
+    def expression(self) -> str:
+        """Return the cron expression."""
+        return self._expression
+
+    def next_after(self, moment: datetime) -> datetime | None:
+        """Return the first fire time after a moment, None if there is none."""
+        moment = dt_util.as_local(moment)
+        fire_times = CronSim(self._expression, moment)
+        try:
+            fire_time = next(fire_times)
+            # Datetimes in the same time zone compare by wall clock, so this skips
+            # the fire times of an hour that is repeated at the end of DST.
+            while fire_time <= moment:
+                fire_time = next(fire_times)
+        except StopIteration:
+            return None
+        return fire_time
+
+    def seek(self, since: datetime, now: datetime) -> tuple[datetime | None, int]:
+        """
+        Return the first fire time after now and the fire times skipped since.
+
+        Skipped fire times are those after since, up to and including now. They are
+        counted by wall clock time of day, so a fire time in an hour that is skipped
+        or repeated by a DST transition is counted once.
+        """
+        return self.next_after(now), self.count_between(since, now)
+
+    def count_between(self, since: datetime, until: datetime) -> int:
+        """Return the number of fire times after since, up to and including until."""
+        since = dt_util.as_local(since).replace(microsecond=0)
+        until = dt_util.as_local(until).replace(microsecond=0)
+        if until <= since:
+            return 0
+        first_day = since.date()
+        last_day = until.date()
+        since_seconds = _seconds_of_day(since)
+        until_seconds = _seconds_of_day(until)
+        times = self._times_of_day
+        if first_day == last_day:
+            if not self._match_day(first_day):
+                return 0
+            return bisect_right(times, until_seconds) - bisect_right(
+                times, since_seconds
+            )
+        count = 0
+        if self._match_day(first_day):
+            count += len(times) - bisect_right(times, since_seconds)
+        if self._match_day(last_day):
+            count += bisect_right(times, until_seconds)
+        full_days = (last_day - first_day).days - 1
+        if self._every_day:
+            count += full_days * len(times)
+        else:
+            day = first_day
+            for _ in range(full_days):
+                day += timedelta(days=1)
+                if self._match_day(day):
+                    count += len(times)
+        return count
+
+    @cached_property
+    def _times_of_day(self) -> list[int]:
+        """Return the sorted fire times of a matching day, in seconds."""
+        fields = self._fields
+        return sorted(
+            hour * 3600 + minute * 60 + second
+            for hour in fields.hours
+            for minute in fields.minutes
+            for second in fields.seconds
+        )
+
+    @cached_property
+    def _every_day(self) -> bool:
+        """Return if the expression fires on every day."""
+        return all(part == "*" for part in self._fields.parts[3:])
+
+    def _match_day(self, day: date) -> bool:
+        """Return if the expression fires on a day."""
+        return day.month in self._fields.months and self._fields.match_day(day)
+
+
+class CalendarSchedule:
+    """
+    Schedule that fires at the start of every hour, day, week, month or year.
+
+    Boundaries are computed on the local wall clock, like cron does: an hour that
+    is repeated at the end of DST has one boundary, an hour that does not exist at
+    the start of DST has none and a midnight that falls in the gap moves to the
+    end of the gap. Weeks start on Monday.
+    """
+
+    def __init__(self, expression: str, period: str) -> None:
+        """Initialize the schedule for a period."""
+        if period not in _PERIOD_INDEX:
+            msg = f"Unsupported calendar period: {period}"
+            raise ValueError(msg)
+        self._expression = expression
+        self._period = period
+        self._index = _PERIOD_INDEX[period]
+
+    @property
+    def expression(self) -> str:
+        """Return the cron expression."""
+        return self._expression
+
+    @property
+    def period(self) -> str:
+        """Return the calendar period."""
+        return self._period
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Return the first boundary after a moment."""
+        moment = dt_util.as_local(moment)
+        period = self._period
+        if period == "hour":
+            boundary = moment.replace(minute=0, second=0, microsecond=0, fold=0)
+            boundary += timedelta(hours=1)
+            # Like cron, skip an hour that does not exist because of DST
+            while (
+                resolved := _resolve(boundary)
+            ).minute or resolved.hour != boundary.hour:
+                boundary += timedelta(hours=1)
+            return resolved
+        day = moment.date()
+        if period == "day":
+            day += timedelta(days=1)
+        elif period == "week":
+            day += timedelta(days=7 - day.weekday())
+        elif period == "month":
+            day = (
+                date(day.year + 1, 1, 1)
+                if day.month == 12  # noqa: PLR2004
+                else date(day.year, day.month + 1, 1)
+            )
+        else:
+            day = date(day.year + 1, 1, 1)
+        boundary = datetime.combine(day, time(), tzinfo=moment.tzinfo)
+        return _resolve(boundary)
+
+    def seek(self, since: datetime, now: datetime) -> tuple[datetime, int]:
+        """Return the first boundary after now and the boundaries skipped since."""
+        return self.next_after(now), self.count_between(since, now)
+
+    def count_between(self, since: datetime, until: datetime) -> int:
+        """Return the number of boundaries after since, up to and including until."""
+        return max(
+            self._index(dt_util.as_local(until)) - self._index(dt_util.as_local(since)),
+            0,
+        )
+
+
+# Index of the period a moment is in, counted on the wall clock since year 1
+_PERIOD_INDEX: dict[str, Callable[[datetime], int]] = {
+    "hour": lambda moment: moment.toordinal() * 24 + moment.hour,
+    "day": lambda moment: moment.toordinal(),
+    "week": lambda moment: (moment.toordinal() - 1) // 7,
+    "month": lambda moment: moment.year * 12 + moment.month,
+    "year": lambda moment: moment.year,
+}
+
+_CALENDAR_PERIODS = {PREDEFINED_PERIODS[period]: period for period in _PERIOD_INDEX}
+
+
+def create_schedule(expression: str) -> CronSchedule | CalendarSchedule:
+    """
+    Create the schedule for a cron expression.
+
+    Expressions of the predefined calendar periods get a CalendarSchedule, other
+    expressions a CronSchedule.
+    """
+    if (period := _CALENDAR_PERIODS.get(" ".join(expression.split()))) is not None:
+        return CalendarSchedule(expression, period)
+    return CronSchedule(expression)
+
+
+class ScheduleCache:
+    """
+    LRU cache of schedules, keyed on expression and time zone.
+
+    Every entry remembers the last fire time it computed and the moment it was
+    computed for. As there is no fire time in between, the same fire time is the
+    answer for any moment in that interval, e.g. "next midnight" is computed
+    once for all daily sensors. The cache is cleared when the time zone changes.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """Initialize the cache."""
+        self._maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str], list] = OrderedDict()
+        self._time_zone = dt_util.get_default_time_zone()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached schedules."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all schedules."""
+        self._entries.clear()
+
+    def get(self, expression: str) -> CronSchedule | CalendarSchedule:
+        """Return the schedule of an expression, raises CronSimError if invalid."""
+        return self._entry(expression)[0]
+
+    def next_after(self, expression: str, moment: datetime) -> datetime | None:
+        """Return the first fire time of an expression after a moment."""
+        entry = self._entry(expression)
+        schedule, after, fire_time = entry
+        if fire_time is not None and after <= moment < fire_time:
+            self.hits += 1
+            return fire_time
+        self.misses += 1
+        fire_time = schedule.next_after(moment)
+        if fire_time is not None:
+            entry[1:] = moment, fire_time
+        return fire_time
+
+    def _entry(self, expression: str) -> list:
+        """Return the cache entry of an expression: [schedule, after, fire time]."""
+        time_zone = dt_util.get_default_time_zone()
+        if time_zone != self._time_zone:
+            self._entries.clear()
+            self._time_zone = time_zone
+        key = (expression, str(time_zone))
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._entries[key] = [create_schedule(expression), None, None]
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+
+SCHEDULE_CACHE = ScheduleCache()
+
+
+def _resolve(moment: datetime) -> datetime:
+    """Return a local moment, moving a moment in a DST gap to the end of the gap."""
+    return dt_util.as_local(dt_util.as_utc(moment))
+
+
+def _seconds_of_day(moment: datetime) -> int:
+    """Return the wall clock seconds since midnight."""
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
@@ -0,0 +1,44 @@
+"""Diagnostics support for MeasureIt."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .condition_tracker import async_get_condition_tracker
+from .const import COORDINATOR, DOMAIN_DATA
+from .template_cache import async_get_template_cache
+from .util import RENDERER_STATS
+from .write_scheduler import async_get_write_scheduler
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN_DATA][entry.entry_id][COORDINATOR]
+    write_scheduler = async_get_write_scheduler(hass)
+    template_cache = async_get_template_cache(hass)
+    return {
+        "options": dict(entry.options),
+        # Delay in seconds between state changes and their handling
+        "event_lag": coordinator.event_lag.as_dict(),
+        "write_scheduler": {
+            "budget": write_scheduler.budget(coordinator),
+            "queue_depth": write_scheduler.queue_depth(coordinator),
+            "deferred_writes": write_scheduler.deferred_writes(coordinator),
+        },
+        # Value template renderers created since start, by the way they render
+        "renderers": RENDERER_STATS.as_dict(),
+        "condition_tracker": {
+            "tracked_templates": async_get_condition_tracker(hass).tracked_templates,
+        },
+        "template_cache": {
+            "size": len(template_cache),
+            "hits": template_cache.hits,
+            "misses": template_cache.misses,
+        },
+    }
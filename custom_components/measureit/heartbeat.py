@@ -0,0 +1,93 @@
+"""
+Shared heartbeat for MeasureIt time meters.
+
+A single timer is shared by all config entries. Only entities of which the meter
+is currently measuring are tracked, so idle meters cost nothing per tick.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import HEARTBEAT_DATA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .coordinator import MeasureItCoordinatorEntity
+
+UPDATE_INTERVAL = timedelta(minutes=1)
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class MeasureItHeartbeat:
+    """Domain wide heartbeat that updates all measuring time meters."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the heartbeat."""
+        self.hass: HomeAssistant = hass
+        self._entities: dict[MeasureItCoordinatorEntity, None] = {}
+        self._listener: Callable | None = None
+
+    @property
+    def tracked_entities(self) -> int:
+        """Return the number of entities updated on each tick."""
+        return len(self._entities)
+
+    @property
+    def active(self) -> bool:
+        """Return if the heartbeat timer is armed."""
+        return self._listener is not None
+
+    @callback
+    def async_track(self, entity: MeasureItCoordinatorEntity) -> None:
+        """Update the entity on each tick, until it is untracked."""
+        self._entities[entity] = None
+        if self._listener is None:
+            self._schedule()
+
+    @callback
+    def async_untrack(self, entity: MeasureItCoordinatorEntity) -> None:
+        """Stop updating the entity on each tick."""
+        self._entities.pop(entity, None)
+        if not self._entities and self._listener is not None:
+            self._listener()
+            self._listener = None
+
+    @callback
+    def async_on_heartbeat(self, now: datetime | None = None) -> None:  # noqa: ARG002
+        """Update all tracked entities and schedule the next tick."""
+        if self._listener is not None:
+            self._listener()
+            self._listener = None
+        # An entity can untrack itself while being updated, so iterate over a copy.
+        for entity in list(self._entities):
+            entity.on_value_change()
+        if self._entities and self._listener is None:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        """Schedule the next tick."""
+        # We _floor_ utcnow to create a schedule on a rounded minute,
+        # minimizing the time between the point and the real activation.
+        # That way we obtain a constant update frequency,
+        # as long as the update process takes less than a minute
+        self._listener = async_track_point_in_utc_time(
+            self.hass,
+            self.async_on_heartbeat,
+            dt_util.utcnow().replace(second=0, microsecond=150) + UPDATE_INTERVAL,
+        )
+
+
+@callback
+def async_get_heartbeat(hass: HomeAssistant) -> MeasureItHeartbeat:
+    """Return the shared heartbeat, creating it on first use."""
+    if (heartbeat := hass.data.get(HEARTBEAT_DATA)) is None:
+        heartbeat = hass.data[HEARTBEAT_DATA] = MeasureItHeartbeat(hass)
+    return heartbeat
@@ -0,0 +1,351 @@
+"""
+Holiday calendars for MeasureIt time windows.
+
+A holiday calendar is a local ICS file with the days on which a time window is
+not active, e.g. public holidays or company shutdown days. The file is read and
+parsed in the executor, once for all config entries that refer to it, and only
+read again when its modification time changes. The dates are indexed per year,
+so checking a date is a set lookup. Every config entry holds a reference to the
+calendar it uses and releases it when it is unloaded. A calendar is dropped, and
+no longer checked for changes, when its last reference is released.
+
+Only the parts of ICS that holiday calendars use are supported: events with a
+start date, an optional end date or duration, and yearly recurrence. Times of
+day are ignored, an event excludes the dates it is written with.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import HOLIDAY_CALENDAR_DATA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = timedelta(hours=1)
+# February 29 occurs at least once in every 8 years
+_LEAP_YEAR_GAP = 8
+_ONE_DAY = timedelta(days=1)
+_DURATION = re.compile(r"P(?:(\d+)W)?(?:(\d+)D)?")
+
+
+class YearlyEvent(NamedTuple):
+    """An event that recurs every year on the date it starts."""
+
+    start: date
+    days: int
+    last_year: int | None
+
+
+class HolidayCalendar:
+    """Dates from an ICS file on which time windows are not active."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the calendar, it is empty until it is refreshed."""
+        self.hass: HomeAssistant = hass
+        self.path = path
+        self._mtime: int | None = None
+        self._dates: dict[int, set[date]] = {}
+        self._yearly: list[YearlyEvent] = []
+        self._last_year: int | None = 0
+        self._endless_from: int = 0
+        self._years: dict[int, frozenset[date]] = {}
+        self._boundaries: dict[int, list[date]] = {}
+        self._lock = asyncio.Lock()
+        self._listeners: dict[Callable, Callable[[], None]] = {}
+        self._refresh_listener: Callable | None = None
+        self.owners: set[str] = set()
+
+    def __contains__(self, day: date) -> bool:
+        """Return if a date is in the calendar."""
+        if (dates := self._years.get(day.year)) is None:
+            dates = self._index_year(day.year)
+        return day in dates
+
+    def next_boundary(self, day: date) -> date | None:
+        """
+        Return the first date after a day at which the calendar starts or ends.
+
+        That is a date in the calendar of which the day before is not, or the other
+        way around. Returns None if there is no such date.
+        """
+        if (last_year := self._last_year) is None:
+            # Once started, endless yearly events occur at least every leap year
+            last_year = max(day.year, self._endless_from) + _LEAP_YEAR_GAP
+        for year in range(day.year, last_year + 1):
+            if (boundaries := self._boundaries.get(year)) is None:
+                boundaries = self._index_boundaries(year)
+            index = bisect_right(boundaries, day)
+            if index < len(boundaries):
+                return boundaries[index]
+        return None
+
+    def _index_year(self, year: int) -> frozenset[date]:
+        """Return the dates of a year, including those of yearly events."""
+        dates = set(self._dates.get(year, ()))
+        for event in self._yearly:
+            # An event that starts in the previous year can last into this year
+            for event_year in (year - 1, year):
+                if event_year < event.start.year or (
+                    event.last_year is not None and event_year > event.last_year
+                ):
+                    continue
+                try:
+                    start = event.start.replace(year=event_year)
+                except ValueError:
+                    # Like ICS, skip February 29 in other years
+                    continue
+                dates.update(
+                    day
+                    for day in (start + timedelta(days=i) for i in range(event.days))
+                    if day.year == year
+                )
+        result = self._years[year] = frozenset(dates)
+        return result
+
+    def _index_boundaries(self, year: int) -> list[date]:
+        """Return the sorted dates of a year at which membership changes."""
+        dates = self._years.get(year) or self._index_year(year)
+        candidates = {date(year, 1, 1)} | dates | {day + _ONE_DAY for day in dates}
+        result = self._boundaries[year] = sorted(
+            day
+            for day in candidates
+            if day.year == year and (day in self) != (day - _ONE_DAY in self)
+        )
+        return result
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """
+        Call the listener when the dates change and return a callback to remove it.
+
+        While there are listeners, the file is checked for changes periodically.
+        """
+
+        @callback
+        def remove() -> None:
+            """Remove the listener."""
+            if self._listeners.pop(remove, None) is None:
+                return
+            if not self._listeners and self._refresh_listener is not None:
+                self._refresh_listener()
+                self._refresh_listener = None
+
+        self._listeners[remove] = listener
+        if self._refresh_listener is None:
+            self._refresh_listener = async_track_time_interval(
+                self.hass, self._async_on_refresh_interval, REFRESH_INTERVAL
+            )
+        return remove
+
+    @callback
+    def async_stop(self) -> None:
+        """Remove all listeners and stop checking the file for changes."""
+        self._listeners.clear()
+        if self._refresh_listener is not None:
+            self._refresh_listener()
+            self._refresh_listener = None
+
+    @callback
+    def _async_on_refresh_interval(self, now: datetime) -> None:  # noqa: ARG002
+        """Check the file for changes."""
+        self.hass.async_create_task(self.async_refresh())
+
+    async def async_refresh(self) -> bool:
+        """Read the file again if it changed, return if the dates changed."""
+        async with self._lock:
+            try:
+                loaded = await self.hass.async_add_executor_job(
+                    _load, self.path, self._mtime
+                )
+            except (OSError, ValueError) as ex:
+                _LOGGER.warning("Could not read holiday calendar %s: %s", self.path, ex)
+                return False
+            if loaded is None:
+                return False
+            mtime, dates, yearly = loaded
+            self._mtime = mtime
+            if dates == self._dates and yearly == self._yearly:
+                return False
+            _LOGGER.debug(
+                "Loaded %s dates and %s yearly events from holiday calendar %s",
+                sum(len(year_dates) for year_dates in dates.values()),
+                len(yearly),
+                self.path,
+            )
+            self._dates = dates
+            self._yearly = yearly
+            self._last_year = _last_year(dates, yearly)
+            self._endless_from = max(
+                (event.start.year for event in yearly if event.last_year is None),
+                default=0,
+            )
+            self._years.clear()
+            self._boundaries.clear()
+        for listener in list(self._listeners.values()):
+            listener()
+        return True
+
+
+@callback
+def async_get_holiday_calendar(
+    hass: HomeAssistant, path: str, owner: str
+) -> HolidayCalendar:
+    """
+    Return the shared calendar of a file, referenced by an owner.
+
+    The owner is usually the entry id. The calendar is created on first use.
+    """
+    calendars: dict[str, HolidayCalendar] = hass.data.setdefault(
+        HOLIDAY_CALENDAR_DATA, {}
+    )
+    if (calendar := calendars.get(path)) is None:
+        calendar = calendars[path] = HolidayCalendar(hass, path)
+    calendar.owners.add(owner)
+    return calendar
+
+
+@callback
+def async_release_holiday_calendars(hass: HomeAssistant, owner: str) -> None:
+    """Release the calendars of an owner, e.g. when the entry is unloaded."""
+    calendars: dict[str, HolidayCalendar] = hass.data.get(HOLIDAY_CALENDAR_DATA, {})
+    for path, calendar in list(calendars.items()):
+        calendar.owners.discard(owner)
+        if not calendar.owners:
+            calendar.async_stop()
+            del calendars[path]
+    _LOGGER.debug("Released calendars of %s, %s in use", owner, len(calendars))
+
+
+def _load(
+    path: str, mtime: int | None
+) -> tuple[int, dict[int, set[date]], list[YearlyEvent]] | None:
+    """Read and parse the file, None if it did not change since mtime."""
+    file = Path(path)
+    if (current := file.stat().st_mtime_ns) == mtime:
+        return None
+    dates, yearly = parse_ics(file.read_text(encoding="utf-8", errors="replace"))
+    by_year: dict[int, set[date]] = {}
+    for day in dates:
+        by_year.setdefault(day.year, set()).add(day)
+    return current, by_year, yearly
+
+
+def _last_year(dates: dict[int, set[date]], yearly: list[YearlyEvent]) -> int | None:
+    """Return the last year with a boundary, None if yearly events are endless."""
+    last_years = [year + 1 for year in dates]
+    for event in yearly:
+        if event.last_year is None:
+            return None
+        last_years.append(event.last_year + 1)
+    return max(last_years, default=0)
+
+
+def parse_ics(text: str) -> tuple[set[date], list[YearlyEvent]]:
+    """
+    Return the dates of the events in ICS text and the events that recur yearly.
+
+    Raises ValueError when the text is not a calendar or a date is invalid.
+    """
+    lines = _unfold(text)
+    if not lines or lines[0].upper() != "BEGIN:VCALENDAR":
+        msg = "Not an ICS calendar"
+        raise ValueError(msg)
+    dates: set[date] = set()
+    yearly: list[YearlyEvent] = []
+    event: dict[str, str] | None = None
+    for line in lines:
+        name, _, value = line.partition(":")
+        name = name.partition(";")[0].upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            _add_event(event, dates, yearly)
+            event = None
+        elif event is not None:
+            event.setdefault(name, value.strip())
+    return dates, sorted(set(yearly))
+
+
+def _unfold(text: str) -> list[str]:
+    """Return the lines of ICS text, with folded lines joined."""
+    lines: list[str] = []
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line.strip():
+            lines.append(line.strip())
+    return lines
+
+
+def _add_event(
+    event: dict[str, str], dates: set[date], yearly: list[YearlyEvent]
+) -> None:
+    """Add the dates of an event."""
+    if "DTSTART" not in event or event.get("STATUS", "").upper() == "CANCELLED":
+        return
+    start = _parse_date(event["DTSTART"])
+    if "DTEND" in event:
+        end_value = event["DTEND"]
+        end = _parse_date(end_value)
+        # The end is exclusive, unless the event ends during the day
+        if "T" in end_value.upper() and end_value[9:15] != "000000":
+            end += _ONE_DAY
+    elif (duration := _DURATION.match(event.get("DURATION", "").upper())) and any(
+        duration.groups()
+    ):
+        weeks, days = (int(value or 0) for value in duration.groups())
+        end = start + timedelta(weeks=weeks, days=days)
+    else:
+        end = start + _ONE_DAY
+    days = max((end - start).days, 1)
+
+    if rule := event.get("RRULE"):
+        parts = dict(
+            part.split("=", 1) for part in rule.upper().split(";") if "=" in part
+        )
+        if (
+            parts.get("FREQ") == "YEARLY"
+            and parts.get("INTERVAL", "1") == "1"
+            and set(parts) <= {"FREQ", "COUNT", "UNTIL", "INTERVAL"}
+        ):
+            yearly.append(YearlyEvent(start, days, _rule_last_year(start, parts)))
+            return
+        _LOGGER.warning(
+            "Unsupported recurrence %s in holiday calendar, using the first date only",
+            rule,
+        )
+    dates.update(start + timedelta(days=i) for i in range(days))
+
+
+def _rule_last_year(start: date, parts: dict[str, str]) -> int | None:
+    """Return the last year of a yearly recurrence, None if it is endless."""
+    if count := parts.get("COUNT"):
+        return start.year + int(count) - 1
+    if until := parts.get("UNTIL"):
+        until_date = _parse_date(until)
+        if (until_date.month, until_date.day) < (start.month, start.day):
+            return until_date.year - 1
+        return until_date.year
+    return None
+
+
+def _parse_date(value: str) -> date:
+    """Parse the date of an ICS date or date-time value."""
+    value = value.strip()
+    if len(value) < 8 or not value[:8].isdigit():  # noqa: PLR2004
+        msg = f"Invalid date in holiday calendar: {value}"
+        raise ValueError(msg)
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
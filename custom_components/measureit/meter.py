@@ -1,32 +1,64 @@
 """Meter logic for MeasureIt."""
 
-from datetime import UTC, datetime
 from decimal import Decimal
-from typing import Never
-
+from typing import Any, NamedTuple, Never
+
+from custom_components.measureit.clock import (
+    MeterClock,
+    MonotonicClock,
+    ns_to_seconds,
+    seconds_to_ns,
+)
 from custom_components.measureit.const import MeterType
+from custom_components.measureit.numeric import DECIMAL_ENGINE, NumericEngine
+
+
+class Backdate(NamedTuple):
+    """
+    The moment a start or stop actually happened, when a meter starts or stops later.
+
+    Holds the time elapsed since that moment, the source value at that moment (None
+    when unknown) and what was counted since, in the native representation of the
+    numeric engine.
+    """
+
+    elapsed_ns: int
+    source_value: Any
+    count: Any
 
 
 class MeasureItMeter:
-    """Abstract meter implementation to be derived by concrete meters."""
+    """
+    Abstract meter implementation to be derived by concrete meters.
+
+    Values are kept in the native representation of the numeric engine. Values
+    passed to update() must be in that representation too, while the public
+    properties and calibrate() work with Decimals.
+    """
 
     _meter_type: MeterType
 
-    def __init__(self) -> None:
+    def __init__(self, engine: NumericEngine | None = None) -> None:
         """Initialize meter."""
-        self._measured_value = Decimal(0)
-        self._prev_measured_value = Decimal(0)
+        self._engine: NumericEngine = engine or DECIMAL_ENGINE
+        self._measured_value = self._engine.zero
+        self._prev_measured_value = self._engine.zero
         self._measuring: bool = False
 
+    @property
+    def engine(self) -> NumericEngine:
+        """Get the numeric engine."""
+        return self._engine
+
     @property
     def measured_value(self) -> Decimal:
         """Get the measured value."""
-        return self._measured_value
+        return self._engine.to_decimal(self._measured_value)
 
     @property
     def prev_measured_value(self) -> Decimal:
         """Get the previous measured value."""
-        return self._prev_measured_value
+        return self._engine.to_decimal(self._prev_measured_value)
 
     @property
     def measuring(self) -> bool:
@@ -38,12 +70,12 @@ class MeasureItMeter:
         """Get the meter type."""
         return self._meter_type
 
-    def start(self) -> Never:
-        """Start the meter."""
+    def start(self, backdate: Backdate | None = None) -> Never:
+        """Start the meter, as of the backdate if given."""
         raise NotImplementedError
 
-    def stop(self) -> Never:
-        """Stop the meter."""
+    def stop(self, backdate: Backdate | None = None) -> Never:
+        """Stop the meter, as of the backdate if given."""
         raise NotImplementedError
 
     def update(self, value: Decimal | None = None) -> Never:
@@ -68,8 +100,12 @@ class MeasureItMeter:
 
     def from_dict(self, data: dict) -> None:
         """Restore the meter from a dictionary."""
-        self._measured_value = Decimal(data["measured_value"])
-        self._prev_measured_value = Decimal(data["prev_measured_value"])
+        self._measured_value = self._engine.from_decimal(
+            Decimal(data["measured_value"])
+        )
+        self._prev_measured_value = self._engine.from_decimal(
+            Decimal(data["prev_measured_value"])
+        )
         self._measuring = bool(data["measuring"])
 
 
@@ -78,17 +114,21 @@ class CounterMeter(MeasureItMeter):
 
     _meter_type = MeterType.COUNTER
 
-    def __init__(self) -> None:
+    def __init__(self, engine: NumericEngine | None = None) -> None:
         """Initialize meter."""
-        super().__init__()
+        super().__init__(engine)
 
-    def start(self) -> None:
-        """Start the meter."""
+    def start(self, backdate: Backdate | None = None) -> None:
+        """Start the meter, counting what was counted since the backdate."""
         self._measuring = True
+        if backdate is not None:
+            self._measured_value += backdate.count
 
-    def stop(self) -> None:
-        """Stop the meter."""
+    def stop(self, backdate: Backdate | None = None) -> None:
+        """Stop the meter, not counting what was counted since the backdate."""
         self._measuring = False
+        if backdate is not None:
+            self._measured_value -= backdate.count
 
     def update(self, value: Decimal | None = None) -> None:
         """Update the meter."""
@@ -97,177 +137,124 @@ class CounterMeter(MeasureItMeter):
 
     def calibrate(self, value: Decimal) -> None:
         """Calibrate the meter."""
-        self._measured_value = value
+        self._measured_value = self._engine.from_decimal(value)
 
     def reset(self) -> None:
         """Reset the meter."""
         self._prev_measured_value, self._measured_value = (
             self._measured_value,
-            Decimal(0),
+            self._engine.zero,
         )
 
 
-class SourceMeter(MeasureItMeter):
-    """Source meter implementation."""
+class TimeMeter(MeasureItMeter):
+    """
+    Time meter implementation.
+
+    Time is kept in integer nanoseconds, as provided by the (injectable) clock, and
+    only converted to a Decimal number of seconds when read.
+    A lazy time meter does not accumulate on update() but calculates the measured
+    value on each read, based on the start of the current session.
+    """
 
-    _meter_type = MeterType.SOURCE
+    _meter_type = MeterType.TIME
 
-    def __init__(self) -> None:
+    def __init__(self, *, lazy: bool = False, clock: MeterClock | None = None) -> None:
         """Initialize meter."""
         super().__init__()
-        self._session_start_value = Decimal(0)
-        self._session_start_measured_value = Decimal(0)
-        self._source_value = None
+        self._lazy = lazy
+        self._clock: MeterClock = clock or MonotonicClock()
+        self._measured_ns = 0
+        self._prev_measured_ns = 0
+        self._session_start_ns = 0
+        self._session_start_measured_ns = 0
 
     @property
-    def has_source_value(self) -> bool:
-        """Check if the meter has a source value."""
-        return self._source_value is not None
-
-    def start(self) -> None:
-        """Start the meter."""
-        self._measuring = True
-        self._session_start_value = self._source_value
-        self._session_start_measured_value = self.measured_value
-
-    def stop(self) -> None:
-        """Stop the meter."""
-        self._measuring = False
-        self._session_total = self._source_value - self._session_start_value
-        self._measured_value = self._session_start_measured_value + self._session_total
+    def lazy(self) -> bool:
+        """Return if the measured value is calculated on read."""
+        return self._lazy
 
-    def update(self, value: Decimal | None = None) -> None:
-        """Update the meter."""
-        if value is None:
-            msg = "Source meter requires a value to update"
-            raise ValueError(msg)
-        self._source_value = value
-        if self._measuring:
-            self._session_total = self._source_value - self._session_start_value
-            self._measured_value = (
-                self._session_start_measured_value + self._session_total
+    @property
+    def measured_value(self) -> Decimal:
+        """Get the measured value."""
+        if self._lazy and self._measuring:
+            return ns_to_seconds(
+                self._session_start_measured_ns
+                + self._clock.now_ns()
+                - self._session_start_ns
             )
+        return ns_to_seconds(self._measured_ns)
 
-    def calibrate(self, value: Decimal) -> None:
-        """Calibrate the meter."""
-        self._measured_value = value
-        if self._measuring:
-            self._session_start_measured_value = value
-            # This kind of starts a new session but does not do a reset
-            self._session_start_value = self._source_value
-
-    def reset(self) -> None:
-        """Reset the meter."""
-        if self._measuring:
-            self.stop()
-            self._prev_measured_value = self._measured_value
-            self._measured_value = Decimal(0)
-            self.start()
-        else:
-            self._prev_measured_value = self._measured_value
-            self._measured_value = Decimal(0)
-
-    def handle_source_reset(self, value: Decimal) -> None:
-        """Handle source reset."""
-        if self._measuring:
-            self.stop()
-            self._source_value = Decimal(0)
-            self.start()
-            self.update(value)
-        else:
-            self._source_value = value
-
-    def to_dict(self) -> dict:
-        """Return the meter as a dictionary."""
-        data = super().to_dict()
-        source_data = {
-            **data,
-            "session_start_value": str(self._session_start_value),
-            "session_start_measured_value": str(self._session_start_measured_value),
-        }
-        if self._source_value is not None:
-            source_data["source_value"] = str(self._source_value)
-        return source_data
-
-    def from_dict(self, data: dict) -> None:
-        """Restore the meter from a dictionary."""
-        super().from_dict(data)
-        self._session_start_value = Decimal(data["session_start_value"])
-        self._session_start_measured_value = Decimal(
-            data["session_start_measured_value"]
-        )
-
-        source_value = data.get("source_value")
-        self._source_value = Decimal(source_value) if source_value is not None else None
-
-
-class TimeMeter(MeasureItMeter):
-    """Time meter implementation."""
-
-    _meter_type = MeterType.TIME
-
-    def __init__(self) -> None:
-        """Initialize meter."""
-        super().__init__()
-        self._session_start_value = Decimal(0)
-        self._session_start_measured_value = Decimal(0)
-
-    def get_timestamp(self) -> Decimal:
-        """Get timestamp."""
-        return Decimal(datetime.now(UTC).timestamp())
+    @property
+    def prev_measured_value(self) -> Decimal:
+        """Get the previous measured value."""
+        return ns_to_seconds(self._prev_measured_ns)
 
-    def start(self) -> None:
-        """Start the meter."""
+    def start(self, backdate: Backdate | None = None) -> None:
+        """Start the meter, as of the backdate if given."""
         self._measuring = True
-        self._session_start_value = self.get_timestamp()
-        self._session_start_measured_value = self.measured_value
-
-    def stop(self) -> None:
-        """Stop the meter."""
+        self._clock.anchor()
+        self._session_start_ns = self._clock.now_ns()
+        self._session_start_measured_ns = self._measured_ns
+        if backdate is not None:
+            self._session_start_ns -= backdate.elapsed_ns
+            self.update()
+
+    def stop(self, backdate: Backdate | None = None) -> None:
+        """Stop the meter, as of the backdate if given."""
         self._measuring = False
-        self._session_total = self.get_timestamp() - self._session_start_value
-        self._measured_value = self._session_start_measured_value + self._session_total
+        stop_ns = self._clock.now_ns()
+        if backdate is not None:
+            stop_ns = max(stop_ns - backdate.elapsed_ns, self._session_start_ns)
+        self._measured_ns = (
+            self._session_start_measured_ns + stop_ns - self._session_start_ns
+        )
 
     def update(self, value: Decimal | None = None) -> None:  # noqa: ARG002
         """Update the meter."""
-        if self._measuring:
-            self._session_total = self.get_timestamp() - self._session_start_value
-            self._measured_value = (
-                self._session_start_measured_value + self._session_total
+        if self._measuring and not self._lazy:
+            self._measured_ns = (
+                self._session_start_measured_ns
+                + self._clock.now_ns()
+                - self._session_start_ns
             )
 
     def calibrate(self, value: Decimal) -> None:
         """Calibrate the meter."""
-        self._measured_value = value
+        self._measured_ns = seconds_to_ns(value)
         if self._measuring:
-            self._session_start_measured_value = value
+            self._session_start_measured_ns = self._measured_ns
             # This kind of starts a new session but does not do a reset
-            self._session_start_value = self.get_timestamp()
+            self._session_start_ns = self._clock.now_ns()
 
     def reset(self) -> None:
         """Reset the meter."""
         if self._measuring:
             self.stop()
-            self._prev_measured_value = self._measured_value
-            self._measured_value = Decimal(0)
+            self._prev_measured_ns = self._measured_ns
+            self._measured_ns = 0
             self.start()
         else:
-            self._prev_measured_value = self._measured_value
-            self._measured_value = Decimal(0)
+            self._prev_measured_ns = self._measured_ns
+            self._measured_ns = 0
 
     def to_dict(self) -> dict:
         """Return the meter as a dictionary."""
         data = super().to_dict()
         return {
             **data,
-            "session_start_value": str(self._session_start_value),
-            "session_start_measured_value": str(self._session_start_measured_value),
+            "session_start_value": str(ns_to_seconds(self._session_start_ns)),
+            "session_start_measured_value": str(
+                ns_to_seconds(self._session_start_measured_ns)
+            ),
         }
 
     def from_dict(self, data: dict) -> None:
         """Restore the meter from a dictionary."""
-        super().from_dict(data)
-        self._session_start_value = Decimal(data["session_start_value"])
-        self._session_start_measured_value = Decimal(
+        self._measured_ns = seconds_to_ns(data["measured_value"])
+        self._prev_measured_ns = seconds_to_ns(data["prev_measured_value"])
+        self._measuring = bool(data["measuring"])
+        self._session_start_ns = seconds_to_ns(data["session_start_value"])
+        self._session_start_measured_ns = seconds_to_ns(
             data["session_start_measured_value"]
         )
@@ -0,0 +1,293 @@
+"""
+Column store for the source meters of one config entry.
+
+All sensors of a source entry measure the same source entity, so the store keeps
+the source value once and every meter as a row in a set of columns. A measuring
+row does not store its measured value but derives it from the source value:
+
+    measured = session start measured value + source value - session start value
+
+A source update therefore stores the new value once, instead of updating every
+meter. The rows that check for a source reset are only visited when the new value
+is below 90% of the highest measured value among them.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+from custom_components.measureit.const import MeterType
+from custom_components.measureit.meter import Backdate, MeasureItMeter
+from custom_components.measureit.numeric import DECIMAL_ENGINE, NumericEngine
+
+
+class SourceMeterStore:
+    """Store with the state of all source meters of a config entry."""
+
+    def __init__(self, engine: NumericEngine | None = None) -> None:
+        """Initialize the store."""
+        self._engine: NumericEngine = engine or DECIMAL_ENGINE
+        self._source_value: Any = None
+        # Columns are lists, as the native values of an engine can be Decimals or
+        # (unbounded) ints. Flags are kept in bytearrays.
+        self._measuring = bytearray()
+        self._source_seen = bytearray()
+        self._measured: list[Any] = []
+        self._prev_measured: list[Any] = []
+        self._session_start: list[Any] = []
+        self._session_start_measured: list[Any] = []
+        self._reset_rows: list[int] = []
+        # Highest session offset of measuring rows and highest measured value of
+        # idle rows that check for resets, None when it has to be recalculated.
+        self._reset_bounds: tuple[Any, Any] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of meters in the store."""
+        return len(self._measured)
+
+    @property
+    def engine(self) -> NumericEngine:
+        """Return the numeric engine of the store."""
+        return self._engine
+
+    @property
+    def has_source_value(self) -> bool:
+        """Check if the store has a source value."""
+        return self._source_value is not None
+
+    def create_meter(self, *, check_reset: bool = False) -> SourceMeterRow:
+        """Add a meter to the store and return a view on it."""
+        row = len(self._measured)
+        zero = self._engine.zero
+        self._measuring.append(0)
+        self._source_seen.append(0)
+        self._measured.append(zero)
+        self._prev_measured.append(zero)
+        self._session_start.append(zero)
+        self._session_start_measured.append(zero)
+        if check_reset:
+            self._reset_rows.append(row)
+            self._reset_bounds = None
+        return SourceMeterRow(self, row)
+
+    def update(self, value: Any) -> list[int]:
+        """
+        Update all meters with a new source value, in the native representation.
+
+        Rows created with check_reset start a new session when the value is below
+        90% of their measured value. Returns the rows on which this happened.
+        """
+        if value is None:
+            msg = "Source meter requires a value to update"
+            raise ValueError(msg)
+        reset_rows = []
+        if self._reset_rows and self._may_reset(value):
+            for row in self._reset_rows:
+                measured = self.measured(row)
+                if value * 10 < measured * 9:
+                    reset_rows.append(row)
+                    if self._measuring[row]:
+                        self._session_start_measured[row] = measured
+                        self._session_start[row] = self._engine.zero
+                        self._reset_bounds = None
+        self._source_value = value
+        return reset_rows
+
+    def _may_reset(self, value: Any) -> bool:
+        """Check if any of the reset checking rows could see a source reset."""
+        if self._source_value is None:
+            return True
+        if self._reset_bounds is None:
+            offsets = []
+            idle = []
+            for row in self._reset_rows:
+                if self._measuring[row]:
+                    offsets.append(
+                        self._session_start_measured[row] - self._session_start[row]
+                    )
+                else:
+                    idle.append(self._measured[row])
+            self._reset_bounds = (
+                max(offsets, default=None),
+                max(idle, default=None),
+            )
+        max_offset, max_idle = self._reset_bounds
+        threshold = value * 10
+        return (
+            max_offset is not None and threshold < (self._source_value + max_offset) * 9
+        ) or (max_idle is not None and threshold < max_idle * 9)
+
+    def measured(self, row: int) -> Any:
+        """Return the measured value of a row in the native representation."""
+        if self._measuring[row] and self._source_value is not None:
+            return (
+                self._session_start_measured[row]
+                + self._source_value
+                - self._session_start[row]
+            )
+        return self._measured[row]
+
+    def prev_measured(self, row: int) -> Any:
+        """Return the previous measured value of a row."""
+        return self._prev_measured[row]
+
+    def measuring(self, row: int) -> bool:
+        """Return if a row is measuring."""
+        return bool(self._measuring[row])
+
+    def source_seen(self, row: int) -> bool:
+        """Return if a row has been updated with a source value."""
+        return bool(self._source_seen[row])
+
+    def mark_source_seen(self, row: int) -> None:
+        """Mark that a row has been updated, once the store has a source value."""
+        if self._source_value is not None:
+            self._source_seen[row] = 1
+
+    def start(self, row: int, source_value: Any = None) -> None:
+        """Start measuring on a row, at an earlier source value if given."""
+        self._reset_bounds = None
+        self._session_start[row] = (
+            self._source_value if source_value is None else source_value
+        )
+        self._session_start_measured[row] = self._measured[row]
+        self._measuring[row] = 1
+
+    def stop(self, row: int, source_value: Any = None) -> None:
+        """Stop measuring on a row, at an earlier source value if given."""
+        self._reset_bounds = None
+        if source_value is None:
+            self._measured[row] = self.measured(row)
+        else:
+            # Never before the start of the session, e.g. after a reset
+            self._measured[row] = self._session_start_measured[row] + max(
+                source_value - self._session_start[row], self._engine.zero
+            )
+        self._measuring[row] = 0
+
+    def calibrate(self, row: int, value: Decimal) -> None:
+        """Calibrate a row."""
+        self._reset_bounds = None
+        self._measured[row] = self._engine.from_decimal(value)
+        if self._measuring[row]:
+            self._session_start_measured[row] = self._measured[row]
+            # This kind of starts a new session but does not do a reset
+            self._session_start[row] = self._source_value
+
+    def reset(self, row: int) -> None:
+        """Reset a row."""
+        self._reset_bounds = None
+        measuring = self._measuring[row]
+        if measuring:
+            self.stop(row)
+        self._prev_measured[row] = self._measured[row]
+        self._measured[row] = self._engine.zero
+        if measuring:
+            self.start(row)
+
+    def to_dict(self, row: int) -> dict:
+        """Return a row as a dictionary, in the stored format of a meter."""
+        to_decimal = self._engine.to_decimal
+        data = {
+            "measured_value": str(to_decimal(self.measured(row))),
+            "prev_measured_value": str(to_decimal(self._prev_measured[row])),
+            "measuring": bool(self._measuring[row]),
+            "session_start_value": str(to_decimal(self._session_start[row])),
+            "session_start_measured_value": str(
+                to_decimal(self._session_start_measured[row])
+            ),
+        }
+        if self._source_seen[row]:
+            data["source_value"] = str(to_decimal(self._source_value))
+        return data
+
+    def from_dict(self, row: int, data: dict) -> None:
+        """Restore a row from a dictionary, in the stored format of a meter."""
+        self._reset_bounds = None
+        from_decimal = self._engine.from_decimal
+        self._measured[row] = from_decimal(Decimal(data["measured_value"]))
+        self._prev_measured[row] = from_decimal(Decimal(data["prev_measured_value"]))
+        self._measuring[row] = bool(data["measuring"])
+        self._session_start[row] = from_decimal(Decimal(data["session_start_value"]))
+        self._session_start_measured[row] = from_decimal(
+            Decimal(data["session_start_measured_value"])
+        )
+        if (source_value := data.get("source_value")) is not None:
+            # All rows share the source value, the first restored row provides it
+            if self._source_value is None:
+                self._source_value = from_decimal(Decimal(source_value))
+            self._source_seen[row] = 1
+
+
+class SourceMeterRow(MeasureItMeter):
+    """
+    Source meter that is a view on a row of a SourceMeterStore.
+
+    As the source value is shared, update() with a value updates all meters of the
+    store, while update() without a value only acknowledges a value that was
+    already stored. The store detects source resets on update.
+    """
+
+    _meter_type = MeterType.SOURCE
+
+    def __init__(self, store: SourceMeterStore, row: int) -> None:
+        """Initialize the meter."""
+        super().__init__(store.engine)
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        """Return the row of the meter in the store."""
+        return self._row
+
+    @property
+    def measured_value(self) -> Decimal:
+        """Get the measured value."""
+        return self._engine.to_decimal(self._store.measured(self._row))
+
+    @property
+    def prev_measured_value(self) -> Decimal:
+        """Get the previous measured value."""
+        return self._engine.to_decimal(self._store.prev_measured(self._row))
+
+    @property
+    def measuring(self) -> bool:
+        """Get the measuring state."""
+        return self._store.measuring(self._row)
+
+    @property
+    def has_source_value(self) -> bool:
+        """Check if the meter has a source value."""
+        return self._store.source_seen(self._row)
+
+    def start(self, backdate: Backdate | None = None) -> None:
+        """Start the meter, at the source value of the backdate if known."""
+        self._store.start(self._row, backdate.source_value if backdate else None)
+
+    def stop(self, backdate: Backdate | None = None) -> None:
+        """Stop the meter, at the source value of the backdate if known."""
+        self._store.stop(self._row, backdate.source_value if backdate else None)
+
+    def update(self, value: Any = None) -> None:
+        """Update the meter."""
+        if value is not None:
+            self._store.update(value)
+        self._store.mark_source_seen(self._row)
+
+    def calibrate(self, value: Decimal) -> None:
+        """Calibrate the meter."""
+        self._store.calibrate(self._row, value)
+
+    def reset(self) -> None:
+        """Reset the meter."""
+        self._store.reset(self._row)
+
+    def to_dict(self) -> dict:
+        """Return the meter as a dictionary."""
+        return self._store.to_dict(self._row)
+
+    def from_dict(self, data: dict) -> None:
+        """Restore the meter from a dictionary."""
+        self._store.from_dict(self._row, data)
@@ -4,12 +4,12 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
-from cronsim import CronSim
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -26,7 +26,7 @@ from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.config_validation import make_entity_service_schema
-from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
 from homeassistant.helpers.template import is_number
 from homeassistant.util import dt as dt_util
@@ -38,6 +38,9 @@ from .const import (
     ATTR_STATUS,
     CONF_CONFIG_NAME,
     CONF_CRON,
+    CONF_DEADBAND,
+    CONF_LAZY_UPDATE,
+    CONF_MAX_AGE,
     CONF_METER_TYPE,
     CONF_SENSOR,
     CONF_SENSOR_NAME,
@@ -48,8 +51,12 @@ from .const import (
     SensorState,
 )
 from .coordinator import MeasureItCoordinator, MeasureItCoordinatorEntity
-from .meter import CounterMeter, MeasureItMeter, SourceMeter, TimeMeter
-from .util import create_renderer
+from .cron import SCHEDULE_CACHE
+from .heartbeat import UPDATE_INTERVAL
+from .meter import Backdate, CounterMeter, MeasureItMeter, TimeMeter
+from .timer_scheduler import async_get_timer_scheduler
+from .util import create_renderer, renders_only_value, seconds_until_render_change
+from .write_scheduler import async_get_write_scheduler
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -59,6 +66,10 @@ if TYPE_CHECKING:
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
+LAZY_UPDATE_MAX_DELAY = timedelta(days=1)
+
+_NOT_WRITING = object()
+
 
 def validate_is_number(value: Any) -> bool:
     """Validate value is a number."""
@@ -88,21 +99,25 @@ async def async_setup_entry(
         state_class = sensor.get(CONF_STATE_CLASS)
         device_class = sensor.get(CONF_DEVICE_CLASS)
         uom = sensor.get(CONF_UNIT_OF_MEASUREMENT)
+        deadband = sensor.get(CONF_DEADBAND)
+        max_age = sensor.get(CONF_MAX_AGE)
 
         if meter_type == MeterType.SOURCE:
-            meter = SourceMeter()
+            meter = coordinator.meter_store.create_meter(
+                check_reset=state_class == SensorStateClass.TOTAL_INCREASING
+            )
             value_template_renderer = create_renderer(
-                hass, sensor.get(CONF_VALUE_TEMPLATE), 3
+                hass, sensor.get(CONF_VALUE_TEMPLATE), 3, owner=entry_id
             )
         elif meter_type == MeterType.COUNTER:
-            meter = CounterMeter()
+            meter = CounterMeter(coordinator.engine)
             value_template_renderer = create_renderer(
-                hass, sensor.get(CONF_VALUE_TEMPLATE)
+                hass, sensor.get(CONF_VALUE_TEMPLATE), owner=entry_id
             )
         elif meter_type == MeterType.TIME:
-            meter = TimeMeter()
+            meter = TimeMeter(lazy=config_entry.options.get(CONF_LAZY_UPDATE, False))
             value_template_renderer = create_renderer(
-                hass, sensor.get(CONF_VALUE_TEMPLATE), 0
+                hass, sensor.get(CONF_VALUE_TEMPLATE), 0, owner=entry_id
             )
         else:
             _LOGGER.error("%s # Invalid meter type: %s", config_name, meter_type)
@@ -120,6 +135,8 @@ async def async_setup_entry(
             state_class,
             device_class,
             uom,
+            Decimal(str(deadband)) if deadband else None,
+            timedelta(seconds=float(max_age)) if max_age else None,
         )
         sensors.append(sensor_entity)
 
@@ -311,6 +328,8 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         state_class: SensorStateClass,
         device_class: SensorDeviceClass | None = None,
         unit_of_measurement: str | None = None,
+        deadband: Decimal | None = None,
+        max_age: timedelta | None = None,
     ) -> None:
         """Initialize a sensor entity."""
         self.hass = hass
@@ -321,6 +340,8 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         self._reset_pattern = reset_pattern
         self._value_template_renderer = value_template_renderer
         self._attr_native_unit_of_measurement = unit_of_measurement
+        self._deadband = deadband
+        self._max_age = max_age
 
         if state_class and state_class not in [
             SensorStateClass.TOTAL,
@@ -337,10 +358,25 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         self._time_window_active: bool = False
         self._active: bool = False
         self._reset_listener = None
+        self._lazy_update = meter.meter_type == MeterType.TIME and meter.lazy
+        self._lazy_update_listener = None
         self._last_reset: datetime = dt_util.now()
         self._next_reset: datetime | None = None
-
-        self.scheduler = None
+        self._attributes: dict[str, str] | None = None
+        self._written_value: Any = None
+        self._written_attributes: dict[str, str] | None = None
+        self._written_measured_value: Decimal | None = None
+        self._written_at: datetime | None = None
+        # The rendered value while writing the state, so it is rendered only once
+        self._writing_value: Any = _NOT_WRITING
+        # Attributes rendered by a template that reads other states can be stale
+        self._cache_attributes = renders_only_value(value_template_renderer)
+        self._max_age_listener = None
+        self._write_scheduler = async_get_write_scheduler(hass)
+        self._timer_scheduler = async_get_timer_scheduler(hass)
+
+        # Cron expression of the reset schedule, shared with other sensors
+        self._reset_expression: str | None = None
         if self._reset_pattern not in [
             None,
             "noreset",
@@ -348,10 +384,11 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
             "none",
             "session",
         ]:
-            self.scheduler = CronSim(
-                self._reset_pattern,
-                dt_util.now(dt_util.get_default_time_zone()),
-            )
+            # Only validates the expression, raising CronSimError when invalid.
+            # The schedule is not kept: it is looked up when scheduling a reset,
+            # so the cache can replace it on a time zone change.
+            SCHEDULE_CACHE.get(self._reset_pattern)
+            self._reset_expression = self._reset_pattern
 
     async def async_added_to_hass(self) -> None:
         """Add sensors as a listener for coordinator updates."""
@@ -365,6 +402,7 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
             self._active = last_sensor_data.active
             self._time_window_active = last_sensor_data.time_window_active
             self._last_reset = last_sensor_data.last_reset
+            self._invalidate_attributes()
             self.schedule_next_reset(last_sensor_data.next_reset)
         else:
             _LOGGER.warning("%s # Could not restore data", self._attr_name)
@@ -372,13 +410,23 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
 
         self.async_on_remove(self._coordinator.async_register_sensor(self))
         self.async_on_remove(self.unsub_reset_listener)
+        self.async_on_remove(self.unsub_lazy_update_listener)
+        self.async_on_remove(self.unsub_max_age_listener)
+        self.async_on_remove(partial(self._write_scheduler.async_cancel, self))
+        if self.meter.measuring:
+            self._on_measuring_change(measuring=True)
 
     @callback
     def calibrate(self, value: Decimal) -> None:
         """Calibrate the meter with a given value."""
         _LOGGER.info("%s # Calibrate with value: %s", self._attr_name, value)
+        self._coordinator.async_flush_source()
+        self._coordinator.async_split_condition(self)
         self.meter.calibrate(Decimal(value))
-        self.async_write_ha_state()
+        self._invalidate_attributes()
+        if self._lazy_update:
+            self._schedule_lazy_update()
+        self._async_write_state()
 
     @callback
     def unsub_reset_listener(self) -> None:
@@ -387,6 +435,20 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
             self._reset_listener()
             self._reset_listener = None
 
+    @callback
+    def unsub_max_age_listener(self) -> None:
+        """Unsubscribe and remove the max age listener."""
+        if self._max_age_listener:
+            self._max_age_listener()
+            self._max_age_listener = None
+
+    @callback
+    def unsub_lazy_update_listener(self) -> None:
+        """Unsubscribe and remove the lazy update listener."""
+        if self._lazy_update_listener:
+            self._lazy_update_listener()
+            self._lazy_update_listener = None
+
     @property
     def sensor_state(self) -> SensorState:
         """Return the sensor state."""
@@ -407,6 +469,8 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
     @property
     def native_value(self) -> str | None:
         """Return the state of the sensor."""
+        if self._writing_value is not _NOT_WRITING:
+            return self._writing_value
         return self._value_template_renderer(self.meter.measured_value)
 
     @property
@@ -423,7 +487,14 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
-        """Return the state attributes."""
+        """
+        Return the state attributes, which are cached until invalidated.
+
+        With a value template that reads other states, they are rebuilt on every
+        write, so the rendered previous value is up to date.
+        """
+        if self._attributes is not None:
+            return self._attributes
         attributes = {
             ATTR_STATUS: self.sensor_state,
             ATTR_PREV: str(
@@ -439,18 +510,110 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         }
         if self.meter.meter_type == MeterType.SOURCE:
             attributes["source_entity"] = self._coordinator.source_entity
+        self._attributes = attributes
         return attributes
 
+    @callback
+    def _invalidate_attributes(self) -> None:
+        """Rebuild the state attributes on the next state write."""
+        self._attributes = None
+
+    @callback
+    def _async_write_value_change(self) -> None:
+        """
+        Write the state after a value change, unless it can be skipped.
+
+        A write is skipped when the attributes are unchanged and the rendered value
+        is equal to the last written one, or when the measured value moved less than
+        the deadband. Invalidated attributes (reset, calibrate, start/stop) always
+        force a write. A skipped deadband change is written when max age expires.
+        """
+        value = self.native_value
+        if (
+            self._attributes is not None
+            and self._attributes is self._written_attributes
+        ):
+            if value == self._written_value:
+                return
+            if self._deadband is not None and self._within_deadband():
+                self._schedule_max_age_write()
+                return
+        self._async_write_state()
+
+    def _within_deadband(self) -> bool:
+        """Check if the measured value moved less than the deadband."""
+        return (
+            self._written_measured_value is not None
+            and abs(self.meter.measured_value - self._written_measured_value)
+            < self._deadband
+        )
+
+    @callback
+    def _async_write_state(self) -> None:
+        """Write the state, as soon as the write budget of the entry allows."""
+        self._write_scheduler.async_schedule(self, self._coordinator)
+
+    @callback
+    def async_write_scheduled_state(self) -> None:
+        """Write the state and remember what was written."""
+        self.unsub_max_age_listener()
+        if not self._cache_attributes:
+            self._invalidate_attributes()
+        self._writing_value = self.native_value
+        try:
+            self._async_write_ha_state()
+        finally:
+            self._written_value = self._writing_value
+            self._writing_value = _NOT_WRITING
+        self._written_attributes = self._attributes
+        self._written_measured_value = self.meter.measured_value
+        self._written_at = dt_util.utcnow()
+
+    @callback
+    def _async_write_final_value(self) -> None:
+        """
+        Write the measured value now, before the meter resets.
+
+        The final value of a period must not be merged with the reset state, nor be
+        lost when it was held back by the deadband.
+        """
+        if self._written_measured_value != self.meter.measured_value:
+            self._async_write_state()
+        self._write_scheduler.async_flush(self)
+
+    @callback
+    def _schedule_max_age_write(self) -> None:
+        """Make sure a skipped change is written once the written state is too old."""
+        if self._max_age is None or self._max_age_listener is not None:
+            return
+        self._max_age_listener = async_track_point_in_utc_time(
+            self.hass,
+            self._on_max_age,
+            max(self._written_at + self._max_age, dt_util.utcnow()),
+        )
+
+    @callback
+    def _on_max_age(self, now: datetime) -> None:  # noqa: ARG002
+        """Write the state that was held back by the deadband."""
+        self._max_age_listener = None
+        self._async_write_state()
+
     @callback
     def reset(self, event: Event | None = None) -> None:  # noqa: ARG002
         """Reset the sensor."""
         reset_datetime = dt_util.now()
         _LOGGER.info("Resetting sensor %s at %s", self._attr_name, reset_datetime)
+        self._coordinator.async_flush_source()
+        self._coordinator.async_split_condition(self)
+        self._async_write_final_value()
         self.meter.reset()
         self._last_reset = reset_datetime
+        self._invalidate_attributes()
+        if self._lazy_update:
+            self._schedule_lazy_update()
 
         self.schedule_next_reset()
-        self._async_write_ha_state()
+        self._async_write_state()
 
     @callback
     def on_reset_service_triggered(
@@ -469,45 +632,52 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         """Set the next reset moment."""
         tznow = dt_util.now()
         if next_reset and next_reset <= tznow:
+            if self._reset_expression:
+                skipped = SCHEDULE_CACHE.get(self._reset_expression).count_between(
+                    next_reset, tznow
+                )
+                if skipped:
+                    _LOGGER.info(
+                        "%s # Missed %s more reset(s) after %s",
+                        self._attr_name,
+                        skipped,
+                        next_reset,
+                    )
             self.reset()
             return
         if not next_reset:
-            if self.scheduler:
-                max_iterations = 1000
-                for _ in range(max_iterations):
-                    next_reset = next(self.scheduler)
-                    if next_reset > tznow:
-                        break
-                else:
+            if self._reset_expression:
+                next_reset = SCHEDULE_CACHE.next_after(self._reset_expression, tznow)
+            if not next_reset:
+                if self._reset_expression:
                     _LOGGER.error(
-                        "%s # Could not determine next reset time after %s iterations",
-                        self._attr_name,
-                        max_iterations,
+                        "%s # Could not determine next reset time", self._attr_name
                     )
-                    self._next_reset = None
-                    return
-            else:
                 self._next_reset = None
+                self._invalidate_attributes()
                 return
 
         self._next_reset = next_reset
+        self._invalidate_attributes()
 
         if self._reset_listener:
             self._reset_listener()
-        self._reset_listener = async_track_point_in_time(
-            self.hass,
-            self.reset,
+        self._reset_listener = self._timer_scheduler.async_schedule(
             self._next_reset,  # type: ignore[arg-type]
+            self.reset,
         )
 
     @callback
-    def on_condition_template_change(self, *, active: bool) -> None:
-        """Handle a change in the condition template."""
+    def on_condition_template_change(
+        self, *, active: bool, backdate: Backdate | None = None
+    ) -> None:
+        """Handle a change in the condition template, as of the backdate if given."""
         old_state = self.sensor_state
         self._active = active
         new_state = self.sensor_state
-        self._on_sensor_state_update(old_state, new_state)
-        self._async_write_ha_state()
+        self._invalidate_attributes()
+        self._on_sensor_state_update(old_state, new_state, backdate)
+        self._async_write_state()
 
     @callback
     def on_time_window_change(self, *, active: bool) -> None:
@@ -515,48 +685,82 @@ class MeasureItSensor(MeasureItCoordinatorEntity, RestoreEntity, SensorEntity):
         old_state = self.sensor_state
         self._time_window_active = active
         new_state = self.sensor_state
+        self._invalidate_attributes()
         self._on_sensor_state_update(old_state, new_state)
-        self._async_write_ha_state()
-
-    def source_has_reset(self, new_value: Decimal) -> bool:
-        """Check if the source has reset."""
-        if self.state_class != SensorStateClass.TOTAL_INCREASING:
-            return False
-        return new_value < self.meter.measured_value * Decimal("0.9")
+        self._async_write_state()
 
     @callback
     def on_value_change(self, new_value: Decimal | None = None) -> None:
         """Handle a change in the value."""
         old_state = self.sensor_state
-        if new_value is not None:
-            if self.meter.meter_type == MeterType.SOURCE and self.source_has_reset(
-                new_value
-            ):
-                meter: SourceMeter = self.meter
-                meter.handle_source_reset(new_value)
-            else:
-                self.meter.update(new_value)
-        else:
-            self.meter.update()
+        self.meter.update(new_value)
         if old_state == SensorState.INITIALIZING_SOURCE:
             new_state = self.sensor_state
+            self._invalidate_attributes()
             self._on_sensor_state_update(old_state, new_state)
-        self._async_write_ha_state()
+        self._async_write_value_change()
 
     def _on_sensor_state_update(
-        self, old_state: SensorState, new_state: SensorState
+        self,
+        old_state: SensorState,
+        new_state: SensorState,
+        backdate: Backdate | None = None,
     ) -> None:
         """Start/stop meter when needed."""
         if new_state == old_state:
             return
         if new_state == SensorState.MEASURING:
-            self.meter.start()
+            self.meter.start(backdate)
+            self._on_measuring_change(measuring=True)
         if old_state == SensorState.MEASURING:
-            self.meter.stop()
-            self._async_write_ha_state()
+            self.meter.stop(backdate)
+            self._on_measuring_change(measuring=False)
+            self._async_write_state()
             if self._reset_pattern == "session":
                 self.reset()
 
+    @callback
+    def _on_measuring_change(self, *, measuring: bool) -> None:
+        """Make sure the sensor is updated while the meter is measuring."""
+        if self._lazy_update:
+            self._schedule_lazy_update()
+        else:
+            self._coordinator.async_on_sensor_measuring_change(
+                self, measuring=measuring
+            )
+
+    @callback
+    def _schedule_lazy_update(self) -> None:
+        """
+        Schedule the next update for the moment the rendered value changes.
+
+        Updates are never more frequent than the heartbeat would do them: for a
+        value that changes within the update interval, the update is at the first
+        change after the interval, so a change in between is only shown then.
+        """
+        self.unsub_lazy_update_listener()
+        if not self.meter.measuring:
+            return
+        max_delay = int(LAZY_UPDATE_MAX_DELAY.total_seconds())
+        delay = seconds_until_render_change(
+            self._value_template_renderer,
+            self.meter.measured_value,
+            max_delay,
+            int(UPDATE_INTERVAL.total_seconds()),
+        )
+        self._lazy_update_listener = async_track_point_in_utc_time(
+            self.hass,
+            self._on_lazy_update,
+            dt_util.utcnow() + timedelta(seconds=delay or max_delay),
+        )
+
+    @callback
+    def _on_lazy_update(self, now: datetime) -> None:  # noqa: ARG002
+        """Update the sensor state and schedule the next lazy update."""
+        self._lazy_update_listener = None
+        self.on_value_change()
+        self._schedule_lazy_update()
+
     @property
     def extra_restore_state_data(self) -> MeasureItSensorStoredData:
         """Return sensor specific state data to be stored."""
@@ -0,0 +1,75 @@
+"""
+Shared compiled templates for MeasureIt config entries.
+
+Many config entries use the same condition, counter or value templates. The
+cache keeps one validated and compiled Template per template source, so each
+distinct template is parsed and compiled once. Every config entry holds a
+reference to the templates it uses and releases them all when it is unloaded.
+A template is dropped when its last reference is released.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.template import Template
+
+from .const import TEMPLATE_CACHE_DATA
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class MeasureItTemplateCache:
+    """Domain wide cache of compiled templates, keyed on template source."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass: HomeAssistant = hass
+        self._templates: dict[str, Template] = {}
+        self._references: Counter[str] = Counter()
+        self._owners: dict[str, Counter[str]] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached templates."""
+        return len(self._templates)
+
+    @callback
+    def async_get(self, source: str, owner: str) -> Template:
+        """
+        Return the compiled template of a source, referenced by an owner.
+
+        The owner is usually the entry id. Raises TemplateError when the template
+        is invalid, in which case no reference is taken.
+        """
+        if (template := self._templates.get(source)) is not None:
+            self.hits += 1
+        else:
+            template = Template(source, self.hass)
+            template.ensure_valid()
+            self._templates[source] = template
+            self.misses += 1
+        self._references[source] += 1
+        self._owners.setdefault(owner, Counter())[source] += 1
+        return template
+
+    @callback
+    def async_release(self, owner: str) -> None:
+        """Release all references of an owner, e.g. when the entry is unloaded."""
+        for source, count in self._owners.pop(owner, Counter()).items():
+            self._references[source] -= count
+            if self._references[source] <= 0:
+                del self._references[source]
+                del self._templates[source]
+        _LOGGER.debug("Released templates of %s, %s cached", owner, len(self))
+
+
+@callback
+def async_get_template_cache(hass: HomeAssistant) -> MeasureItTemplateCache:
+    """Return the shared template cache, creating it on first use."""
+    if (cache := hass.data.get(TEMPLATE_CACHE_DATA)) is None:
+        cache = hass.data[TEMPLATE_CACHE_DATA] = MeasureItTemplateCache(hass)
+    return cache
@@ -1,15 +1,61 @@
-"""Time window class for active check and next change time."""
+"""
+Time window class for active check and next change time.
 
-from datetime import datetime, time, timedelta
+A time window is compiled at construction into a sorted list of the seconds of
+the week at which it changes state, so is_active is a lookup and next_change a
+bisect. All times are wall clock times in the time zone of the given datetime.
+
+Besides the main range (from and till time on the selected days), a window can
+have additional ranges, e.g. for split tariffs, and dates on which it is never
+active, e.g. holidays, given as a list or as a calendar that can change.
+"""
+
+from bisect import bisect_right
+from collections.abc import Callable
+from datetime import date, datetime, time, timedelta
+from typing import Protocol
 
 NOF_WEEKDAYS = 7
+SECONDS_PER_DAY = 86400
+SECONDS_PER_WEEK = NOF_WEEKDAYS * SECONDS_PER_DAY
+WEEKDAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+_DAYS = [timedelta(days=days) for days in range(2 * NOF_WEEKDAYS)]
+
+
+class ExcludedDays(Protocol):
+    """Protocol for calendars of dates on which a time window is not active."""
+
+    def __contains__(self, day: date) -> bool:
+        """Return if a date is excluded."""
+
+    def next_boundary(self, day: date) -> date | None:
+        """Return the first date after a day at which exclusion starts or ends."""
+
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call the listener when the dates change, return a remove callback."""
 
 
 class TimeWindow:
     """TimeWindow class with active check and next change time."""
 
-    def __init__(self, days: list[str], from_time: str, till_time: str) -> None:
-        """Initialize TimeWindow."""
+    def __init__(  # noqa: PLR0913
+        self,
+        days: list[str],
+        from_time: str,
+        till_time: str,
+        ranges: list[str] | None = None,
+        excluded_dates: list[str] | None = None,
+        calendar: ExcludedDays | None = None,
+    ) -> None:
+        """
+        Initialize TimeWindow.
+
+        Additional ranges have the format "[days ]HH:MM[:SS]-HH:MM[:SS]", where
+        days are comma separated weekday names (e.g. "sat,sun 10:00-14:00"). A range
+        without days applies to the days of the window. Excluded dates are in ISO
+        format (YYYY-MM-DD). The dates of the calendar are looked up at the moment of
+        the check, so changes to the calendar apply right away.
+        """
         if len(days) != len(set(days)):
             msg = "Duplicate days are not allowed."
             raise ValueError(msg)
@@ -25,12 +71,42 @@ class TimeWindow:
 
         self._start = datetime.strptime(from_time, "%H:%M:%S").time()  # noqa: DTZ007
         self._end = datetime.strptime(till_time, "%H:%M:%S").time()  # noqa: DTZ007
+        self._ranges = [(self._days, self._start, self._end)]
+        self._ranges.extend(_parse_range(value, self._days) for value in ranges or [])
+
+        self._excluded_dates = sorted(
+            {date.fromisoformat(value.strip()) for value in excluded_dates or []}
+        )
+        self._excluded = set(self._excluded_dates)
+        # Dates at the start of which the window enters or leaves excluded dates
+        self._exclusion_changes = sorted(
+            {day for day in self._excluded if day - _DAYS[1] not in self._excluded}
+            | {
+                day + _DAYS[1]
+                for day in self._excluded
+                if day + _DAYS[1] not in self._excluded
+            }
+        )
+
+        self._calendar = calendar
 
+        self._transitions, self._active_after = self._compile()
         self._always_active = (
-            len(self._days) == NOF_WEEKDAYS
-            and self._start == time(0, 0)
-            and self._end == time(0, 0)
+            not self._transitions and not self._excluded and calendar is None
         )
+        # Day and time of every transition, with the first one repeated a week
+        # later for moments after the last transition of the week.
+        wrapped = self._transitions[:1]
+        self._transition_times = [
+            (
+                _DAYS[transition // SECONDS_PER_DAY],
+                _to_time(transition % SECONDS_PER_DAY),
+            )
+            for transition in [
+                *self._transitions,
+                *(transition + SECONDS_PER_WEEK for transition in wrapped),
+            ]
+        ]
 
     @property
     def days(self) -> list[int]:
@@ -47,60 +123,188 @@ class TimeWindow:
         """Return the end time of the time window."""
         return self._end
 
+    @property
+    def excluded_dates(self) -> list[date]:
+        """Return the dates on which the time window is not active."""
+        return self._excluded_dates
+
+    @property
+    def calendar(self) -> ExcludedDays | None:
+        """Return the calendar of dates on which the time window is not active."""
+        return self._calendar
+
     @property
     def always_active(self) -> bool:
         """Return if the time window is always active."""
         return self._always_active
 
+    @property
+    def key(self) -> tuple:
+        """Return a key that is equal for time windows that are active at once."""
+        return (
+            tuple(self._transitions),
+            tuple(self._active_after),
+            tuple(self._excluded_dates),
+            self._calendar,
+        )
+
+    def _compile(self) -> tuple[list[int], list[bool]]:
+        """
+        Return the seconds of the week at which the window changes state.
+
+        Every range is active on its days from the start time till the end time.
+        When the end time is not after the start time, the range ends on the next
+        day. Ranges that overlap or touch are merged, so every transition is a
+        change. Excluded dates are handled separately.
+        """
+        week_ranges = []
+        for days, start_time, end_time in self._ranges:
+            start = _seconds_of_day(start_time)
+            end = _seconds_of_day(end_time)
+            length = end - start if start < end else SECONDS_PER_DAY - start + end
+            for day in days:
+                range_start = day * SECONDS_PER_DAY + start
+                range_end = range_start + length
+                if range_end > SECONDS_PER_WEEK:
+                    # Split the range that wraps around the end of the week
+                    week_ranges.append((range_start, SECONDS_PER_WEEK))
+                    week_ranges.append((0, range_end - SECONDS_PER_WEEK))
+                else:
+                    week_ranges.append((range_start, range_end))
+
+        def active_at(second: int) -> bool:
+            return any(first <= second < last for first, last in week_ranges)
+
+        points = sorted({point % SECONDS_PER_WEEK for point in _flatten(week_ranges)})
+        transitions = []
+        active_after = []
+        # Keep the points at which the state differs from the second before
+        for point in points:
+            active = active_at(point)
+            if active != active_at((point - 1) % SECONDS_PER_WEEK):
+                transitions.append(point)
+                active_after.append(active)
+        return transitions, active_after
+
     def is_active(self, tznow: datetime) -> bool:
         """Check if a given datetime is inside the time window."""
         if self._always_active:
             return True
-        check_time = tznow.time()
-        if self._start < self._end:
-            if check_time >= self._start and check_time < self._end:
-                return tznow.weekday() in self._days
-        elif check_time >= self._start or check_time <= self._end:
-            if check_time < self._start:
-                return prev_weekday(tznow.weekday()) in self._days
-            return tznow.weekday() in self._days
-        return False
-
-    def next_change(self, tznow: datetime) -> datetime:
-        """Return the next time the time window will change state."""
+        if self._excluded and tznow.date() in self._excluded:
+            return False
+        if self._calendar is not None and tznow.date() in self._calendar:
+            return False
+        if not self._transitions:
+            return True
+        # The state after the last transition wraps around to the start of the week
+        index = (
+            bisect_right(
+                self._transitions,
+                tznow.weekday() * SECONDS_PER_DAY
+                + tznow.hour * 3600
+                + tznow.minute * 60
+                + tznow.second,
+            )
+            - 1
+        )
+        return self._active_after[index]
+
+    def next_change(self, tznow: datetime) -> datetime | None:
+        """
+        Return the next time the time window will change state.
+
+        Returns None when the state never changes anymore, which can only happen
+        after the last excluded date of a window that is otherwise always active.
+        When the calendar changes, the next change has to be determined again.
+        """
         if self._always_active:
             msg = """Next change should not be called
                 for time windows that are always active."""
             raise AssertionError(msg)
-        if self.is_active(tznow):
-            # If currently active, find the end time today or on the next day
-            if tznow.time() < self._end:
-                # End time is today
-                return datetime.combine(tznow.date(), self._end, tznow.tzinfo)
-            # End time is tomorrow
-            return datetime.combine(
-                tznow.date() + timedelta(days=1), self._end, tznow.tzinfo
+        if not self._excluded and self._calendar is None:
+            return self._next_weekly_change(tznow)
+        active = self.is_active(tznow)
+        candidate = tznow
+        # Follow the weekly transitions and the midnights around excluded dates
+        # until the state really changes.
+        while True:
+            change = self._next_weekly_change(candidate)
+            day = candidate.date()
+            index = bisect_right(self._exclusion_changes, day)
+            boundaries = self._exclusion_changes[index : index + 1]
+            if self._calendar is not None and (
+                boundary := self._calendar.next_boundary(day)
+            ):
+                boundaries.append(boundary)
+            for boundary in boundaries:
+                midnight = datetime.combine(boundary, time(), tznow.tzinfo)
+                if change is None or midnight < change:
+                    change = midnight
+            if change is None or self.is_active(change) != active:
+                return change
+            candidate = change
+
+    def _next_weekly_change(self, tznow: datetime) -> datetime | None:
+        """Return the next weekly transition, ignoring excluded dates."""
+        if not self._transitions:
+            return None
+        weekday = tznow.weekday()
+        days, change_time = self._transition_times[
+            bisect_right(
+                self._transitions,
+                weekday * SECONDS_PER_DAY
+                + tznow.hour * 3600
+                + tznow.minute * 60
+                + tznow.second,
             )
-        # If currently inactive, find the start time today or the next active day
-        if tznow.time() < self._start and tznow.weekday() in self._days:
-            # Start time is today
-            return datetime.combine(tznow.date(), self._start, tznow.tzinfo)
-        # Find the next active day
-        next_active_date = self._find_next_active_day(tznow)
-        return datetime.combine(next_active_date, self._start, tznow.tzinfo)
-
-    def _find_next_active_day(self, tznow: datetime) -> datetime.date:
-        """Find the next active day."""
-        for days_ahead in range(1, 8):  # Check the next 7 days
-            next_day = tznow + timedelta(days=days_ahead)
-            if next_day.weekday() in self._days:
-                return next_day.date()
-        msg = "Invalid time window, could not find the next active day."
+        ]
+        return datetime.combine(
+            tznow.date() + days - _DAYS[weekday], change_time, tznow.tzinfo
+        )
+
+
+def _parse_range(value: str, default_days: list[int]) -> tuple[list[int], time, time]:
+    """Parse an additional range, e.g. "sat,sun 10:00-14:00"."""
+    days = default_days
+    value = value.strip()
+    if " " in value:
+        day_names, value = value.split(None, 1)
+        try:
+            days = sorted(
+                {
+                    WEEKDAY_NAMES.index(name.strip().lower()[:3])
+                    for name in day_names.split(",")
+                }
+            )
+        except ValueError as ex:
+            msg = f"Invalid days in time range: {day_names}"
+            raise ValueError(msg) from ex
+    start, separator, end = value.partition("-")
+    if not separator:
+        msg = f"Invalid time range: {value}"
         raise ValueError(msg)
+    return days, _parse_time(start), _parse_time(end)
+
+
+def _parse_time(value: str) -> time:
+    """Parse a time in the format HH:MM or HH:MM:SS."""
+    value = value.strip()
+    time_format = "%H:%M:%S" if value.count(":") == 2 else "%H:%M"  # noqa: PLR2004
+    return datetime.strptime(value, time_format).time()  # noqa: DTZ007
+
+
+def _seconds_of_day(value: time) -> int:
+    """Return the number of seconds since midnight."""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _to_time(seconds: int) -> time:
+    """Return the time of a number of seconds since midnight."""
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return time(hours, minutes, seconds)
 
 
-def prev_weekday(day: int) -> int:
-    """Return the previous weekday."""
-    if day == 0:
-        return 6
-    return day - 1
+def _flatten(ranges: list[tuple[int, int]]) -> list[int]:
+    """Return the start and end points of the ranges."""
+    return [point for active_range in ranges for point in active_range]
@@ -0,0 +1,148 @@
+"""
+Shared time window tracking for MeasureIt coordinators.
+
+Identical time windows (active at the same moments) of all config entries are
+interned into one TimeWindow, which is tracked with a single scheduled change.
+On every change, all subscribed coordinators are notified from one callback, so
+the number of timers scales with the number of distinct windows. When the
+holiday calendar of a window changes, its subscribers are notified right away and
+its next change is scheduled again.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+from weakref import WeakValueDictionary
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import TIME_WINDOW_TRACKER_DATA
+from .timer_scheduler import async_get_timer_scheduler
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from .time_window import TimeWindow
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class _TrackedTimeWindow:
+    """A time window with its subscribers and its next scheduled change."""
+
+    def __init__(self, time_window: TimeWindow) -> None:
+        """Initialize the tracked time window."""
+        self.time_window = time_window
+        self.actions: dict[Callable, Callable[[datetime], None]] = {}
+        self.listener: Callable | None = None
+        self.calendar_listener: Callable | None = None
+
+
+class MeasureItTimeWindowTracker:
+    """Domain wide tracker of time window changes."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass: HomeAssistant = hass
+        self._timer_scheduler = async_get_timer_scheduler(hass)
+        self._interned: WeakValueDictionary[tuple, TimeWindow] = WeakValueDictionary()
+        self._tracked: dict[tuple, _TrackedTimeWindow] = {}
+
+    @property
+    def tracked_windows(self) -> int:
+        """Return the number of distinct time windows with subscribers."""
+        return len(self._tracked)
+
+    @callback
+    def async_intern(self, time_window: TimeWindow) -> TimeWindow:
+        """Return the shared time window that is identical to the given one."""
+        return self._interned.setdefault(time_window.key, time_window)
+
+    @callback
+    def async_track(
+        self, time_window: TimeWindow, action: Callable[[datetime], None]
+    ) -> Callable[[], None]:
+        """
+        Call the action whenever the time window changes state.
+
+        Like the timer scheduler, the action is passed the moment of the change in
+        local time. Returns a callback to stop tracking.
+        """
+        if time_window.always_active:
+            msg = "Time windows that are always active do not change."
+            raise ValueError(msg)
+        key = time_window.key
+        if (tracked := self._tracked.get(key)) is None:
+            tracked = self._tracked[key] = _TrackedTimeWindow(
+                self.async_intern(time_window)
+            )
+
+        @callback
+        def untrack() -> None:
+            """Stop tracking the time window for this action."""
+            if tracked.actions.pop(untrack, None) is None:
+                return
+            if not tracked.actions:
+                if tracked.listener is not None:
+                    tracked.listener()
+                    tracked.listener = None
+                if tracked.calendar_listener is not None:
+                    tracked.calendar_listener()
+                    tracked.calendar_listener = None
+                if self._tracked.get(key) is tracked:
+                    del self._tracked[key]
+
+        tracked.actions[untrack] = action
+        if tracked.listener is None:
+            self._schedule(tracked, dt_util.now())
+        calendar = tracked.time_window.calendar
+        if calendar is not None and tracked.calendar_listener is None:
+
+            @callback
+            def on_calendar_change() -> None:
+                """Notify all subscribers and schedule the next change again."""
+                if tracked.listener is not None:
+                    tracked.listener()
+                    tracked.listener = None
+                now = dt_util.now()
+                for subscriber in list(tracked.actions.values()):
+                    subscriber(now)
+                if tracked.actions and tracked.listener is None:
+                    self._schedule(tracked, now)
+
+            tracked.calendar_listener = calendar.async_add_listener(on_calendar_change)
+        return untrack
+
+    def _schedule(self, tracked: _TrackedTimeWindow, now: datetime) -> None:
+        """Schedule the next change of a tracked time window."""
+
+        @callback
+        def on_change(change: datetime) -> None:
+            """Notify all subscribers and schedule the next change."""
+            tracked.listener = None
+            _LOGGER.debug(
+                "Time window change at %s for %s subscribers",
+                change.isoformat(),
+                len(tracked.actions),
+            )
+            # A subscriber can stop tracking while being notified
+            for action in list(tracked.actions.values()):
+                action(change)
+            if tracked.actions and tracked.listener is None:
+                self._schedule(tracked, change)
+
+        if (next_change := tracked.time_window.next_change(now)) is not None:
+            tracked.listener = self._timer_scheduler.async_schedule(
+                next_change, on_change
+            )
+
+
+@callback
+def async_get_time_window_tracker(hass: HomeAssistant) -> MeasureItTimeWindowTracker:
+    """Return the shared time window tracker, creating it on first use."""
+    if (tracker := hass.data.get(TIME_WINDOW_TRACKER_DATA)) is None:
+        tracker = hass.data[TIME_WINDOW_TRACKER_DATA] = MeasureItTimeWindowTracker(hass)
+    return tracker
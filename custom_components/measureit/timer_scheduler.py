@@ -0,0 +1,153 @@
+"""
+Shared timer scheduler for MeasureIt resets and time window changes.
+
+All deadlines of all config entries are kept in one heap, while a single Home
+Assistant timer is armed for the earliest one. Actions that share a deadline are
+dispatched together, so the number of loop timers does not grow with the number
+of sensors. Cancelled deadlines are removed lazily, when they reach the top of
+the heap or when they make up most of it.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+from itertools import count
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import TIMER_SCHEDULER_DATA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# Heap entries are lists: [timestamp, sequence, point in time, action, in heap]
+_POINT_IN_TIME = 2
+_ACTION = 3
+_IN_HEAP = 4
+
+
+class MeasureItTimerScheduler:
+    """Domain wide scheduler that runs actions at a point in time."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass: HomeAssistant = hass
+        self._heap: list[list] = []
+        self._sequence = count()
+        self._cancelled: int = 0
+        self._listener: Callable | None = None
+        self._armed_timestamp: float | None = None
+
+    @property
+    def pending(self) -> int:
+        """Return the number of scheduled actions."""
+        return len(self._heap) - self._cancelled
+
+    @property
+    def active(self) -> bool:
+        """Return if the timer is armed."""
+        return self._listener is not None
+
+    @callback
+    def async_schedule(
+        self, point_in_time: datetime, action: Callable[[datetime], None]
+    ) -> Callable[[], None]:
+        """
+        Run the action at or after a point in time and return a cancel callback.
+
+        Like async_track_point_in_time, the action is passed the point in time in
+        local time.
+        """
+        timestamp = point_in_time.timestamp()
+        entry = [timestamp, next(self._sequence), point_in_time, action, True]
+        heapq.heappush(self._heap, entry)
+        if self._armed_timestamp is None or timestamp < self._armed_timestamp:
+            self._arm()
+
+        @callback
+        def cancel() -> None:
+            """Cancel the action, if it did not run yet."""
+            if entry[_ACTION] is None:
+                return
+            entry[_ACTION] = None
+            if entry[_IN_HEAP]:
+                self._cancelled += 1
+                self._purge()
+
+        return cancel
+
+    def _purge(self) -> None:
+        """Remove cancelled entries, from the top or all when they are the majority."""
+        if self._cancelled * 2 > len(self._heap):
+            for entry in self._heap:
+                if entry[_ACTION] is None:
+                    entry[_IN_HEAP] = False
+            self._heap = [entry for entry in self._heap if entry[_ACTION] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        while self._heap and self._heap[0][_ACTION] is None:
+            heapq.heappop(self._heap)[_IN_HEAP] = False
+            self._cancelled -= 1
+        if not self._heap:
+            self._disarm()
+        elif self._listener is not None and self._armed_timestamp != self._heap[0][0]:
+            # The armed deadline was cancelled, wake up for the next one instead
+            self._arm()
+
+    def _arm(self) -> None:
+        """Arm the timer for the earliest deadline."""
+        self._disarm()
+        timestamp = self._heap[0][0]
+        point_in_time = self._heap[0][_POINT_IN_TIME]
+        self._armed_timestamp = timestamp
+        self._listener = async_track_point_in_utc_time(
+            self.hass, self._async_on_deadline, dt_util.as_utc(point_in_time)
+        )
+
+    def _disarm(self) -> None:
+        """Cancel the timer."""
+        if self._listener is not None:
+            self._listener()
+            self._listener = None
+        self._armed_timestamp = None
+
+    @callback
+    def _async_on_deadline(self, now: datetime) -> None:
+        """Run all actions of which the deadline has passed."""
+        self._listener = None
+        self._armed_timestamp = None
+        # Also run actions that became due while waiting for this deadline
+        deadline = max(now.timestamp(), dt_util.utcnow().timestamp())
+        due = []
+        while self._heap and self._heap[0][0] <= deadline:
+            entry = heapq.heappop(self._heap)
+            entry[_IN_HEAP] = False
+            if entry[_ACTION] is None:
+                self._cancelled -= 1
+                continue
+            due.append(entry)
+        _LOGGER.debug("Running %s scheduled actions", len(due))
+        for entry in due:
+            # An action can cancel another action that is due at the same time
+            if (action := entry[_ACTION]) is None:
+                continue
+            entry[_ACTION] = None
+            action(dt_util.as_local(entry[_POINT_IN_TIME]))
+        self._purge()
+        if self._heap and self._listener is None:
+            self._arm()
+
+
+@callback
+def async_get_timer_scheduler(hass: HomeAssistant) -> MeasureItTimerScheduler:
+    """Return the shared timer scheduler, creating it on first use."""
+    if (scheduler := hass.data.get(TIMER_SCHEDULER_DATA)) is None:
+        scheduler = hass.data[TIMER_SCHEDULER_DATA] = MeasureItTimerScheduler(hass)
+    return scheduler
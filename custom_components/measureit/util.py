@@ -1,26 +1,174 @@
 """Utilities for MeasureIt."""
 
+import inspect
 import logging
+from collections import OrderedDict
 from collections.abc import Callable
+from decimal import Decimal
+from functools import wraps
 from typing import Any
 
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.template import Template
+from jinja2 import Environment, TemplateSyntaxError, meta, nodes
+
+from .template_cache import async_get_template_cache
+from .value_expression import compile_value_template
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
+RENDER_CACHE_SIZE = 32
+# Names, filters and tests of which the result only depends on their input. A
+# template that uses anything else, e.g. states() or now(), is not memoized.
+_PURE_NAMES = {
+    "value",
+    "float",
+    "int",
+    "bool",
+    "min",
+    "max",
+    "average",
+    "median",
+    "pi",
+    "e",
+    "tau",
+    "inf",
+    "log",
+    "sin",
+    "cos",
+    "tan",
+    "sqrt",
+    "range",
+    "dict",
+    "namespace",
+}
+_PURE_FILTERS = {
+    "abs",
+    "add",
+    "average",
+    "bool",
+    "capitalize",
+    "default",
+    "d",
+    "first",
+    "float",
+    "format",
+    "int",
+    "join",
+    "last",
+    "length",
+    "list",
+    "log",
+    "lower",
+    "max",
+    "median",
+    "min",
+    "multiply",
+    "ord",
+    "regex_replace",
+    "replace",
+    "round",
+    "sqrt",
+    "string",
+    "sum",
+    "title",
+    "trim",
+    "truncate",
+    "upper",
+}
+_PURE_TESTS = {
+    "defined",
+    "divisibleby",
+    "eq",
+    "even",
+    "float",
+    "ge",
+    "gt",
+    "in",
+    "integer",
+    "is_number",
+    "le",
+    "lt",
+    "ne",
+    "none",
+    "number",
+    "odd",
+    "string",
+    "undefined",
+}
+_PARSER = Environment(extensions=["jinja2.ext.loopcontrols"])  # noqa: S701
+# Templates are only analyzed, so the filters and tests that Home Assistant adds
+# need to be known to the parser but are never called.
+_PARSER.filters.update(dict.fromkeys(_PURE_FILTERS - _PARSER.filters.keys(), id))
+_PARSER.tests.update(dict.fromkeys(_PURE_TESTS - _PARSER.tests.keys(), id))
+
+
+class RendererStats:
+    """Number of value template renderers created, by the way they render."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.compiled: int = 0
+        self.jinja: int = 0
+        self.memoized: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters."""
+        return {
+            "compiled": self.compiled,
+            "jinja": self.jinja,
+            "memoized": self.memoized,
+        }
+
+
+RENDERER_STATS = RendererStats()
+
+_MISSING = object()
+
 
 def create_renderer(
-    hass: HomeAssistant, value_template: str, round_digits_when_none: int | None = None
+    hass: HomeAssistant,
+    value_template: str,
+    round_digits_when_none: int | None = None,
+    owner: str | None = None,
 ) -> Callable[[Any], Any]:
-    """Create a renderer based on variable_template value."""
+    """
+    Create a renderer based on variable_template value.
+
+    Templates that are plain arithmetic on the value are compiled into a Python
+    callable, other templates are rendered by Jinja. Renders of templates that
+    only depend on the value are memoized. With an owner (the entry id), the
+    Jinja template is taken from the shared template cache.
+    """
     if value_template is None:
         if round_digits_when_none is not None:
             return lambda value: round(value, round_digits_when_none)
         return lambda value: value
 
-    parsed_value_template = Template(value_template, hass)
+    if (expression := compile_value_template(value_template)) is not None:
+        RENDERER_STATS.compiled += 1
+
+        def _evaluate(value: Any) -> Any:
+            try:
+                return expression(value)
+            except (ArithmeticError, TypeError, ValueError):
+                _LOGGER.exception("Error parsing value")
+                return value
+
+        return _evaluate
+
+    RENDERER_STATS.jinja += 1
+    if owner is None:
+        parsed_value_template = Template(value_template, hass)
+    else:
+        try:
+            parsed_value_template = async_get_template_cache(hass).async_get(
+                value_template, owner
+            )
+        except TemplateError:
+            # Invalid templates are not cached, the error is logged on every render
+            parsed_value_template = Template(value_template, hass)
 
     def _render(value: Any) -> Any:
         try:
@@ -31,4 +179,97 @@ def create_renderer(
             _LOGGER.exception("Error parsing value")
             return value
 
+    if is_pure_template(value_template):
+        RENDERER_STATS.memoized += 1
+        return _memoize(_render)
+    # The output can change with other states, e.g. of an input_number
+    _render.reads_states = True
     return _render
+
+
+def renders_only_value(renderer: Callable[[Any], Any]) -> bool:
+    """Return if the output of a renderer only depends on the value it renders."""
+    return not getattr(renderer, "reads_states", False)
+
+
+def is_pure_template(value_template: str) -> bool:
+    """Return if the output of a template only depends on the value."""
+    try:
+        tree = _PARSER.parse(value_template)
+    except TemplateSyntaxError:
+        return False
+    return (
+        all(node.name in _PURE_FILTERS for node in tree.find_all(nodes.Filter))
+        and all(node.name in _PURE_TESTS for node in tree.find_all(nodes.Test))
+        and meta.find_undeclared_variables(tree) <= _PURE_NAMES
+    )
+
+
+def _memoize(render: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Return a renderer that remembers the output of the last inputs.
+
+    Sensors render the same value repeatedly, e.g. the previous value on every
+    state write. The last input is checked first, then a small LRU cache. Equal
+    numbers can have different representations, so inputs are compared as text.
+    Errors are not remembered, so they are logged on every render. The renderer
+    without memory is available as __wrapped__.
+    """
+    cache: OrderedDict[tuple[type, str], Any] = OrderedDict()
+    last: list = [None, None]
+
+    @wraps(render)
+    def _render(value: Any) -> Any:
+        key = (type(value), str(value))
+        if key == last[0]:
+            return last[1]
+        if (output := cache.get(key, _MISSING)) is not _MISSING:
+            cache.move_to_end(key)
+        else:
+            output = render(value)
+            if output is value:
+                # Rendering failed and returned the value
+                return output
+            cache[key] = output
+            if len(cache) > RENDER_CACHE_SIZE:
+                cache.popitem(last=False)
+        last[:] = key, output
+        return output
+
+    return _render
+
+
+def seconds_until_render_change(
+    renderer: Callable[[Any], Any],
+    value: Decimal,
+    max_seconds: int,
+    min_seconds: int = 1,
+) -> int | None:
+    """
+    Return the number of seconds until the rendered output of a time value changes.
+
+    The value is expected to increase by one every second and the renderer to be a
+    step function of it (like rounding or dividing). With a min_seconds, it is the
+    first change at or after that number of seconds. Returns None when the output
+    does not change within max_seconds. The probes bypass a memoizing renderer, so
+    they do not evict the values it remembers.
+    """
+    renderer = inspect.unwrap(renderer)
+    offset = min_seconds - 1
+    value += offset
+    current = renderer(value)
+    unchanged = 0
+    step = 1
+    # Exponential search for a moment at which the output is different...
+    while renderer(value + step) == current:
+        if offset + step >= max_seconds:
+            return None
+        unchanged, step = step, min(step * 2, max_seconds - offset)
+    # ...followed by a binary search for the first second it differs.
+    while step - unchanged > 1:
+        middle = (unchanged + step) // 2
+        if renderer(value + middle) == current:
+            unchanged = middle
+        else:
+            step = middle
+    return offset + step
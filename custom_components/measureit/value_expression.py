@@ -0,0 +1,221 @@
+"""
+Compiled value templates for MeasureIt sensors.
+
+Most value templates are arithmetic on the measured value, e.g.
+"{{ value / 3600 }}" or "{{ (value * 1000) | round(2) }}". Such templates are
+compiled into plain Python callables that render the same text as Jinja, with
+the same operators and filters, so the sensor state does not depend on which
+one rendered it. Any other template is not recognized and is rendered by Jinja.
+
+Supported are numbers, value, parentheses, the operators + - * / // % and the
+filters round, float, int and abs (with Home Assistant's semantics).
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_TEMPLATE = re.compile(r"\s*\{\{(.*)\}\}\s*", re.DOTALL)
+_TOKEN = re.compile(
+    r"\s*(?:(\d+\.\d+|\d+)|([A-Za-z_][A-Za-z_0-9]*)|('[a-z]*'|\"[a-z]*\")|(//|[-+*/%()|,]))"
+)
+_BINARY = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+_ROUND_METHODS = ("common", "ceil", "floor", "half")
+
+
+class _UnrecognizedError(Exception):
+    """Raised when a template is not a supported expression."""
+
+
+def compile_value_template(template: str) -> Callable[[Any], str] | None:
+    """
+    Return a callable that renders a template for a value, None if unsupported.
+
+    Like rendering the template with parse_result=False, the callable returns
+    the rendered text. It raises the same exceptions as the Jinja operators and
+    filters do.
+    """
+    if (match := _TEMPLATE.fullmatch(template)) is None:
+        return None
+    try:
+        expression = _Parser(_tokenize(match.group(1))).parse()
+    except _UnrecognizedError:
+        return None
+    return lambda value: str(expression(value)).strip()
+
+
+def _tokenize(text: str) -> list[str]:
+    """Return the tokens of an expression."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        if (match := _TOKEN.match(text, position)) is None:
+            raise _UnrecognizedError
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser that builds callables, with Jinja precedence."""
+
+    def __init__(self, tokens: list[str]) -> None:
+        """Initialize the parser."""
+        self._tokens = tokens
+        self._position = 0
+
+    def peek(self) -> str | None:
+        """Return the next token, None at the end."""
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _next(self) -> str:
+        """Return the next token and move past it."""
+        if (token := self.peek()) is None:
+            raise _UnrecognizedError
+        self._position += 1
+        return token
+
+    def _expect(self, expected: str) -> None:
+        """Move past the expected token."""
+        if self._next() != expected:
+            raise _UnrecognizedError
+
+    def parse(self) -> Callable[[Any], Any]:
+        """Parse all tokens as one expression."""
+        expression = self.parse_expression()
+        if self.peek() is not None:
+            raise _UnrecognizedError
+        return expression
+
+    def parse_expression(self) -> Callable[[Any], Any]:
+        """Parse a sum of terms."""
+        return self._parse_binary(self._parse_term, ("+", "-"))
+
+    def _parse_term(self) -> Callable[[Any], Any]:
+        """Parse a product of filtered operands."""
+        return self._parse_binary(self._parse_filtered, ("*", "/", "//", "%"))
+
+    def _parse_binary(
+        self, parse_operand: Callable[[], Callable[[Any], Any]], operators: tuple
+    ) -> Callable[[Any], Any]:
+        """Parse operands joined by left associative operators."""
+        left = parse_operand()
+        while self.peek() in operators:
+            function = _BINARY[self._next()]
+            right = parse_operand()
+            left = _binary(function, left, right)
+        return left
+
+    def _parse_filtered(self) -> Callable[[Any], Any]:
+        """Parse an operand followed by filters, which bind tighter than operators."""
+        operand = self._parse_operand()
+        while self.peek() == "|":
+            self._next()
+            operand = _filtered(self._parse_filter(), operand)
+        return operand
+
+    def _parse_operand(self) -> Callable[[Any], Any]:
+        """Parse a number, the value or an expression in parentheses."""
+        part = self._next()
+        if part == "(":
+            expression = self.parse_expression()
+            self._expect(")")
+            return expression
+        if part == "value":
+            return lambda value: value
+        if part[0].isdigit():
+            number = float(part) if "." in part else int(part)
+            return lambda _: number
+        raise _UnrecognizedError
+
+    def _parse_filter(self) -> Callable[[Any], Any]:
+        """Parse a filter with its arguments."""
+        name = self._next()
+        arguments = []
+        if self.peek() == "(":
+            self._next()
+            while self.peek() != ")":
+                if arguments:
+                    # Like Jinja, arguments are separated by commas, with an
+                    # optional trailing comma
+                    self._expect(",")
+                    if self.peek() == ")":
+                        break
+                token = self._next()
+                if token[0].isdigit():
+                    arguments.append(float(token) if "." in token else int(token))
+                elif token[0] in "'\"":
+                    arguments.append(token[1:-1])
+                else:
+                    raise _UnrecognizedError
+            self._next()
+        if name == "round" and len(arguments) <= 2:  # noqa: PLR2004
+            return _round_filter(*arguments)
+        if name in ("float", "int") and len(arguments) <= 1:
+            # The default only applies to values that are not numbers
+            return float if name == "float" else _int_filter
+        if name == "abs" and not arguments:
+            return abs
+        raise _UnrecognizedError
+
+
+def _binary(
+    function: Callable[[Any, Any], Any],
+    left: Callable[[Any], Any],
+    right: Callable[[Any], Any],
+) -> Callable[[Any], Any]:
+    """Return a callable that applies an operator to two operands."""
+    return lambda value: function(left(value), right(value))
+
+
+def _filtered(
+    function: Callable[[Any], Any], operand: Callable[[Any], Any]
+) -> Callable[[Any], Any]:
+    """Return a callable that applies a filter to an operand."""
+    return lambda value: function(operand(value))
+
+
+def _round_filter(
+    precision: int = 0, method: str = "common"
+) -> Callable[[Any], float | int]:
+    """Return the round filter of Home Assistant, for numbers."""
+    if not isinstance(precision, int) or method not in _ROUND_METHODS:
+        raise _UnrecognizedError
+    multiplier = float(10**precision)
+
+    def round_filter(value: Any) -> float | int:
+        if method == "ceil":
+            value = math.ceil(float(value) * multiplier) / multiplier
+        elif method == "floor":
+            value = math.floor(float(value) * multiplier) / multiplier
+        elif method == "half":
+            value = round(float(value) * 2) / 2
+        else:
+            value = round(float(value), precision)
+        return int(value) if precision == 0 else value
+
+    return round_filter
+
+
+def _int_filter(value: Any) -> int:
+    """Return the int filter of Jinja, for numbers."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return int(float(value))
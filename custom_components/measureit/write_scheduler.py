@@ -0,0 +1,238 @@
+"""
+Shared state write scheduler for MeasureIt sensors.
+
+Sensors submit their state writes to a single scheduler for all config entries.
+A submitted sensor is marked dirty and written once at the end of the event loop
+turn, so several transitions at the same moment (e.g. at startup, or when time
+window and condition change together) result in a single write.
+Without a budget, dirty sensors are then written right away. A config entry can
+set a budget (writes per second) for its own sensors, which is enforced by a
+token bucket of that entry. Writes over budget are deferred in a queue of the
+entry that holds each sensor once and is drained in round-robin order. A
+deferred sensor writes its latest state when it is drained.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import partial
+from time import monotonic
+from typing import TYPE_CHECKING, Protocol
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import WRITE_SCHEDULER_DATA
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+    from datetime import datetime
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class ScheduledWriter(Protocol):
+    """Protocol for entities of which the writes are scheduled."""
+
+    def async_write_scheduled_state(self) -> None:
+        """Write the current state."""
+
+
+class _WriteBudget:
+    """Token bucket and deferred writes of the sensors of one config entry."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize a full bucket."""
+        self.rate: float = rate
+        self.tokens: float = rate
+        self.refilled_at: float = monotonic()
+        self.queue: dict[ScheduledWriter, None] = {}
+        self.listener: Callable | None = None
+        self.deferred_writes: int = 0
+
+    def refill(self) -> None:
+        """
+        Add the tokens earned since the last refill, up to one second worth.
+
+        The bucket holds at least one token, as a write takes a whole token and a
+        budget below one write per second would otherwise never write.
+        """
+        now = monotonic()
+        self.tokens = min(
+            max(self.rate, 1), self.tokens + (now - self.refilled_at) * self.rate
+        )
+        self.refilled_at = now
+
+    def cancel_drain(self) -> None:
+        """Cancel a scheduled drain."""
+        if self.listener is not None:
+            self.listener()
+            self.listener = None
+
+
+class MeasureItWriteScheduler:
+    """Domain wide scheduler that limits the number of state writes per second."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass: HomeAssistant = hass
+        self._budgets: dict[Hashable, _WriteBudget] = {}
+        # Dirty writers with the key of their budget
+        self._dirty: dict[ScheduledWriter, Hashable] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    def budget(self, key: Hashable) -> float | None:
+        """Return the number of writes per second of a key, None when unlimited."""
+        budget = self._budgets.get(key)
+        return budget.rate if budget is not None else None
+
+    def queue_depth(self, key: Hashable) -> int:
+        """Return the number of sensors of a key waiting to write their state."""
+        budget = self._budgets.get(key)
+        return len(budget.queue) if budget is not None else 0
+
+    def deferred_writes(self, key: Hashable) -> int:
+        """Return the number of writes of a key that were deferred by its budget."""
+        budget = self._budgets.get(key)
+        return budget.deferred_writes if budget is not None else 0
+
+    @property
+    def dirty_writers(self) -> int:
+        """Return the number of writers to be written at the end of the loop turn."""
+        return len(self._dirty)
+
+    @callback
+    def async_set_budget(self, key: Hashable, writes_per_second: float | None) -> None:
+        """
+        Set the budget of the sensors that are scheduled with a key.
+
+        The key is the coordinator of a config entry. Without a budget, the writes
+        that are still deferred are done right away.
+        """
+        budget = self._budgets.get(key)
+        if not writes_per_second:
+            if budget is not None:
+                del self._budgets[key]
+                budget.cancel_drain()
+                for writer in budget.queue:
+                    writer.async_write_scheduled_state()
+            return
+        rate = float(writes_per_second)
+        if budget is not None and budget.rate == rate:
+            return
+        _LOGGER.debug("State write budget changed to %s writes/s", rate)
+        if budget is None:
+            self._budgets[key] = _WriteBudget(rate)
+            return
+        budget.rate = budget.tokens = rate
+        budget.refilled_at = monotonic()
+        budget.cancel_drain()
+        self._drain(budget)
+
+    @callback
+    def async_schedule(self, writer: ScheduledWriter, key: Hashable = None) -> None:
+        """Mark the writer dirty, to be written at the end of the loop turn."""
+        self._dirty[writer] = key
+        if self._flush_task is None:
+            self._flush_task = self.hass.async_create_task(self._async_flush_dirty())
+
+    async def _async_flush_dirty(self) -> None:
+        """Write all dirty writers, within their budgets."""
+        # Yield once, so all transitions of the current loop turn are collected
+        await asyncio.sleep(0)
+        self._flush_task = None
+        dirty, self._dirty = self._dirty, {}
+        for writer, key in dirty.items():
+            self._async_write(writer, self._budgets.get(key))
+
+    @callback
+    def _async_write(
+        self, writer: ScheduledWriter, budget: _WriteBudget | None
+    ) -> None:
+        """Write the state of the writer now, or as soon as the budget allows."""
+        if budget is None:
+            writer.async_write_scheduled_state()
+            return
+        if writer in budget.queue:
+            # Keep the place in the queue, the latest state is written anyway
+            return
+        budget.refill()
+        if not budget.queue and budget.tokens >= 1:
+            budget.tokens -= 1
+            writer.async_write_scheduled_state()
+            return
+        budget.queue[writer] = None
+        budget.deferred_writes += 1
+        if budget.listener is None:
+            self._schedule_drain(budget)
+
+    @callback
+    def async_flush(self, writer: ScheduledWriter) -> None:
+        """
+        Write a pending state of the writer right away, regardless of the budget.
+
+        Used before a reset, so the final value of a period is written as a state
+        instead of being merged with the state after the reset.
+        """
+        if writer in self._dirty:
+            budget = self._budgets.get(self._dirty[writer])
+        else:
+            budget = next(
+                (budget for budget in self._budgets.values() if writer in budget.queue),
+                None,
+            )
+            if budget is None:
+                return
+        self.async_cancel(writer)
+        if budget is not None:
+            budget.refill()
+            # Over budget, the next deferred write waits a bit longer
+            budget.tokens -= 1
+        writer.async_write_scheduled_state()
+
+    @callback
+    def async_cancel(self, writer: ScheduledWriter) -> None:
+        """Remove a pending write, e.g. when the entity is removed."""
+        self._dirty.pop(writer, None)
+        for budget in self._budgets.values():
+            if writer in budget.queue:
+                del budget.queue[writer]
+                if not budget.queue:
+                    budget.cancel_drain()
+
+    @callback
+    def _async_on_drain(self, budget: _WriteBudget, now: datetime) -> None:  # noqa: ARG002
+        """Drain the queue when tokens are available again."""
+        budget.listener = None
+        self._drain(budget)
+
+    def _drain(self, budget: _WriteBudget) -> None:
+        """Write queued states within the budget and schedule the rest."""
+        budget.refill()
+        tokens = min(max(int(budget.tokens), 0), len(budget.queue))
+        budget.tokens -= tokens
+        for _ in range(tokens):
+            writer = next(iter(budget.queue))
+            del budget.queue[writer]
+            writer.async_write_scheduled_state()
+        if budget.queue and budget.listener is None:
+            self._schedule_drain(budget)
+        elif not budget.queue:
+            budget.cancel_drain()
+
+    def _schedule_drain(self, budget: _WriteBudget) -> None:
+        """Schedule a drain for the moment the next token is available."""
+        budget.listener = async_call_later(
+            self.hass,
+            max(1 - budget.tokens, 0) / budget.rate,
+            partial(self._async_on_drain, budget),
+        )
+
+
+@callback
+def async_get_write_scheduler(hass: HomeAssistant) -> MeasureItWriteScheduler:
+    """Return the shared write scheduler, creating it on first use."""
+    if (scheduler := hass.data.get(WRITE_SCHEDULER_DATA)) is None:
+        scheduler = hass.data[WRITE_SCHEDULER_DATA] = MeasureItWriteScheduler(hass)
+    return scheduler
@@ -0,0 +1,36 @@
+"""Test MeasureIt diagnostics."""
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.measureit.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from tests import setup_with_mock_config
+
+from .test_source_meter_flow import SOURCE_ENTRY
+
+
+async def test_event_lag_in_diagnostics(hass: HomeAssistant) -> None:
+    """Test that the diagnostics show the lag of handled state changes."""
+    hass.states.async_set("sensor.test_source", "3")
+    hass.states.async_set("switch.test_switch", "on")
+    await setup_with_mock_config(hass, SOURCE_ENTRY)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, SOURCE_ENTRY)
+    assert diagnostics["options"]["config_name"] == "test"
+    assert diagnostics["event_lag"]["count"] == 0
+
+    hass.states.async_set("sensor.test_source", "6")
+    hass.states.async_set("switch.test_switch", "off")
+    await hass.async_block_till_done()
+    diagnostics = await async_get_config_entry_diagnostics(hass, SOURCE_ENTRY)
+    assert diagnostics["event_lag"]["count"] == 2
+    assert 0 <= diagnostics["event_lag"]["mean"] <= diagnostics["event_lag"]["max"]
+    assert diagnostics["write_scheduler"] == {
+        "budget": None,
+        "queue_depth": 0,
+        "deferred_writes": 0,
+    }
+    assert set(diagnostics["renderers"]) == {"compiled", "jinja", "memoized"}
+    assert diagnostics["condition_tracker"] == {"tracked_templates": 1}
+    assert diagnostics["template_cache"]["size"] == 1
@@ -1,9 +1,21 @@
 """Test source meter flow."""
 
+from datetime import timedelta
+
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.measureit.const import DOMAIN, SensorState
+from custom_components.measureit.const import (
+    COORDINATOR,
+    DOMAIN,
+    DOMAIN_DATA,
+    SensorState,
+)
+from custom_components.measureit.numeric import FixedPointEngine
 from tests import setup_with_mock_config, unload_with_mock_config
 
 SOURCE_ENTRY = MockConfigEntry(
@@ -596,3 +608,87 @@ async def test_source_reset_total_increasing_when_not_measuring(
 
     state = hass.states.get(sensor)
     assert state.state == "8"
+
+
+COALESCED_SOURCE_ENTRY = MockConfigEntry(
+    domain=DOMAIN,
+    options={
+        "config_name": "coalesced",
+        "meter_type": "source",
+        "condition": "{{ is_state('switch.test_switch', 'on') }}",
+        "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+        "source_entity": "sensor.test_source",
+        "when_from": "00:00:00",
+        "when_till": "00:00:00",
+        "coalesce_interval": 5,
+        "sensor": [
+            {
+                "unit_of_measurement": "items",
+                "state_class": "total",
+                "unique_id": "8b1c2d8e-0f1a-4a5e-9d3c-6f0e2b7a1c01",
+                "sensor_name": "noreset",
+                "cron": "noreset",
+                "period": "noreset",
+                "value_template": "{{ value }}",
+            },
+        ],
+    },
+)
+
+
+async def test_source_meter_coalescing(hass: HomeAssistant) -> None:
+    """Test that source readings are passed on at most once per interval."""
+    hass.states.async_set("sensor.test_source", "3")
+    hass.states.async_set("switch.test_switch", "on")
+    await hass.async_block_till_done()
+    await setup_with_mock_config(hass, COALESCED_SOURCE_ENTRY)
+    assert hass.states.get("sensor.coalesced_noreset").state == "0"
+
+    hass.states.async_set("sensor.test_source", "6")
+    hass.states.async_set("sensor.test_source", "7")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.coalesced_noreset").state == "0"
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.coalesced_noreset").state == "4"
+
+    # Stopping flushes the pending reading, so it is still counted
+    hass.states.async_set("sensor.test_source", "9")
+    hass.states.async_set("switch.test_switch", "off")
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.coalesced_noreset")
+    assert state.state == "6"
+    assert state.attributes["status"] == SensorState.WAITING_FOR_CONDITION
+
+    # A decrease is passed on right away
+    hass.states.async_set("switch.test_switch", "on")
+    hass.states.async_set("sensor.test_source", "10")
+    hass.states.async_set("sensor.test_source", "8")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.coalesced_noreset").state == "5"
+
+    await unload_with_mock_config(hass, COALESCED_SOURCE_ENTRY)
+
+
+async def test_options_change_reloads_entry(hass: HomeAssistant) -> None:
+    """Test that changed meter options apply after the entry is reloaded."""
+    entry = MockConfigEntry(domain=DOMAIN, options=MINIMAL_SOURCE_ENTRY.options)
+    hass.states.async_set("sensor.test_source", "3")
+    await setup_with_mock_config(hass, entry)
+    hass.states.async_set("sensor.test_source", "4.5")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.minimal_source_day").state == "1.500"
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, "fixed_point_scale": 2}
+    )
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN_DATA][entry.entry_id][COORDINATOR]
+    assert isinstance(coordinator.engine, FixedPointEngine)
+    assert hass.states.get("sensor.minimal_source_day").state == "1.500"
+
+    hass.states.async_set("sensor.test_source", "5.25")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.minimal_source_day").state == "2.250"
+    await unload_with_mock_config(hass, entry)
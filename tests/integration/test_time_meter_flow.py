@@ -2,17 +2,25 @@
 
 from datetime import datetime
 from decimal import Decimal
+from pathlib import Path
 
 from freezegun import freeze_time
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import HomeAssistant
 from homeassistant.util import dt as dt_util
 from pytest_homeassistant_custom_component.common import (
     MockConfigEntry,
+    async_capture_events,
     async_fire_time_changed,
     async_fire_time_changed_exact,
 )
 
-from custom_components.measureit.const import DOMAIN, PREDEFINED_PERIODS, SensorState
+from custom_components.measureit.const import (
+    DOMAIN,
+    HOLIDAY_CALENDAR_DATA,
+    PREDEFINED_PERIODS,
+    SensorState,
+)
 from tests import setup_with_mock_config, unload_with_mock_config
 
 TIME_ENTRY = MockConfigEntry(
@@ -102,6 +110,33 @@ FORMATTED_TIME_ENTRY = MockConfigEntry(
     },
 )
 
+MIN_ON_TIME_ENTRY = MockConfigEntry(
+    domain=DOMAIN,
+    options={**TIME_ENTRY.options, "condition_min_on": 30},
+)
+
+LAZY_TIME_ENTRY = MockConfigEntry(
+    domain=DOMAIN,
+    options={
+        "config_name": "test",
+        "meter_type": "time",
+        "lazy_update": True,
+        "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+        "when_from": "00:00:00",
+        "when_till": "00:00:00",
+        "sensor": [
+            {
+                "unit_of_measurement": "h",
+                "unique_id": "ca100892-b6bb-11ee-923e-0242ac110004",
+                "sensor_name": "day",
+                "cron": "0 0 * * *",
+                "period": "day",
+                "value_template": "{{ (value / 3600) | int }}",
+            },
+        ],
+    },
+)
+
 
 async def test_time_meter_setup(hass: HomeAssistant) -> None:
     """Test MeasureIt setup for source meter."""
@@ -381,6 +416,118 @@ async def test_reset_after_session(hass: HomeAssistant) -> None:
         assert state.attributes["sensor_next_reset"] is None
 
 
+async def test_session_total_written_before_reset(hass: HomeAssistant) -> None:
+    """Test that the final value of a session is written before it resets."""
+    current_time = datetime(2024, 3, 11, 8, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    with freeze_time(current_time) as mock_time:
+        await setup_with_mock_config(hass, TIME_ENTRY)
+        async_fire_time_changed(hass, current_time)
+        await hass.async_block_till_done()
+        hass.states.async_set("switch.test_switch", "on")
+        await hass.async_block_till_done()
+
+        events = async_capture_events(hass, EVENT_STATE_CHANGED)
+        current_time = datetime(2024, 3, 11, 10, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        mock_time.move_to(current_time)
+        hass.states.async_set("switch.test_switch", "off")
+        await hass.async_block_till_done()
+
+        states = [
+            event.data["new_state"].state
+            for event in events
+            if event.data["entity_id"] == "sensor.test_session"
+        ]
+        assert states == ["7200", "0"]
+
+    await unload_with_mock_config(hass, TIME_ENTRY)
+
+
+async def test_short_condition_across_reset_not_counted(hass: HomeAssistant) -> None:
+    """Test that a condition shorter than its minimum duration is never counted."""
+    hass.states.async_set("switch.test_switch", "off")
+    current_time = datetime(2024, 2, 12, 9, 59, 50, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    with freeze_time(current_time) as mock_time:
+        await setup_with_mock_config(hass, MIN_ON_TIME_ENTRY)
+
+        async def move_to(hour: int, minute: int, second: int) -> None:
+            moment = datetime(
+                2024, 2, 12, hour, minute, second, tzinfo=dt_util.DEFAULT_TIME_ZONE
+            )
+            mock_time.move_to(moment)
+            async_fire_time_changed(hass, moment)
+            await hass.async_block_till_done()
+
+        # On for 20 seconds, with the hourly reset in between
+        hass.states.async_set("switch.test_switch", "on")
+        await hass.async_block_till_done()
+        await move_to(10, 0, 0)
+        await move_to(10, 0, 10)
+        hass.states.async_set("switch.test_switch", "off")
+        await hass.async_block_till_done()
+        await move_to(10, 1, 0)
+        assert hass.states.get("sensor.test_hour").state == "0"
+        assert hass.states.get("sensor.test_day").state == "0"
+
+        # On for longer, the hour sensor only counts from its reset
+        await move_to(10, 59, 50)
+        hass.states.async_set("switch.test_switch", "on")
+        await hass.async_block_till_done()
+        await move_to(11, 0, 0)
+        await move_to(11, 0, 20)
+        assert hass.states.get("sensor.test_hour").state == "20"
+        assert hass.states.get("sensor.test_day").state == "30"
+
+    await unload_with_mock_config(hass, MIN_ON_TIME_ENTRY)
+
+
+async def test_lazy_update_on_rendered_change(hass: HomeAssistant) -> None:
+    """Test that lazy sensors only update when the rendered value changes."""
+    current_time = datetime(2024, 2, 12, 8, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    with freeze_time(current_time) as mock_time:
+        await setup_with_mock_config(hass, LAZY_TIME_ENTRY)
+        async_fire_time_changed(hass, current_time)
+        await hass.async_block_till_done()
+
+        sensor = "sensor.test_day"
+        state = hass.states.get(sensor)
+        assert state.attributes["status"] == SensorState.MEASURING
+        assert state.state == "0"
+        last_updated = state.last_updated
+
+        current_time = datetime(2024, 2, 12, 8, 1, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        mock_time.move_to(current_time)
+        async_fire_time_changed(hass, current_time)
+        await hass.async_block_till_done()
+        assert hass.states.get(sensor).last_updated == last_updated
+
+        current_time = datetime(2024, 2, 12, 9, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        mock_time.move_to(current_time)
+        async_fire_time_changed(hass, current_time)
+        await hass.async_block_till_done()
+        state = hass.states.get(sensor)
+        assert state.state == "1"
+        assert state.last_updated == current_time
+
+    await unload_with_mock_config(hass, LAZY_TIME_ENTRY)
+
+
+async def test_calendar_released_on_unload(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that the holiday calendar of an entry is dropped when it is unloaded."""
+    path = tmp_path / "holidays.ics"
+    path.write_text(
+        "BEGIN:VCALENDAR\nBEGIN:VEVENT\nDTSTART;VALUE=DATE:20250101\nEND:VEVENT\n"
+        "END:VCALENDAR\n"
+    )
+    entry = MockConfigEntry(
+        domain=DOMAIN, options={**TIME_ENTRY.options, "when_calendar": str(path)}
+    )
+    await setup_with_mock_config(hass, entry)
+    assert set(hass.data[HOLIDAY_CALENDAR_DATA]) == {str(path)}
+
+    await unload_with_mock_config(hass, entry)
+    assert hass.data[HOLIDAY_CALENDAR_DATA] == {}
+
+
 # async def test_sensor_next_reset(hass: HomeAssistant):
 #     """Test if sensor next and last reset attributes are set correctly."""
 #     current_time = datetime(2024, 3, 9, 4, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
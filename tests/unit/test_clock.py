@@ -0,0 +1,49 @@
+"""Tests for the MeasureIt meter clocks."""
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from custom_components.measureit.clock import (
+    NS_PER_SECOND,
+    MonotonicClock,
+    WallClock,
+    ns_to_seconds,
+    seconds_to_ns,
+)
+
+
+def test_monotonic_clock_ignores_wall_clock_jumps() -> None:
+    """Test that a wall clock jump does not affect an anchored clock."""
+    wall_ns = 1_700_000_000 * NS_PER_SECOND
+    with (
+        patch("time.time_ns", return_value=wall_ns),
+        patch("time.monotonic_ns", return_value=5 * NS_PER_SECOND),
+    ):
+        clock = MonotonicClock()
+
+    with (
+        patch("time.time_ns", return_value=wall_ns + 3600 * NS_PER_SECOND),
+        patch("time.monotonic_ns", return_value=65 * NS_PER_SECOND),
+    ):
+        assert clock.now_ns() == wall_ns + 60 * NS_PER_SECOND
+        clock.anchor()
+        assert clock.now_ns() == wall_ns + 3600 * NS_PER_SECOND
+
+
+def test_wall_clock() -> None:
+    """Test the wall clock."""
+    with patch("time.time_ns", return_value=42):
+        clock = WallClock()
+        clock.anchor()
+        assert clock.now_ns() == 42
+
+
+def test_conversions() -> None:
+    """Test converting between seconds and nanoseconds."""
+    assert str(ns_to_seconds(0)) == "0"
+    assert str(ns_to_seconds(3600 * NS_PER_SECOND)) == "3600"
+    assert str(ns_to_seconds(1_500_000_000)) == "1.5"
+    assert str(ns_to_seconds(-1)) == "-1E-9"
+    assert seconds_to_ns(Decimal("1.5")) == 1_500_000_000
+    assert seconds_to_ns("0.0000000019") == 1
+    assert seconds_to_ns(2) == 2 * NS_PER_SECOND
@@ -0,0 +1,104 @@
+"""Tests for MeasureIt structured conditions."""
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.condition import (
+    AndCondition,
+    OrCondition,
+    StateCondition,
+    parse_condition,
+)
+
+TEMPLATES = [
+    "{{ is_state('input_boolean.production', 'on') }}",
+    "{{ not is_state('input_boolean.production', 'on') }}",
+    '{{is_state("input_boolean.production","off")}}',
+    "{{ states('input_boolean.production') == 'on' }}",
+    "{{ states('input_boolean.production') != 'unknown' }}",
+    "{{ states('sensor.power') | float(0) > 100 }}",
+    "{{ states('sensor.power')|float(-1) <= 100.5 }}",
+    "{{ states('sensor.power') | float >= 100 }}",
+    "{{ is_state('input_boolean.production', 'on') and "
+    "states('sensor.power') | float(0) > 100 }}",
+    "{{ is_state('input_boolean.production', 'on') or "
+    "states('sensor.power') | float(0) < 10 and "
+    "not is_state('binary_sensor.door', 'on') }}",
+]
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ true }}",
+        "{{ is_state('input_boolean.production', 'on') | bool }}",
+        "{{ is_state('input_boolean.production', 'on and off') }}",
+        "{{ (is_state('input_boolean.production', 'on')) }}",
+        "{{ is_state('a.b', 'on') }}{{ is_state('a.b', 'on') }}",
+        "{% if is_state('a.b', 'on') %}true{% endif %}",
+        "{{ states('sensor.power') | int > 100 }}",
+        "is_state('a.b', 'on')",
+    ],
+)
+def test_parse_unrecognized(template: str) -> None:
+    """Test that other templates are not recognized."""
+    assert parse_condition(template) is None
+
+
+def test_parse_structure() -> None:
+    """Test the structure of a parsed condition."""
+    condition = parse_condition(TEMPLATES[-1])
+    assert isinstance(condition, OrCondition)
+    first, second = condition.conditions
+    assert isinstance(first, StateCondition)
+    assert (first.entity_id, first.operator, first.value) == (
+        "input_boolean.production",
+        "is",
+        "on",
+    )
+    assert isinstance(second, AndCondition)
+    assert [part.operator for part in second.conditions] == ["<", "is not"]
+    assert second.conditions[0].default == 0
+    assert condition.entity_ids == {
+        "input_boolean.production",
+        "sensor.power",
+        "binary_sensor.door",
+    }
+
+
+def test_invalid_operator() -> None:
+    """Test that an unknown operator is rejected."""
+    with pytest.raises(ValueError):
+        StateCondition("sensor.power", "~", 1)
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+async def test_same_result_as_template(hass: HomeAssistant, template: str) -> None:
+    """Test that conditions evaluate like their templates render."""
+    condition = parse_condition(template)
+    assert condition is not None
+    for production in ("on", "off", None):
+        for power in ("150", "100", "5", "unavailable", None):
+            for door in ("on", "off"):
+                for entity_id, state in (
+                    ("input_boolean.production", production),
+                    ("sensor.power", power),
+                    ("binary_sensor.door", door),
+                ):
+                    if state is None:
+                        hass.states.async_remove(entity_id)
+                    else:
+                        hass.states.async_set(entity_id, state)
+                try:
+                    expected = Template(template, hass).async_render()
+                except TemplateError:
+                    with pytest.raises(ValueError):
+                        condition.evaluate(hass.states)
+                    continue
+                assert condition.evaluate(hass.states) is expected, (
+                    production,
+                    power,
+                    door,
+                )
@@ -0,0 +1,149 @@
+"""Tests for the shared MeasureIt condition tracker."""
+
+from unittest.mock import ANY, MagicMock, call, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.condition_tracker import (
+    MeasureItConditionTracker,
+    async_get_condition_tracker,
+)
+
+CONDITION = "{{ is_state('input_boolean.production', 'on') }}"
+# A template that is not recognized as a structured condition
+TEMPLATE = "{{ states('input_boolean.production') | lower == 'on' }}"
+
+
+def test_get_condition_tracker_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same tracker."""
+    assert async_get_condition_tracker(hass) is async_get_condition_tracker(hass)
+
+
+async def test_one_tracker_for_identical_templates(hass: HomeAssistant) -> None:
+    """Test that subscribers of the same template share one render."""
+    hass.states.async_set("input_boolean.production", "off")
+    tracker = MeasureItConditionTracker(hass)
+    actions = [MagicMock() for _ in range(3)]
+    with patch.object(
+        Template,
+        "async_render_to_info",
+        autospec=True,
+        side_effect=Template.async_render_to_info,
+    ) as render:
+        untracks = [tracker.async_track(Template(TEMPLATE, hass), actions[0])]
+        renders = render.call_count
+        untracks.extend(
+            tracker.async_track(Template(TEMPLATE, hass), action)
+            for action in actions[1:]
+        )
+        assert tracker.tracked_templates == 1
+        assert render.call_count == renders
+        for action in actions:
+            action.assert_called_once_with(False, None)
+
+        hass.states.async_set("input_boolean.production", "on")
+        await hass.async_block_till_done()
+        assert render.call_count == renders + 1
+        for action in actions:
+            assert action.call_args_list == [call(False, None), call(True, ANY)]
+
+    untracks[0]()
+    untracks[0]()
+    hass.states.async_set("input_boolean.production", "off")
+    await hass.async_block_till_done()
+    assert actions[0].call_count == 2
+    assert actions[1].call_args == call(False, ANY)
+
+    for untrack in untracks[1:]:
+        untrack()
+    assert tracker.tracked_templates == 0
+    hass.states.async_set("input_boolean.production", "on")
+    await hass.async_block_till_done()
+    assert actions[1].call_count == 3
+
+
+async def test_different_templates_are_tracked_apart(hass: HomeAssistant) -> None:
+    """Test that different templates have their own tracker."""
+    tracker = MeasureItConditionTracker(hass)
+    first = MagicMock()
+    second = MagicMock()
+    untrack_first = tracker.async_track(Template("{{ true }}", hass), first)
+    untrack_second = tracker.async_track(Template("{{ false }}", hass), second)
+    assert tracker.tracked_templates == 2
+    first.assert_called_once_with(True, None)
+    second.assert_called_once_with(False, None)
+    untrack_first()
+    untrack_second()
+    assert tracker.tracked_templates == 0
+
+
+async def test_template_error_is_passed_on(hass: HomeAssistant) -> None:
+    """Test that subscribers get the template error."""
+    tracker = MeasureItConditionTracker(hass)
+    action = MagicMock()
+    untrack = tracker.async_track(Template("{{ 1 / 0 }}", hass), action)
+    assert isinstance(action.call_args.args[0], TemplateError)
+    untrack()
+
+
+async def test_structured_condition_is_not_rendered(hass: HomeAssistant) -> None:
+    """Test that a recognized condition is evaluated without rendering."""
+    hass.states.async_set("input_boolean.production", "off")
+    tracker = MeasureItConditionTracker(hass)
+    actions = [MagicMock() for _ in range(2)]
+    with patch.object(
+        Template,
+        "async_render_to_info",
+        autospec=True,
+        side_effect=Template.async_render_to_info,
+    ) as render:
+        untracks = [
+            tracker.async_track(Template(CONDITION, hass), action) for action in actions
+        ]
+        assert tracker.tracked_templates == 1
+        hass.states.async_set("input_boolean.production", "on")
+        await hass.async_block_till_done()
+        # An attribute change does not change the result
+        hass.states.async_set("input_boolean.production", "on", {"icon": "mdi:a"})
+        await hass.async_block_till_done()
+        assert render.call_count == 0
+    for action in actions:
+        assert action.call_args_list == [call(False, None), call(True, ANY)]
+    for untrack in untracks:
+        untrack()
+    assert tracker.tracked_templates == 0
+
+
+async def test_structured_condition_error_is_passed_on(hass: HomeAssistant) -> None:
+    """Test that a number that cannot be converted is passed on as an error."""
+    hass.states.async_set("sensor.power", "unavailable")
+    tracker = MeasureItConditionTracker(hass)
+    action = MagicMock()
+    untrack = tracker.async_track(
+        Template("{{ states('sensor.power') | float > 100 }}", hass), action
+    )
+    assert isinstance(action.call_args.args[0], TemplateError)
+    hass.states.async_set("sensor.power", "150")
+    await hass.async_block_till_done()
+    assert action.call_args == call(True, ANY)
+    untrack()
+
+
+async def test_result_is_passed_with_time_fired(hass: HomeAssistant) -> None:
+    """Test that a changed result is passed with the time of its state change."""
+    hass.states.async_set("input_boolean.production", "off")
+    tracker = MeasureItConditionTracker(hass)
+    actions = [MagicMock() for _ in range(2)]
+    untracks = [
+        tracker.async_track(Template(template, hass), action)
+        for template, action in zip((CONDITION, TEMPLATE), actions, strict=True)
+    ]
+    hass.states.async_set("input_boolean.production", "on")
+    await hass.async_block_till_done()
+    last_updated = hass.states.get("input_boolean.production").last_updated
+    for action in actions:
+        assert action.call_args == call(True, last_updated)
+    for untrack in untracks:
+        untrack()
@@ -15,8 +15,11 @@ from custom_components.measureit.const import (
     CONF_PERIODS,
     CONF_SOURCE,
     CONF_STATE_CLASS,
+    CONF_TW_CALENDAR,
     CONF_TW_DAYS,
+    CONF_TW_EXCLUDED_DATES,
     CONF_TW_FROM,
+    CONF_TW_RANGES,
     CONF_TW_TILL,
     DOMAIN,
 )
@@ -249,6 +252,42 @@ async def test_flow_with_errors(hass: HomeAssistant) -> None:
 
     assert result["errors"] == {"base": "condition_invalid"}
 
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_TW_DAYS: ["0"],
+            CONF_TW_FROM: "00:00",
+            CONF_TW_TILL: "00:00",
+            CONF_TW_RANGES: ["someday 07:00-09:00"],
+        },
+    )
+
+    assert result["errors"] == {"base": "tw_range_invalid"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_TW_DAYS: ["0"],
+            CONF_TW_FROM: "00:00",
+            CONF_TW_TILL: "00:00",
+            CONF_TW_EXCLUDED_DATES: ["2025-13-01"],
+        },
+    )
+
+    assert result["errors"] == {"base": "tw_date_invalid"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_TW_DAYS: ["0"],
+            CONF_TW_FROM: "00:00",
+            CONF_TW_TILL: "00:00",
+            CONF_TW_CALENDAR: "/nonexistent/holidays.ics",
+        },
+    )
+
+    assert result["errors"] == {"base": "tw_calendar_invalid"}
+
 
 async def test_source_config_flow(hass: HomeAssistant) -> None:
     """Test the config flow for setting up a config with source meters."""
@@ -1,19 +1,22 @@
 """Test for the measureit coordinator."""
 
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import ANY, MagicMock, call
 
 import pytest
 from homeassistant.const import STATE_UNKNOWN
 from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.template import Template
 from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
 from custom_components.measureit.const import MeterType
 from custom_components.measureit.coordinator import (
     MeasureItCoordinator,
     MeasureItCoordinatorEntity,
 )
+from custom_components.measureit.heartbeat import async_get_heartbeat
 from custom_components.measureit.time_window import TimeWindow
 
 
@@ -90,7 +93,8 @@ def test_async_on_time_window_active_change(coordinator: MeasureItCoordinator) -
         datetime(2022, 1, 1, 10, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
     )
     entity.on_time_window_change.assert_called_with(active=False)
-    assert coordinator._time_window_listener is not None
+    # The next change is scheduled by the shared time window tracker
+    assert coordinator._time_window_listener is None
 
 
 def test_async_on_condition_template_update(coordinator: MeasureItCoordinator) -> None:
@@ -98,10 +102,68 @@ def test_async_on_condition_template_update(coordinator: MeasureItCoordinator) -
     entity = MeasureItCoordinatorEntity()
     entity.on_condition_template_change = MagicMock()
     coordinator.async_register_sensor(entity)
-    mock_tracktemplateresultinfo = MagicMock()
-    mock_tracktemplateresultinfo.result = False
-    coordinator.async_on_condition_template_update(None, [mock_tracktemplateresultinfo])
-    entity.on_condition_template_change.assert_called_with(active=False)
+    coordinator.async_on_condition_template_update(False)
+    entity.on_condition_template_change.assert_called_with(active=False, backdate=None)
+
+
+def test_condition_template_update_is_backdated(
+    coordinator: MeasureItCoordinator,
+) -> None:
+    """Test that a condition change is back-dated to the time of the state change."""
+    entity = MeasureItCoordinatorEntity()
+    entity.on_condition_template_change = MagicMock()
+    coordinator.async_register_sensor(entity)
+    coordinator.async_on_condition_template_update(
+        True, dt_util.utcnow() - timedelta(seconds=2)
+    )
+    backdate = entity.on_condition_template_change.call_args.kwargs["backdate"]
+    assert backdate.elapsed_ns >= 2 * 10**9
+    assert backdate.source_value is None
+    assert coordinator.event_lag.count == 1
+    assert coordinator.event_lag.max >= timedelta(seconds=2)
+    assert coordinator.event_lag.as_dict()["last"] >= 2
+
+
+async def test_condition_backdated_to_source_value(hass: HomeAssistant) -> None:
+    """Test that a late condition change uses the source value of its moment."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.SOURCE,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        source_entity="sensor.source",
+    )
+    entity = MeasureItCoordinatorEntity()
+    entity.on_value_change = MagicMock()
+    entity.on_condition_template_change = MagicMock()
+    coordinator.async_register_sensor(entity)
+    start = dt_util.utcnow() - timedelta(seconds=10)
+
+    def read_source(value: str, seconds: int) -> None:
+        event = MagicMock(time_fired=start + timedelta(seconds=seconds))
+        event.data = {"new_state": StateMock(value), "old_state": None}
+        coordinator.async_on_source_entity_state_change(event)
+
+    def source_value_at_condition(seconds: int) -> Decimal | None:
+        coordinator.async_on_condition_template_update(
+            True, start + timedelta(seconds=seconds)
+        )
+        return entity.on_condition_template_change.call_args.kwargs[
+            "backdate"
+        ].source_value
+
+    for value, seconds in (("10", 0), ("12", 1), ("15", 3), ("16", 4)):
+        read_source(value, seconds)
+    # The readings at or after the condition change were handled before it
+    assert source_value_at_condition(1) == Decimal(10)
+    assert source_value_at_condition(2) == Decimal(12)
+    assert source_value_at_condition(5) is None
+
+    # Not across a drop of the source value
+    read_source("20", 6)
+    read_source("5", 8)
+    assert source_value_at_condition(7) is None
+    coordinator.stop()
 
 
 # rewrite this using propertymock
@@ -123,7 +185,7 @@ def test_async_on_source_state_change(coordinator: MeasureItCoordinator) -> None
     entity = MeasureItCoordinatorEntity()
     entity.on_value_change = MagicMock()
     coordinator.async_register_sensor(entity)
-    event = MagicMock()
+    event = MagicMock(time_fired=dt_util.utcnow())
     event.data = {"new_state": StateMock(456), "old_state": StateMock(123)}
     coordinator.async_on_source_entity_state_change(event)
     entity.on_value_change.assert_called_with(456)
@@ -136,7 +198,7 @@ def test_async_on_source_state_change_with_unknown_state(
     entity = MeasureItCoordinatorEntity()
     entity.on_value_change = MagicMock()
     coordinator.async_register_sensor(entity)
-    event = MagicMock()
+    event = MagicMock(time_fired=dt_util.utcnow())
     event.data = {"new_state": StateMock(STATE_UNKNOWN), "old_state": StateMock(456)}
     coordinator.async_on_source_entity_state_change(event)
     entity.on_value_change.assert_not_called()
@@ -149,7 +211,7 @@ def test_async_on_source_state_change_with_no_number(
     entity = MeasureItCoordinatorEntity()
     entity.on_value_change = MagicMock()
     coordinator.async_register_sensor(entity)
-    event = MagicMock()
+    event = MagicMock(time_fired=dt_util.utcnow())
     event.data = {"new_state": StateMock("test"), "old_state": StateMock(456)}
     coordinator.async_on_source_entity_state_change(event)
     entity.on_value_change.assert_not_called()
@@ -168,20 +230,41 @@ def test_async_on_counter_template_update_becomes_true(
     entity.on_value_change.assert_called_with(1)
 
 
-def test_async_on_heartbeat(coordinator: MeasureItCoordinator) -> None:
-    """Test async_on_heartbeat."""
+def test_sensor_measuring_change_for_time(hass: HomeAssistant) -> None:
+    """Test that only measuring time sensors are tracked by the heartbeat."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.TIME,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+    )
+    heartbeat = async_get_heartbeat(hass)
     entity = MeasureItCoordinatorEntity()
-    entity.on_value_change = MagicMock()
-    coordinator.async_register_sensor(entity)
-    assert coordinator._heartbeat_listener is None
-    with patch("homeassistant.helpers.event.async_track_point_in_utc_time"):
-        coordinator.async_on_heartbeat()
+    unregister = coordinator.async_register_sensor(entity)
+    assert heartbeat.tracked_entities == 0
+
+    coordinator.async_on_sensor_measuring_change(entity, measuring=True)
+    assert heartbeat.tracked_entities == 1
+    assert heartbeat.active is True
+
+    coordinator.async_on_sensor_measuring_change(entity, measuring=False)
+    assert heartbeat.tracked_entities == 0
+    assert heartbeat.active is False
+
+    coordinator.async_on_sensor_measuring_change(entity, measuring=True)
+    unregister()
+    assert heartbeat.tracked_entities == 0
+    coordinator.stop()
 
-    # sensors are called on heartbeat
-    entity.on_value_change.assert_called()
 
-    # next heartbeat has been set
-    assert coordinator._heartbeat_listener is not None
+def test_sensor_measuring_change_ignored_for_counter(
+    coordinator: MeasureItCoordinator,
+) -> None:
+    """Test that counter sensors are never tracked by the heartbeat."""
+    entity = MeasureItCoordinatorEntity()
+    coordinator.async_register_sensor(entity)
+    coordinator.async_on_sensor_measuring_change(entity, measuring=True)
+    assert async_get_heartbeat(coordinator.hass).tracked_entities == 0
 
 
 def test_start_with_counter(coordinator: MeasureItCoordinator) -> None:
@@ -218,14 +301,180 @@ def test_start_with_source(coordinator: MeasureItCoordinator) -> None:
     entity.on_value_change.assert_called_with(123)
 
 
-def test_start_with_time(coordinator: MeasureItCoordinator) -> None:
+def test_source_state_change_updates_meter_store(hass: HomeAssistant) -> None:
+    """Test that a source coordinator updates its store once for all sensors."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.SOURCE,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        source_entity="sensor.test",
+    )
+    meters = [coordinator.meter_store.create_meter() for _ in range(2)]
+    entity = MeasureItCoordinatorEntity()
+    entity.on_value_change = MagicMock(side_effect=meters[0].update)
+    coordinator.async_register_sensor(entity)
+    event = MagicMock(time_fired=dt_util.utcnow())
+    event.data = {"new_state": StateMock(456), "old_state": StateMock(123)}
+    coordinator.async_on_source_entity_state_change(event)
+    entity.on_value_change.assert_called_once_with()
+    assert coordinator.meter_store.has_source_value is True
+    assert meters[0].has_source_value is True
+    assert meters[1].has_source_value is False
+    coordinator.stop()
+
+
+def test_start_with_time(hass: HomeAssistant) -> None:
     """Test start."""
-    coordinator._meter_type = MeterType.TIME
-    coordinator._condition_template = Template("{{ True }}", coordinator.hass)
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.TIME,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        Template("{{ True }}", hass),
+    )
     assert coordinator._condition_template_listener is None
     assert coordinator._time_window_listener is None
-    assert coordinator._heartbeat_listener is None
     coordinator.start()
-    assert coordinator._heartbeat_listener is not None
     assert coordinator._time_window_listener is not None
     assert coordinator._condition_template_listener is not None
+    coordinator.stop()
+
+
+def test_stop_clears_listeners(hass: HomeAssistant) -> None:
+    """Test that stop clears the listeners, so stopping again is harmless."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.SOURCE,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        Template("{{ True }}", hass),
+        source_entity="sensor.test",
+    )
+    coordinator.start()
+    assert coordinator._source_entity_update_listener is not None
+    coordinator.stop()
+    assert coordinator._time_window_listener is None
+    assert coordinator._condition_template_listener is None
+    assert coordinator._source_entity_update_listener is None
+    coordinator.stop()
+
+
+async def test_condition_change_within_min_duration_is_ignored(
+    hass: HomeAssistant,
+) -> None:
+    """Test that a condition change is only passed on once it lasted long enough."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.COUNTER,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        condition_min_off=timedelta(seconds=30),
+    )
+    entity = MeasureItCoordinatorEntity()
+    entity.on_condition_template_change = MagicMock()
+    entity.on_value_change = MagicMock()
+    coordinator.async_register_sensor(entity)
+    coordinator.async_on_condition_template_update(True)
+    entity.on_condition_template_change.assert_called_once_with(
+        active=True, backdate=None
+    )
+
+    coordinator.async_on_condition_template_update(False)
+    coordinator.async_on_condition_template_update(True)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    entity.on_condition_template_change.assert_called_once_with(
+        active=True, backdate=None
+    )
+
+    coordinator.async_on_condition_template_update(False)
+    coordinator.async_on_counter_template_update(
+        "mock", StateMock(False), StateMock(True)
+    )
+    entity.on_condition_template_change.assert_called_once_with(
+        active=True, backdate=None
+    )
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    backdate = entity.on_condition_template_change.call_args.kwargs["backdate"]
+    assert entity.on_condition_template_change.call_args == call(
+        active=False, backdate=ANY
+    )
+    # The count since the change is not counted by the stopped sensors
+    assert backdate.count == 1
+    assert backdate.elapsed_ns >= 0
+
+    # A change without a minimum duration is passed on right away
+    coordinator.async_on_condition_template_update(True)
+    assert entity.on_condition_template_change.call_args == call(
+        active=True, backdate=None
+    )
+    coordinator.stop()
+
+
+async def test_pending_condition_change_across_boundaries(hass: HomeAssistant) -> None:
+    """Test that a pending change is kept across boundaries, which it applies after."""
+    coordinator = MeasureItCoordinator(
+        hass,
+        "test",
+        MeterType.SOURCE,
+        TimeWindow(["0", "1", "2"], "00:00:00", "02:00:00"),
+        source_entity="sensor.test",
+        condition_min_on=timedelta(seconds=30),
+        condition_min_off=timedelta(seconds=30),
+    )
+    entities = []
+    for _ in range(2):
+        entity = MeasureItCoordinatorEntity()
+        entity.on_condition_template_change = MagicMock()
+        entity.on_time_window_change = MagicMock()
+        entity.on_value_change = MagicMock()
+        coordinator.async_register_sensor(entity)
+        entities.append(entity)
+    reset_entity, other_entity = entities
+
+    def set_source(value: int) -> None:
+        event = MagicMock(time_fired=dt_util.utcnow())
+        event.data = {"new_state": StateMock(value), "old_state": None}
+        coordinator.async_on_source_entity_state_change(event)
+
+    set_source(100)
+    coordinator.async_on_condition_template_update(False)
+    coordinator.async_on_condition_template_update(True)
+    set_source(105)
+    coordinator.async_on_time_window_active_change(
+        datetime(2022, 1, 1, 10, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    )
+    set_source(110)
+    # A reset or calibration of a sensor
+    coordinator.async_split_condition(reset_entity)
+    set_source(120)
+    for entity in entities:
+        assert entity.on_condition_template_change.call_count == 1
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    backdate = reset_entity.on_condition_template_change.call_args.kwargs["backdate"]
+    assert backdate.source_value == 110
+    backdate = other_entity.on_condition_template_change.call_args.kwargs["backdate"]
+    assert backdate.source_value == 105
+    assert other_entity.on_condition_template_change.call_args == call(
+        active=True, backdate=ANY
+    )
+
+    # Changes that are undone within the minimum duration are never passed on,
+    # even when a boundary falls within them
+    coordinator.async_on_condition_template_update(False)
+    set_source(5)
+    coordinator.async_on_condition_template_update(True)
+    coordinator.async_on_condition_template_update(False)
+    coordinator.async_split_condition(reset_entity)
+    coordinator.async_on_time_window_active_change(
+        datetime(2022, 1, 1, 11, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    )
+    coordinator.async_on_condition_template_update(True)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=62))
+    await hass.async_block_till_done()
+    for entity in entities:
+        assert entity.on_condition_template_change.call_count == 2
+    coordinator.stop()
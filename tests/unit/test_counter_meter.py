@@ -2,7 +2,8 @@
 
 from decimal import Decimal
 
-from custom_components.measureit.meter import CounterMeter
+from custom_components.measureit.meter import Backdate, CounterMeter
+from custom_components.measureit.numeric import FixedPointEngine
 
 
 def test_init() -> None:
@@ -115,3 +116,32 @@ def test_calibrate() -> None:
     assert meter.measured_value == Decimal(2)
     meter.stop()
     assert meter.measured_value == Decimal(2)
+
+
+def test_fixed_point_engine() -> None:
+    """Test a counter meter with a fixed-point engine."""
+    engine = FixedPointEngine(0)
+    meter = CounterMeter(engine)
+    meter.start()
+    meter.update(engine.one)
+    meter.update(engine.one)
+    assert meter.measured_value == Decimal(2)
+    meter.reset()
+    assert meter.measured_value == Decimal(0)
+    assert meter.prev_measured_value == Decimal(2)
+    assert meter.to_dict() == {
+        "measured_value": "0",
+        "prev_measured_value": "2",
+        "measuring": True,
+    }
+
+
+def test_backdated_start_and_stop() -> None:
+    """Test that a back-dated start and stop correct what was counted since."""
+    meter = CounterMeter()
+    meter.start(Backdate(0, None, 2))
+    assert meter.measured_value == Decimal(2)
+    meter.update(1)
+    meter.stop(Backdate(0, None, 1))
+    assert meter.measuring is False
+    assert meter.measured_value == Decimal(2)
@@ -0,0 +1,211 @@
+"""Tests for the MeasureIt cron schedules."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from cronsim import CronSimError
+from homeassistant.util import dt as dt_util
+
+from custom_components.measureit.const import PREDEFINED_PERIODS
+from custom_components.measureit.cron import (
+    CalendarSchedule,
+    CronSchedule,
+    ScheduleCache,
+    create_schedule,
+)
+
+BRUSSELS = ZoneInfo("Europe/Brussels")
+
+
+@pytest.fixture(autouse=True)
+def fixture_time_zone():
+    """Evaluate the schedules in Europe/Brussels."""
+    default_time_zone = dt_util.get_default_time_zone()
+    dt_util.set_default_time_zone(BRUSSELS)
+    yield
+    dt_util.set_default_time_zone(default_time_zone)
+
+
+def test_invalid_expression() -> None:
+    """Test that an invalid expression is rejected."""
+    with pytest.raises(CronSimError):
+        CronSchedule("61 * * * *")
+
+
+def test_next_after_long_downtime() -> None:
+    """Test that the next fire time is found directly after a long downtime."""
+    schedule = CronSchedule(PREDEFINED_PERIODS["5m"])
+    since = datetime(2025, 1, 1, 10, 2, 30, tzinfo=BRUSSELS)
+    now = since + timedelta(days=3, hours=12)
+
+    next_fire, skipped = schedule.seek(since, now)
+
+    assert next_fire == datetime(2025, 1, 4, 22, 5, tzinfo=BRUSSELS)
+    assert skipped == 3.5 * 24 * 12
+
+
+def test_next_after_converts_to_local_time() -> None:
+    """Test that a moment in UTC is evaluated in local time."""
+    schedule = CronSchedule(PREDEFINED_PERIODS["day"])
+    next_fire = schedule.next_after(datetime(2025, 1, 1, 23, 30, tzinfo=dt_util.UTC))
+    assert next_fire == datetime(2025, 1, 3, 0, 0, tzinfo=BRUSSELS)
+
+
+def test_next_after_dst_start() -> None:
+    """Test that a fire time in the skipped hour moves to after the gap."""
+    schedule = CronSchedule("30 2 * * *")
+    next_fire = schedule.next_after(datetime(2024, 3, 31, 1, 0, tzinfo=BRUSSELS))
+    assert next_fire == datetime(2024, 3, 31, 3, 0, tzinfo=BRUSSELS)
+
+
+@pytest.mark.parametrize(
+    ("expression", "since", "until", "expected"),
+    [
+        # Same day, fire times on the boundaries
+        (
+            "0 * * * *",
+            datetime(2025, 1, 1, 10, 0, tzinfo=BRUSSELS),
+            datetime(2025, 1, 1, 13, 0, tzinfo=BRUSSELS),
+            3,
+        ),
+        # Until before since
+        (
+            "0 * * * *",
+            datetime(2025, 1, 1, 13, 0, tzinfo=BRUSSELS),
+            datetime(2025, 1, 1, 10, 0, tzinfo=BRUSSELS),
+            0,
+        ),
+        # Weekly, on Mondays
+        (
+            "0 0 * * 1",
+            datetime(2025, 1, 1, tzinfo=BRUSSELS),
+            datetime(2025, 2, 1, tzinfo=BRUSSELS),
+            4,
+        ),
+        # Monthly
+        (
+            PREDEFINED_PERIODS["month"],
+            datetime(2025, 1, 1, tzinfo=BRUSSELS),
+            datetime(2026, 1, 1, tzinfo=BRUSSELS),
+            12,
+        ),
+        # Only in January, not on the first day
+        (
+            "0 12 * 1 *",
+            datetime(2025, 1, 1, 13, 0, tzinfo=BRUSSELS),
+            datetime(2025, 3, 1, tzinfo=BRUSSELS),
+            30,
+        ),
+    ],
+)
+def test_count_between(
+    expression: str, since: datetime, until: datetime, expected: int
+) -> None:
+    """Test counting the fire times between two moments."""
+    schedule = CronSchedule(expression)
+    assert schedule.count_between(since, until) == expected
+
+
+def test_create_schedule() -> None:
+    """Test that calendar periods bypass cronsim."""
+    for period in ("hour", "day", "week", "month", "year"):
+        schedule = create_schedule(PREDEFINED_PERIODS[period])
+        assert isinstance(schedule, CalendarSchedule)
+        assert schedule.period == period
+    assert isinstance(create_schedule(" 0  0 * * * "), CalendarSchedule)
+    assert isinstance(create_schedule(PREDEFINED_PERIODS["5m"]), CronSchedule)
+    assert isinstance(create_schedule("0 6 * * *"), CronSchedule)
+
+
+@pytest.mark.parametrize("period", ["hour", "day", "week", "month", "year"])
+@pytest.mark.parametrize(
+    "time_zone", ["Europe/Brussels", "America/Los_Angeles", "Australia/Lord_Howe"]
+)
+def test_calendar_schedule_matches_cron(period: str, time_zone: str) -> None:
+    """Test that a calendar schedule gives the same results as cronsim."""
+    zone = ZoneInfo(time_zone)
+    dt_util.set_default_time_zone(zone)
+    expression = PREDEFINED_PERIODS[period]
+    calendar = CalendarSchedule(expression, period)
+    cron = CronSchedule(expression)
+    since = datetime(2024, 1, 1, tzinfo=zone)
+    # Every 7 hours and 13 minutes for a year, covering both DST transitions
+    for step in range(0, 366 * 24 * 60, 433):
+        moment = dt_util.as_local(dt_util.as_utc(since) + timedelta(minutes=step))
+        assert calendar.next_after(moment) == cron.next_after(moment), moment
+        assert calendar.count_between(since, moment) == cron.count_between(
+            since, moment
+        ), moment
+
+
+LORD_HOWE = ZoneInfo("Australia/Lord_Howe")
+
+
+@pytest.mark.parametrize(
+    ("moment", "expected"),
+    [
+        # One hour gap
+        (
+            datetime(2024, 3, 31, 1, 30, tzinfo=BRUSSELS),
+            datetime(2024, 3, 31, 3, tzinfo=BRUSSELS),
+        ),
+        # Half hour gap
+        (
+            datetime(2024, 10, 6, 1, 51, tzinfo=LORD_HOWE),
+            datetime(2024, 10, 6, 3, tzinfo=LORD_HOWE),
+        ),
+    ],
+)
+def test_calendar_hour_skips_dst_gap(moment: datetime, expected: datetime) -> None:
+    """Test that an hour that does not exist has no boundary."""
+    dt_util.set_default_time_zone(moment.tzinfo)
+    schedule = create_schedule(PREDEFINED_PERIODS["hour"])
+    assert schedule.next_after(moment) == expected
+
+
+def test_schedule_cache_shares_next_fire_time() -> None:
+    """Test that the next fire time is computed once for the same interval."""
+    cache = ScheduleCache()
+    expression = PREDEFINED_PERIODS["day"]
+    now = datetime(2025, 1, 1, 10, 0, tzinfo=BRUSSELS)
+    midnight = datetime(2025, 1, 2, tzinfo=BRUSSELS)
+
+    for second in range(3000):
+        assert cache.next_after(expression, now + timedelta(seconds=second)) == (
+            midnight
+        )
+    assert cache.misses == 1
+    assert cache.hits == 2999
+    assert cache.get(expression) is cache.get(expression)
+
+    # Before the computed interval and at the fire time itself are misses
+    assert cache.next_after(expression, now - timedelta(hours=1)) == midnight
+    assert cache.next_after(expression, midnight) == midnight + timedelta(days=1)
+    assert cache.misses == 3
+
+
+def test_schedule_cache_evicts_least_recently_used() -> None:
+    """Test that the cache is bounded."""
+    cache = ScheduleCache(maxsize=2)
+    day = cache.get(PREDEFINED_PERIODS["day"])
+    cache.get(PREDEFINED_PERIODS["week"])
+    cache.get(PREDEFINED_PERIODS["day"])
+    cache.get(PREDEFINED_PERIODS["month"])
+    assert len(cache) == 2
+    assert cache.get(PREDEFINED_PERIODS["day"]) is day
+    assert cache.misses == 0
+
+
+def test_schedule_cache_time_zone_change() -> None:
+    """Test that the cache is cleared when the time zone changes."""
+    cache = ScheduleCache()
+    expression = PREDEFINED_PERIODS["day"]
+    now = datetime(2025, 1, 1, 10, 0, tzinfo=dt_util.UTC)
+    assert cache.next_after(expression, now) == datetime(2025, 1, 2, tzinfo=BRUSSELS)
+
+    new_york = ZoneInfo("America/New_York")
+    dt_util.set_default_time_zone(new_york)
+    assert cache.next_after(expression, now) == datetime(2025, 1, 2, tzinfo=new_york)
+    assert len(cache) == 1
+    assert cache.misses == 2
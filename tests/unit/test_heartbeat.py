@@ -0,0 +1,62 @@
+"""Tests for the shared MeasureIt heartbeat."""
+
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.measureit.heartbeat import (
+    MeasureItHeartbeat,
+    async_get_heartbeat,
+)
+
+
+def test_get_heartbeat_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same heartbeat."""
+    assert async_get_heartbeat(hass) is async_get_heartbeat(hass)
+
+
+def test_track_and_untrack(hass: HomeAssistant) -> None:
+    """Test that the timer is only armed while entities are tracked."""
+    heartbeat = MeasureItHeartbeat(hass)
+    entity = MagicMock()
+    assert heartbeat.active is False
+
+    heartbeat.async_track(entity)
+    heartbeat.async_track(entity)
+    assert heartbeat.tracked_entities == 1
+    assert heartbeat.active is True
+
+    heartbeat.async_untrack(entity)
+    assert heartbeat.tracked_entities == 0
+    assert heartbeat.active is False
+
+    # untracking an unknown entity is harmless
+    heartbeat.async_untrack(entity)
+
+
+def test_heartbeat_updates_tracked_entities(hass: HomeAssistant) -> None:
+    """Test that only tracked entities are updated on a tick."""
+    heartbeat = MeasureItHeartbeat(hass)
+    tracked = MagicMock()
+    untracked = MagicMock()
+    heartbeat.async_track(tracked)
+    heartbeat.async_track(untracked)
+    heartbeat.async_untrack(untracked)
+
+    heartbeat.async_on_heartbeat()
+    tracked.on_value_change.assert_called_once_with()
+    untracked.on_value_change.assert_not_called()
+    assert heartbeat.active is True
+    heartbeat.async_untrack(tracked)
+
+
+def test_heartbeat_entity_untracks_during_tick(hass: HomeAssistant) -> None:
+    """Test that an entity can stop measuring while being updated."""
+    heartbeat = MeasureItHeartbeat(hass)
+    entity = MagicMock()
+    entity.on_value_change.side_effect = lambda: heartbeat.async_untrack(entity)
+    heartbeat.async_track(entity)
+
+    heartbeat.async_on_heartbeat()
+    assert heartbeat.tracked_entities == 0
+    assert heartbeat.active is False
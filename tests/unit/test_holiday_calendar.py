@@ -0,0 +1,327 @@
+"""Tests for MeasureIt holiday calendars."""
+
+import os
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.holiday_calendar import (
+    REFRESH_INTERVAL,
+    HolidayCalendar,
+    YearlyEvent,
+    async_get_holiday_calendar,
+    async_release_holiday_calendars,
+    parse_ics,
+)
+from custom_components.measureit.time_window import TimeWindow
+from custom_components.measureit.time_window_tracker import (
+    MeasureItTimeWindowTracker,
+)
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+SUMMARY:New Year
+DTSTART;VALUE=DATE:20250101
+DTEND;VALUE=DATE:20250102
+RRULE:FREQ=YEARLY
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Company
+  shutdown
+DTSTART;VALUE=DATE:20250728
+DTEND;VALUE=DATE:20250802
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Easter Monday
+DTSTART;VALUE=DATE:20250421
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Cancelled
+DTSTART;VALUE=DATE:20250505
+STATUS:CANCELLED
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def write_calendar(path: Path, text: str, mtime: int) -> None:
+    """Write a calendar file with a given modification time."""
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_parse_ics() -> None:
+    """Test parsing dates and yearly events."""
+    dates, yearly = parse_ics(ICS)
+    assert dates == {
+        date(2025, 7, 28),
+        date(2025, 7, 29),
+        date(2025, 7, 30),
+        date(2025, 7, 31),
+        date(2025, 8, 1),
+        date(2025, 4, 21),
+    }
+    assert yearly == [YearlyEvent(date(2025, 1, 1), 1, None)]
+
+
+def test_parse_ics_end_and_duration() -> None:
+    """Test the end of timed events and events with a duration."""
+    dates, yearly = parse_ics(
+        "BEGIN:VCALENDAR\n"
+        "BEGIN:VEVENT\nDTSTART:20250301T090000Z\nDTEND:20250302T120000Z\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART:20250310T000000\nDTEND:20250311T000000\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART;VALUE=DATE:20250320\nDURATION:P2D\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nDTSTART;VALUE=DATE:20201225\nRRULE:FREQ=YEARLY;COUNT=3\n"
+        "END:VEVENT\n"
+        "END:VCALENDAR\n"
+    )
+    assert dates == {
+        date(2025, 3, 1),
+        date(2025, 3, 2),
+        date(2025, 3, 10),
+        date(2025, 3, 20),
+        date(2025, 3, 21),
+    }
+    assert yearly == [YearlyEvent(date(2020, 12, 25), 1, 2022)]
+
+
+def test_parse_ics_unsupported_recurrence() -> None:
+    """Test that only the first date of other recurrences is used."""
+    dates, yearly = parse_ics(
+        "BEGIN:VCALENDAR\nBEGIN:VEVENT\nDTSTART;VALUE=DATE:20251127\n"
+        "RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=4TH\nEND:VEVENT\nEND:VCALENDAR\n"
+    )
+    assert dates == {date(2025, 11, 27)}
+    assert yearly == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "not a calendar",
+        "BEGIN:VCALENDAR\nBEGIN:VEVENT\nDTSTART:2025\nEND:VEVENT\nEND:VCALENDAR\n",
+        "BEGIN:VCALENDAR\nBEGIN:VEVENT\nDTSTART:20251301\nEND:VEVENT\nEND:VCALENDAR\n",
+    ],
+)
+def test_parse_ics_invalid(text: str) -> None:
+    """Test that invalid calendars are rejected."""
+    with pytest.raises(ValueError):
+        parse_ics(text)
+
+
+async def test_contains_and_next_boundary(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test the dates of a loaded calendar."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = HolidayCalendar(hass, str(path))
+    assert await calendar.async_refresh() is True
+
+    assert date(2025, 4, 21) in calendar
+    assert date(2025, 4, 22) not in calendar
+    assert date(2031, 1, 1) in calendar
+    assert date(2024, 1, 1) not in calendar
+    assert calendar.next_boundary(date(2025, 4, 20)) == date(2025, 4, 21)
+    assert calendar.next_boundary(date(2025, 4, 21)) == date(2025, 4, 22)
+    assert calendar.next_boundary(date(2025, 7, 28)) == date(2025, 8, 2)
+    assert calendar.next_boundary(date(2025, 8, 2)) == date(2026, 1, 1)
+    assert calendar.next_boundary(date(2040, 1, 1)) == date(2040, 1, 2)
+
+
+async def test_next_boundary_after_last_date(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that there is no boundary after the last date."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(
+        path,
+        "BEGIN:VCALENDAR\nBEGIN:VEVENT\nDTSTART;VALUE=DATE:20251231\nEND:VEVENT\n"
+        "END:VCALENDAR\n",
+        1_000_000_000,
+    )
+    calendar = HolidayCalendar(hass, str(path))
+    await calendar.async_refresh()
+    assert calendar.next_boundary(date(2025, 12, 30)) == date(2025, 12, 31)
+    assert calendar.next_boundary(date(2025, 12, 31)) == date(2026, 1, 1)
+    assert calendar.next_boundary(date(2026, 1, 1)) is None
+
+
+@pytest.mark.parametrize(
+    ("event", "day", "boundary"),
+    [
+        ("DTSTART;VALUE=DATE:20300501", date(2025, 6, 1), date(2030, 5, 1)),
+        ("DTSTART;VALUE=DATE:20300501", date(2031, 5, 1), date(2031, 5, 2)),
+        ("DTSTART;VALUE=DATE:20280229", date(2028, 3, 1), date(2032, 2, 29)),
+    ],
+)
+async def test_next_boundary_of_endless_event_far_ahead(
+    hass: HomeAssistant, tmp_path: Path, event: str, day: date, boundary: date
+) -> None:
+    """Test that endless yearly events are found more than a year ahead."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(
+        path,
+        f"BEGIN:VCALENDAR\nBEGIN:VEVENT\n{event}\nRRULE:FREQ=YEARLY\nEND:VEVENT\n"
+        "END:VCALENDAR\n",
+        1_000_000_000,
+    )
+    calendar = HolidayCalendar(hass, str(path))
+    await calendar.async_refresh()
+    assert calendar.next_boundary(day) == boundary
+
+
+async def test_refresh_only_when_changed(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that the file is only parsed again when its mtime changes."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = HolidayCalendar(hass, str(path))
+    listener = MagicMock()
+    remove = calendar.async_add_listener(listener)
+
+    assert await calendar.async_refresh() is True
+    assert listener.call_count == 1
+    # Same mtime: the file is not read, even though it changed
+    write_calendar(path, ICS.replace("20250421", "20250422"), 1_000_000_000)
+    assert await calendar.async_refresh() is False
+    assert date(2025, 4, 21) in calendar
+
+    write_calendar(path, ICS.replace("20250421", "20250422"), 2_000_000_000)
+    assert await calendar.async_refresh() is True
+    assert date(2025, 4, 21) not in calendar
+    assert date(2025, 4, 22) in calendar
+    assert listener.call_count == 2
+
+    # A new mtime with the same dates does not notify
+    write_calendar(path, ICS.replace("20250421", "20250422"), 3_000_000_000)
+    assert await calendar.async_refresh() is False
+    assert listener.call_count == 2
+    remove()
+
+
+async def test_refresh_keeps_dates_of_invalid_file(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that the last dates are kept when the file cannot be read."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = HolidayCalendar(hass, str(path))
+    await calendar.async_refresh()
+
+    write_calendar(path, "garbage", 2_000_000_000)
+    assert await calendar.async_refresh() is False
+    path.unlink()
+    assert await calendar.async_refresh() is False
+    assert date(2025, 4, 21) in calendar
+
+
+async def test_refresh_interval(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that the file is checked periodically while there are listeners."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = async_get_holiday_calendar(hass, str(path), "entry_1")
+    assert async_get_holiday_calendar(hass, str(path), "entry_2") is calendar
+    listener = MagicMock()
+    remove = calendar.async_add_listener(listener)
+
+    write_calendar(path, ICS.replace("20250421", "20250422"), 2_000_000_000)
+    async_fire_time_changed(hass, dt_util.utcnow() + REFRESH_INTERVAL)
+    await hass.async_block_till_done()
+    assert listener.call_count == 1
+    assert date(2025, 4, 22) in calendar
+
+    remove()
+    write_calendar(path, ICS, 3_000_000_000)
+    async_fire_time_changed(hass, dt_util.utcnow() + 2 * REFRESH_INTERVAL)
+    await hass.async_block_till_done()
+    assert date(2025, 4, 22) in calendar
+
+
+async def test_release_calendars(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a calendar is dropped when its last owner releases it."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = async_get_holiday_calendar(hass, str(path), "entry_1")
+    async_get_holiday_calendar(hass, str(path), "entry_2")
+    await calendar.async_refresh()
+    listener = MagicMock()
+    calendar.async_add_listener(listener)
+
+    async_release_holiday_calendars(hass, "entry_1")
+    assert async_get_holiday_calendar(hass, str(path), "entry_2") is calendar
+    async_release_holiday_calendars(hass, "entry_2")
+    assert async_get_holiday_calendar(hass, str(path), "entry_3") is not calendar
+
+    # The released calendar no longer checks the file for changes
+    write_calendar(path, ICS.replace("20250421", "20250422"), 2_000_000_000)
+    async_fire_time_changed(hass, dt_util.utcnow() + REFRESH_INTERVAL)
+    await hass.async_block_till_done()
+    listener.assert_not_called()
+    assert date(2025, 4, 22) not in calendar
+
+
+async def test_time_window_with_calendar(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a time window is not active on the dates of its calendar."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = HolidayCalendar(hass, str(path))
+    await calendar.async_refresh()
+    tz = dt_util.get_default_time_zone()
+    window = TimeWindow(["0", "1", "2", "3", "4"], "08:00:00", "17:00:00", None, None)
+    holiday_window = TimeWindow(
+        ["0", "1", "2", "3", "4"], "08:00:00", "17:00:00", None, None, calendar
+    )
+    assert holiday_window.always_active is False
+    assert holiday_window.key != window.key
+
+    easter_monday = datetime(2025, 4, 21, 10, tzinfo=tz)
+    assert window.is_active(easter_monday) is True
+    assert holiday_window.is_active(easter_monday) is False
+    # Friday evening: the next change skips Easter Monday
+    assert holiday_window.next_change(datetime(2025, 4, 18, 18, tzinfo=tz)) == (
+        datetime(2025, 4, 22, 8, tzinfo=tz)
+    )
+    # During the shutdown the window stays inactive till the Monday after
+    assert holiday_window.next_change(datetime(2025, 7, 29, 12, tzinfo=tz)) == (
+        datetime(2025, 8, 4, 8, tzinfo=tz)
+    )
+
+
+async def test_tracker_follows_calendar_changes(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that subscribers are notified when the calendar changes."""
+    path = tmp_path / "holidays.ics"
+    write_calendar(path, ICS, 1_000_000_000)
+    calendar = HolidayCalendar(hass, str(path))
+    await calendar.async_refresh()
+    tracker = MeasureItTimeWindowTracker(hass)
+    window = TimeWindow(["0", "1", "2", "3", "4"], "08:00:00", "17:00:00", None, None)
+    holiday_window = TimeWindow(
+        ["0", "1", "2", "3", "4"], "08:00:00", "17:00:00", None, None, calendar
+    )
+    action = MagicMock()
+    untrack = tracker.async_track(holiday_window, action)
+    other = tracker.async_track(window, MagicMock())
+    assert tracker.tracked_windows == 2
+
+    write_calendar(path, ICS.replace("20250421", "20250422"), 2_000_000_000)
+    await calendar.async_refresh()
+    assert action.call_count == 1
+    assert (
+        holiday_window.is_active(
+            datetime(2025, 4, 22, 10, tzinfo=dt_util.get_default_time_zone())
+        )
+        is False
+    )
+
+    untrack()
+    other()
+    write_calendar(path, ICS, 3_000_000_000)
+    await calendar.async_refresh()
+    assert action.call_count == 1
+    assert tracker.tracked_windows == 0
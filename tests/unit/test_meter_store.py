@@ -0,0 +1,162 @@
+"""Test the SourceMeterStore class."""
+
+from decimal import Decimal
+
+import pytest
+
+from custom_components.measureit.meter import Backdate
+from custom_components.measureit.meter_store import SourceMeterStore
+from custom_components.measureit.numeric import DECIMAL_ENGINE, FixedPointEngine
+
+
+def test_create_meter() -> None:
+    """Test creating meters in a store."""
+    store = SourceMeterStore()
+    meter = store.create_meter()
+    assert len(store) == 1
+    assert meter.row == 0
+    assert meter.measured_value == Decimal(0)
+    assert meter.prev_measured_value == Decimal(0)
+    assert meter.measuring is False
+    assert meter.has_source_value is False
+
+
+def test_update_is_shared() -> None:
+    """Test that one update provides the new value to all meters."""
+    store = SourceMeterStore()
+    meters = [store.create_meter() for _ in range(5)]
+    store.update(Decimal(100))
+    for meter in meters[:3]:
+        meter.update()
+        meter.start()
+    store.update(Decimal(125))
+    for meter in meters:
+        meter.update()
+    assert [meter.measured_value for meter in meters] == [25, 25, 25, 0, 0]
+    assert all(meter.has_source_value for meter in meters)
+
+
+def test_has_source_value_after_acknowledge() -> None:
+    """Test that a meter has a source value once it picked up an update."""
+    store = SourceMeterStore()
+    meter = store.create_meter()
+    meter.update()
+    assert meter.has_source_value is False
+    store.update(Decimal(1))
+    assert meter.has_source_value is False
+    meter.update()
+    assert meter.has_source_value is True
+
+
+def test_update_without_value() -> None:
+    """Test that the store requires a value to update."""
+    store = SourceMeterStore()
+    with pytest.raises(ValueError):
+        store.update(None)
+
+
+def test_source_reset_only_on_checked_rows() -> None:
+    """Test that only rows created with check_reset handle a source reset."""
+    store = SourceMeterStore()
+    checked = store.create_meter(check_reset=True)
+    unchecked = store.create_meter()
+    store.update(Decimal(100))
+    checked.start()
+    unchecked.start()
+    assert store.update(Decimal(200)) == []
+    assert store.update(Decimal(10)) == [0]
+    assert checked.measured_value == Decimal(110)
+    assert unchecked.measured_value == Decimal(-90)
+
+
+@pytest.mark.parametrize("engine", [DECIMAL_ENGINE, FixedPointEngine(3)])
+def test_row_steps(engine: FixedPointEngine) -> None:
+    """Test the measured values of a row through a sequence of operations."""
+    row = SourceMeterStore(engine).create_meter(check_reset=True)
+    steps = [
+        ("update", "100", "0", "0", False),
+        ("start", None, "0", "0", True),
+        ("update", "112.5", "12.5", "0", True),
+        ("calibrate", "20", "20", "0", True),
+        ("update", "130.25", "37.75", "0", True),
+        ("reset", None, "0", "37.75", True),
+        ("update", "200", "69.75", "37.75", True),
+        # The source has reset, a new session continues from the measured value
+        ("update", "2", "71.75", "37.75", True),
+        ("stop", None, "71.75", "37.75", False),
+        ("update", "10", "71.75", "37.75", False),
+        ("reset", None, "0", "71.75", False),
+    ]
+    for method, value, measured, prev_measured, measuring in steps:
+        if value is None:
+            getattr(row, method)()
+        elif method == "calibrate":
+            row.calibrate(Decimal(value))
+        else:
+            getattr(row, method)(engine.parse(value))
+        assert row.measured_value == Decimal(measured)
+        assert row.prev_measured_value == Decimal(prev_measured)
+        assert row.measuring == measuring
+
+
+def test_to_from_dict() -> None:
+    """Test that rows are stored and restored in the format of another store."""
+    meter = SourceMeterStore().create_meter()
+    meter.update(Decimal(100))
+    meter.start()
+    meter.update(Decimal(150))
+    store = SourceMeterStore()
+    rows = [store.create_meter(), store.create_meter()]
+    for row in rows:
+        row.from_dict(meter.to_dict())
+    assert store.has_source_value is True
+    assert [row.measured_value for row in rows] == [50, 50]
+    assert rows[0].to_dict() == meter.to_dict()
+    store.update(Decimal(160))
+    restored = SourceMeterStore().create_meter()
+    restored.from_dict(rows[1].to_dict())
+    assert restored.measured_value == Decimal(60)
+
+
+def test_restore_without_source_value() -> None:
+    """Test restoring a measuring row of which the source value is unknown."""
+    store = SourceMeterStore()
+    row = store.create_meter()
+    row.from_dict(
+        {
+            "measured_value": "5",
+            "prev_measured_value": "0",
+            "measuring": True,
+            "session_start_value": "10",
+            "session_start_measured_value": "2",
+        }
+    )
+    assert row.has_source_value is False
+    assert row.measured_value == Decimal(5)
+    store.update(Decimal(13))
+    assert row.measured_value == Decimal(5)
+
+
+def test_backdated_start_and_stop() -> None:
+    """Test that back-dated starts and stops of a row use the given source value."""
+    row = SourceMeterStore().create_meter()
+    steps = [
+        ("update", Decimal(100), 0, False),
+        ("update", Decimal(104), 0, False),
+        ("start", Backdate(0, Decimal(100), 0), 4, True),
+        ("update", Decimal(130), 30, True),
+        ("stop", Backdate(0, Decimal(120), 0), 20, False),
+        ("update", Decimal(140), 20, False),
+        # Without a known source value, the current one is used
+        ("start", Backdate(0, None, 0), 20, True),
+        ("update", Decimal(141), 21, True),
+        ("stop", None, 21, False),
+        ("start", None, 21, True),
+        ("calibrate", Decimal(50), 50, True),
+        # Never stopped at a source value before the start of the session
+        ("stop", Backdate(0, Decimal(130), 0), 50, False),
+    ]
+    for method, value, measured, measuring in steps:
+        getattr(row, method)(value)
+        assert row.measured_value == measured
+        assert row.measuring == measuring
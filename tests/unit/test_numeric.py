@@ -0,0 +1,62 @@
+"""Tests for the MeasureIt numeric engines."""
+
+from decimal import Decimal, InvalidOperation
+
+import pytest
+
+from custom_components.measureit.numeric import (
+    DECIMAL_ENGINE,
+    FixedPointEngine,
+)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("12.345", 12345),
+        ("-0.5", -500),
+        (".5", 500),
+        ("5.", 5000),
+        ("+7", 7000),
+        ("1e3", 1000000),
+        ("12.3455", 12346),
+        (" 4.2 ", 4200),
+        (456, 456000),
+    ],
+)
+def test_fixed_point_parse(value: str | int, expected: int) -> None:
+    """Test parsing state values."""
+    assert FixedPointEngine(3).parse(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value", ["", ".", "-", "+", "-.", "1.2.3", "1 2", "abc", "nan", "inf"]
+)
+def test_fixed_point_parse_invalid(value: str) -> None:
+    """Test parsing invalid state values."""
+    with pytest.raises(InvalidOperation):
+        FixedPointEngine(3).parse(value)
+
+
+def test_fixed_point_parse_none() -> None:
+    """Test parsing a missing state, similar to Decimal."""
+    with pytest.raises(TypeError):
+        FixedPointEngine(3).parse(None)
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["0", "3600", "12.3", "0.001", "-0.005", "-7.25", "-100", "123456789.123"],
+)
+def test_fixed_point_round_trip(value: str) -> None:
+    """Test that stored strings are identical for both engines."""
+    engine = FixedPointEngine(3)
+    native = engine.from_decimal(Decimal(value))
+    assert str(engine.to_decimal(native)) == str(DECIMAL_ENGINE.parse(value))
+    assert engine.from_decimal(Decimal(str(engine.to_decimal(native)))) == native
+
+
+def test_fixed_point_negative_scale() -> None:
+    """Test that a negative scale is rejected."""
+    with pytest.raises(ValueError):
+        FixedPointEngine(-1)
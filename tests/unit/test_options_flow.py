@@ -1,5 +1,6 @@
 """Tests for MeasureIt options flow in config_flow class."""
 
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
@@ -10,9 +11,21 @@ from homeassistant.data_entry_flow import FlowResultType
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.measureit.const import (
+    CONF_COALESCE_INTERVAL,
     CONF_CONFIG_NAME,
+    CONF_COUNTER_TEMPLATE,
+    CONF_FIXED_POINT_SCALE,
     CONF_INDEX,
+    CONF_LAZY_UPDATE,
+    CONF_METER_TYPE,
     CONF_SENSOR_NAME,
+    CONF_SOURCE,
+    CONF_TW_CALENDAR,
+    CONF_TW_DAYS,
+    CONF_TW_FROM,
+    CONF_TW_RANGES,
+    CONF_TW_TILL,
+    CONF_WRITE_BUDGET,
     DOMAIN,
 )
 
@@ -121,3 +134,128 @@ async def test_edit_sensor_uom_with_device_class(
     assert result["errors"] == {"base": "uom_with_device_class_update"}
     assert result["type"] == data_entry_flow.FlowResultType.FORM
     assert result["step_id"] == "edit_sensor"
+
+
+async def test_edit_main_invalid_range(
+    hass: HomeAssistant, loaded_entry: MockConfigEntry
+) -> None:
+    """Test that an invalid time range is rejected when editing the main config."""
+    result = await hass.config_entries.options.async_init(loaded_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"next_step_id": "edit_main"}
+    )
+    assert result["step_id"] == "edit_main"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_TW_DAYS: ["0", "1"],
+            CONF_TW_FROM: "00:00:00",
+            CONF_TW_TILL: "00:00:00",
+            CONF_TW_RANGES: ["25:00-26:00"],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "edit_main"
+    assert result["errors"] == {"base": "tw_range_invalid"}
+    assert CONF_TW_RANGES not in loaded_entry.options
+
+
+async def test_edit_main_invalid_calendar(
+    hass: HomeAssistant, loaded_entry: MockConfigEntry, tmp_path: Path
+) -> None:
+    """Test that a holiday calendar that cannot be used is rejected."""
+    not_ics = tmp_path / "holidays.txt"
+    not_ics.write_text("2025-12-25\n")
+    result = await hass.config_entries.options.async_init(loaded_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"next_step_id": "edit_main"}
+    )
+
+    for calendar_path in (str(tmp_path / "missing.ics"), str(not_ics)):
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_TW_DAYS: ["0", "1"],
+                CONF_TW_FROM: "00:00:00",
+                CONF_TW_TILL: "00:00:00",
+                CONF_TW_CALENDAR: calendar_path,
+            },
+        )
+        assert result["step_id"] == "edit_main"
+        assert result["errors"] == {"base": "tw_calendar_invalid"}
+    assert CONF_TW_CALENDAR not in loaded_entry.options
+
+
+async def test_edit_main_write_budget(
+    hass: HomeAssistant, loaded_entry: MockConfigEntry
+) -> None:
+    """Test that the write budget can be changed and removed in the options."""
+    for write_budget in (5, None):
+        result = await hass.config_entries.options.async_init(loaded_entry.entry_id)
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={"next_step_id": "edit_main"}
+        )
+        user_input = {
+            CONF_TW_DAYS: ["0", "1"],
+            CONF_TW_FROM: "00:00:00",
+            CONF_TW_TILL: "00:00:00",
+        }
+        if write_budget is not None:
+            user_input[CONF_WRITE_BUDGET] = write_budget
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input=user_input
+        )
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        assert loaded_entry.options.get(CONF_WRITE_BUDGET) == write_budget
+
+
+@pytest.mark.parametrize(
+    ("get_time_config", "meter_options"),
+    [
+        (
+            {CONF_CONFIG_NAME: "time_config", CONF_METER_TYPE: "time", "sensor": []},
+            {CONF_LAZY_UPDATE: True},
+        ),
+        (
+            {
+                CONF_CONFIG_NAME: "source_config",
+                CONF_METER_TYPE: "source",
+                CONF_SOURCE: "sensor.energy",
+                "sensor": [],
+            },
+            {CONF_FIXED_POINT_SCALE: 3, CONF_COALESCE_INTERVAL: 0.5},
+        ),
+        (
+            {
+                CONF_CONFIG_NAME: "counter_config",
+                CONF_METER_TYPE: "counter",
+                CONF_COUNTER_TEMPLATE: "{{ 1 }}",
+                "sensor": [],
+            },
+            {CONF_FIXED_POINT_SCALE: 2},
+        ),
+    ],
+)
+async def test_edit_main_meter_options(
+    hass: HomeAssistant, loaded_entry: MockConfigEntry, meter_options: dict
+) -> None:
+    """Test that the options of the meter type can be changed and removed."""
+    meter_keys = {CONF_LAZY_UPDATE, CONF_FIXED_POINT_SCALE, CONF_COALESCE_INTERVAL}
+    user_input = {
+        CONF_TW_DAYS: ["0", "1"],
+        CONF_TW_FROM: "00:00:00",
+        CONF_TW_TILL: "00:00:00",
+    }
+    for options in (meter_options, {}):
+        result = await hass.config_entries.options.async_init(loaded_entry.entry_id)
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={"next_step_id": "edit_main"}
+        )
+        assert meter_keys & set(result["data_schema"].schema) == set(meter_options)
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={**user_input, **options}
+        )
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        for key in meter_keys:
+            assert loaded_entry.options.get(key) == options.get(key)
@@ -2,6 +2,7 @@
 
 import logging
 from datetime import datetime, timedelta
+from decimal import Decimal
 from unittest import mock
 from unittest.mock import AsyncMock, MagicMock
 from zoneinfo import ZoneInfo
@@ -10,13 +11,21 @@ import pytest
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.core import HomeAssistant
 from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
-from custom_components.measureit.const import PREDEFINED_PERIODS, SensorState
-from custom_components.measureit.meter import CounterMeter, SourceMeter, TimeMeter
+from custom_components.measureit.const import (
+    ATTR_PREV,
+    ATTR_STATUS,
+    PREDEFINED_PERIODS,
+    SensorState,
+)
+from custom_components.measureit.meter import CounterMeter, TimeMeter
+from custom_components.measureit.meter_store import SourceMeterStore
 from custom_components.measureit.sensor import (
     MeasureItSensor,
     MeasureItSensorStoredData,
 )
+from custom_components.measureit.util import create_renderer
 
 
 @pytest.fixture(name="test_now")
@@ -279,6 +288,32 @@ def test_scheduled_reset_in_future(
     )
 
 
+def test_scheduled_reset_after_long_downtime(hass: HomeAssistant) -> None:
+    """Test that the next reset is found long after the sensor was created."""
+    created = datetime(2025, 1, 1, 10, 2, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    with mock.patch(
+        "homeassistant.helpers.condition.dt_util.now",
+        return_value=created,
+    ):
+        sensor = MeasureItSensor(
+            hass,
+            MagicMock(),
+            CounterMeter(),
+            "test_sensor_5m",
+            "test_sensor_5m",
+            PREDEFINED_PERIODS["5m"],
+            lambda x: x,
+            SensorStateClass.TOTAL,
+        )
+    with mock.patch(
+        "homeassistant.helpers.condition.dt_util.now",
+        return_value=created + timedelta(days=30),
+    ):
+        sensor.schedule_next_reset()
+    assert sensor._next_reset == created + timedelta(days=30, minutes=3)
+    sensor.unsub_reset_listener()
+
+
 def test_scheduled_reset_none_sensor(none_sensor: MeasureItSensor) -> None:
     """Test sensor reset when scheduled in past."""
     with mock.patch(
@@ -317,6 +352,172 @@ def test_on_value_change(day_sensor: MeasureItSensor) -> None:
     assert day_sensor.native_value == 2
 
 
+async def test_on_value_change_skips_identical_writes(hass: HomeAssistant) -> None:
+    """Test that a value change is not written when the rendered state is equal."""
+    sensor = MeasureItSensor(
+        hass,
+        MagicMock(),
+        SourceMeterStore().create_meter(),
+        "test_sensor_rounded",
+        "test_sensor_rounded",
+        "noreset",
+        lambda value: round(value, 1),
+        SensorStateClass.TOTAL,
+    )
+    sensor.entity_id = "sensor.test_sensor_rounded"
+    sensor.meter.update(Decimal(100))
+    sensor.on_condition_template_change(active=True)
+    sensor.on_time_window_change(active=True)
+    await hass.async_block_till_done()
+    with mock.patch.object(sensor, "_async_write_ha_state") as write_state:
+        sensor.on_value_change(Decimal("100.21"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 1
+        sensor.on_value_change(Decimal("100.22"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 1
+        sensor.on_value_change(Decimal("100.26"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 2
+        # Both are written at once, at the end of the loop turn
+        sensor.reset()
+        sensor.on_value_change(Decimal("100.26"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 3
+
+
+async def test_deadband_with_max_age(hass: HomeAssistant) -> None:
+    """Test that changes within the deadband are written once max age expires."""
+    sensor = MeasureItSensor(
+        hass,
+        MagicMock(),
+        SourceMeterStore().create_meter(),
+        "test_sensor_deadband",
+        "test_sensor_deadband",
+        "noreset",
+        lambda x: x,
+        SensorStateClass.TOTAL,
+        deadband=Decimal(1),
+        max_age=timedelta(minutes=5),
+    )
+    sensor.entity_id = "sensor.test_sensor_deadband"
+    sensor.meter.update(Decimal(100))
+    sensor.on_condition_template_change(active=True)
+    sensor.on_time_window_change(active=True)
+    await hass.async_block_till_done()
+    with mock.patch.object(sensor, "_async_write_ha_state") as write_state:
+        sensor.on_value_change(Decimal("100.5"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 0
+        sensor.on_value_change(Decimal("101.2"))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 1
+        sensor.on_value_change(Decimal("101.6"))
+        sensor.on_value_change(Decimal(102))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 1
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=6))
+        await hass.async_block_till_done()
+        assert write_state.call_count == 2
+        assert sensor._written_measured_value == Decimal(2)
+        # Stopping always writes
+        sensor.on_condition_template_change(active=False)
+        await hass.async_block_till_done()
+        assert write_state.call_count == 3
+    sensor.unsub_max_age_listener()
+
+
+async def test_deadband_change_written_before_reset(hass: HomeAssistant) -> None:
+    """Test that a change held back by the deadband is written before a reset."""
+    sensor = MeasureItSensor(
+        hass,
+        MagicMock(),
+        SourceMeterStore().create_meter(),
+        "test_sensor_deadband",
+        "test_sensor_deadband",
+        "noreset",
+        lambda x: x,
+        SensorStateClass.TOTAL,
+        deadband=Decimal(1),
+        max_age=timedelta(minutes=5),
+    )
+    sensor.entity_id = "sensor.test_sensor_deadband"
+    sensor.meter.update(Decimal(100))
+    sensor.on_condition_template_change(active=True)
+    sensor.on_time_window_change(active=True)
+    await hass.async_block_till_done()
+    written = []
+    with mock.patch.object(
+        sensor,
+        "_async_write_ha_state",
+        side_effect=lambda: written.append(sensor.native_value),
+    ):
+        sensor.on_value_change(Decimal("100.9"))
+        await hass.async_block_till_done()
+        assert written == []
+        sensor.reset()
+        await hass.async_block_till_done()
+        assert written == [Decimal("0.9"), Decimal(0)]
+    assert sensor._max_age_listener is None
+
+
+def test_extra_state_attributes_are_cached(day_sensor: MeasureItSensor) -> None:
+    """Test that the attributes are only rebuilt after being invalidated."""
+    day_sensor.meter = CounterMeter()
+    attributes = day_sensor.extra_state_attributes
+    day_sensor.on_value_change(1)
+    assert day_sensor.extra_state_attributes is attributes
+    day_sensor.on_condition_template_change(active=True)
+    attributes = day_sensor.extra_state_attributes
+    assert attributes[ATTR_STATUS] == SensorState.WAITING_FOR_TIME_WINDOW
+    day_sensor.on_time_window_change(active=True)
+    assert day_sensor.extra_state_attributes is not attributes
+    assert day_sensor.extra_state_attributes[ATTR_STATUS] == SensorState.MEASURING
+
+
+async def test_attributes_follow_states_read_by_template(hass: HomeAssistant) -> None:
+    """Test that the previous value is rendered again when its template reads states."""
+    hass.states.async_set("input_number.factor", "2")
+    sensor = MeasureItSensor(
+        hass,
+        MagicMock(),
+        CounterMeter(),
+        "test_sensor_factor",
+        "test_sensor_factor",
+        "noreset",
+        create_renderer(
+            hass, "{{ value | int * states('input_number.factor') | int }}"
+        ),
+        SensorStateClass.TOTAL,
+    )
+    sensor.entity_id = "sensor.test_sensor_factor"
+    sensor.on_condition_template_change(active=True)
+    sensor.on_time_window_change(active=True)
+    sensor.on_value_change(1)
+    sensor.reset()
+    with mock.patch.object(sensor, "_async_write_ha_state"):
+        await hass.async_block_till_done()
+        assert sensor.extra_state_attributes[ATTR_PREV] == "2"
+        hass.states.async_set("input_number.factor", "3")
+        sensor.on_value_change(1)
+        await hass.async_block_till_done()
+        assert sensor.extra_state_attributes[ATTR_PREV] == "3"
+
+
+def test_value_rendered_once_per_write(day_sensor: MeasureItSensor) -> None:
+    """Test that a state write renders the value once."""
+    renderer = MagicMock(side_effect=lambda value: value)
+    day_sensor._value_template_renderer = renderer
+    with mock.patch.object(
+        day_sensor, "_async_write_ha_state", side_effect=lambda: day_sensor.state
+    ):
+        day_sensor.async_write_scheduled_state()
+    renderer.assert_called_once_with(0)
+    assert day_sensor._written_value == 0
+    assert day_sensor.native_value == 0
+    assert renderer.call_count == 2
+
+
 def test_on_value_change_for_time(day_sensor: MeasureItSensor) -> None:
     """Test sensor value change for time."""
     day_sensor.meter = TimeMeter()
@@ -675,7 +876,7 @@ async def test_added_to_hass_with_restore_old_format(
 
 def test_extra_restore_state_data_property(day_sensor: MeasureItSensor) -> None:
     """Test getting extra restore state data."""
-    day_sensor.meter = SourceMeter()
+    day_sensor.meter = SourceMeterStore().create_meter()
     day_sensor.meter.update(100)
     day_sensor.on_condition_template_change(active=True)
     day_sensor.on_time_window_change(active=True)
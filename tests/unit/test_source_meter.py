@@ -1,13 +1,20 @@
-"""Test the SourceMeter class."""
+"""Test a source meter, as a row of a SourceMeterStore."""
 
 from decimal import Decimal
 
-from custom_components.measureit.meter import SourceMeter
+from custom_components.measureit.meter import Backdate
+from custom_components.measureit.meter_store import SourceMeterRow, SourceMeterStore
+from custom_components.measureit.numeric import FixedPointEngine, NumericEngine
+
+
+def create_meter(engine: NumericEngine | None = None) -> SourceMeterRow:
+    """Create a source meter in a store of its own."""
+    return SourceMeterStore(engine).create_meter()
 
 
 def test_init() -> None:
     """Test initializing a counter meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     assert meter.measured_value == Decimal(0)
     assert meter.prev_measured_value == Decimal(0)
     assert meter.measuring is False
@@ -15,15 +22,16 @@ def test_init() -> None:
 
 def test_update_initial_source_value() -> None:
     """Test updating a counter meter with an initial source value."""
-    meter = SourceMeter()
-    assert meter._source_value is None
+    meter = create_meter()
+    assert meter.has_source_value is False
     meter.update(Decimal(100))
-    assert meter._source_value == Decimal(100)
+    assert meter.has_source_value is True
+    assert meter.to_dict()["source_value"] == "100"
 
 
 def test_start() -> None:
     """Test starting a counter meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     assert meter.measuring is True
@@ -32,7 +40,7 @@ def test_start() -> None:
 
 def test_stop() -> None:
     """Test stopping a counter meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.stop()
@@ -42,7 +50,7 @@ def test_stop() -> None:
 
 def test_update() -> None:
     """Test updating a counter meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.update(Decimal(200))
@@ -61,7 +69,7 @@ def test_update() -> None:
 
 def test_negative_update() -> None:
     """Test updating a counter meter with negative values."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.update(Decimal(-200))
@@ -81,7 +89,7 @@ def test_negative_update() -> None:
 
 def test_update_decimal_values() -> None:
     """Test updating a counter meter with decimal values."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal("10.03"))
     meter.update(Decimal("10.75"))
     meter.start()
@@ -92,7 +100,7 @@ def test_update_decimal_values() -> None:
 
 def test_reset() -> None:
     """Test resetting a counter meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.update(Decimal(200))
@@ -124,14 +132,14 @@ def test_reset() -> None:
 
 def test_store_and_restore() -> None:
     """Test storing and restoring a source meter."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.update(Decimal(200))
     assert meter.measuring is True
     assert meter.measured_value == Decimal(100)
     data = meter.to_dict()
-    meter2 = SourceMeter()
+    meter2 = create_meter()
     meter2.from_dict(data)
     meter2.update(Decimal(300))
     assert meter2.measuring is True
@@ -141,7 +149,7 @@ def test_store_and_restore() -> None:
     assert meter2.measuring is False
     assert meter2.measured_value == Decimal(400)
     data = meter2.to_dict()
-    meter3 = SourceMeter()
+    meter3 = create_meter()
     meter3.from_dict(data)
     meter3.update(Decimal(500))
     assert meter3.measuring is False
@@ -150,7 +158,7 @@ def test_store_and_restore() -> None:
 
 def test_calibrate_while_measuring() -> None:
     """Test calibrating a source meter while measuring."""
-    meter = SourceMeter()
+    meter = create_meter()
     meter.update(Decimal(100))
     meter.start()
     meter.update(Decimal(200))
@@ -171,3 +179,45 @@ def test_calibrate_while_measuring() -> None:
     meter.start()
     meter.update(Decimal(500))
     assert meter.measured_value == Decimal(185)
+
+
+def test_fixed_point_engine() -> None:
+    """Test a source meter with a fixed-point engine."""
+    engine = FixedPointEngine(3)
+    meter = create_meter(engine)
+    meter.update(engine.parse("100.5"))
+    meter.start()
+    meter.update(engine.parse("200.75"))
+    assert meter.measured_value == Decimal("100.25")
+    meter.calibrate(Decimal("1.5"))
+    meter.update(engine.parse("201"))
+    assert meter.measured_value == Decimal("1.75")
+
+    data = meter.to_dict()
+    assert data["measured_value"] == "1.75"
+    assert data["source_value"] == "201"
+
+    decimal_meter = create_meter()
+    decimal_meter.from_dict(data)
+    assert decimal_meter.to_dict() == data
+    restored = create_meter(engine)
+    restored.from_dict(decimal_meter.to_dict())
+    assert restored.to_dict() == data
+
+
+def test_backdated_start_and_stop() -> None:
+    """Test that a back-dated start and stop use the source value of that moment."""
+    meter = create_meter()
+    meter.update(Decimal(100))
+    meter.update(Decimal(110))
+    meter.start(Backdate(0, Decimal(100), 0))
+    assert meter.measured_value == Decimal(10)
+    meter.update(Decimal(150))
+    meter.update(Decimal(160))
+    meter.stop(Backdate(0, Decimal(150), 0))
+    assert meter.measuring is False
+    assert meter.measured_value == Decimal(50)
+    # Without a known source value, the current one is used
+    meter.start(Backdate(0, None, 0))
+    meter.update(Decimal(165))
+    assert meter.measured_value == Decimal(55)
@@ -0,0 +1,71 @@
+"""Tests for the shared MeasureIt template cache."""
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import TemplateError
+
+from custom_components.measureit.template_cache import (
+    MeasureItTemplateCache,
+    async_get_template_cache,
+)
+from custom_components.measureit.util import create_renderer
+
+CONDITION = "{{ is_state('input_boolean.production', 'on') }}"
+
+
+def test_get_template_cache_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same cache."""
+    assert async_get_template_cache(hass) is async_get_template_cache(hass)
+
+
+async def test_one_template_per_source(hass: HomeAssistant) -> None:
+    """Test that owners of the same source share one compiled template."""
+    cache = MeasureItTemplateCache(hass)
+    first = cache.async_get(CONDITION, "entry_1")
+    assert cache.async_get(CONDITION, "entry_2") is first
+    assert cache.async_get(CONDITION, "entry_2") is first
+    assert cache.async_get("{{ true }}", "entry_2") is not first
+    assert len(cache) == 2
+    assert cache.misses == 2
+    assert cache.hits == 2
+
+
+async def test_release_drops_unreferenced_templates(hass: HomeAssistant) -> None:
+    """Test that a template is dropped when its last owner releases it."""
+    cache = MeasureItTemplateCache(hass)
+    first = cache.async_get(CONDITION, "entry_1")
+    cache.async_get(CONDITION, "entry_2")
+    cache.async_get("{{ true }}", "entry_2")
+
+    cache.async_release("entry_2")
+    assert len(cache) == 1
+    assert cache.async_get(CONDITION, "entry_3") is first
+
+    cache.async_release("entry_1")
+    cache.async_release("entry_3")
+    cache.async_release("entry_3")
+    assert len(cache) == 0
+    assert cache.async_get(CONDITION, "entry_1") is not first
+
+
+async def test_invalid_template_is_not_cached(hass: HomeAssistant) -> None:
+    """Test that an invalid template raises and takes no reference."""
+    cache = MeasureItTemplateCache(hass)
+    with pytest.raises(TemplateError):
+        cache.async_get("{{ value | }}", "entry_1")
+    assert len(cache) == 0
+    cache.async_release("entry_1")
+
+
+async def test_renderers_share_template(hass: HomeAssistant) -> None:
+    """Test that value templates rendered by Jinja are compiled once."""
+    cache = async_get_template_cache(hass)
+    template = "{{ value | int(0) ~ ' units' }}"
+    first = create_renderer(hass, template, owner="entry_1")
+    second = create_renderer(hass, template, owner="entry_2")
+    assert first(5) == second(5) == "5 units"
+    assert len(cache) == 1
+    assert cache.hits == 1
+    cache.async_release("entry_1")
+    cache.async_release("entry_2")
+    assert len(cache) == 0
@@ -3,23 +3,29 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from custom_components.measureit.meter import TimeMeter
+from custom_components.measureit.clock import NS_PER_SECOND
+from custom_components.measureit.meter import Backdate, TimeMeter
 
 HOUR = 3600
 
 
-class DatetimeMock:
-    """Mock datetime."""
+class ClockMock:
+    """Mock clock that advances with a fixed change on each read."""
 
     def __init__(self, now: datetime, change: timedelta) -> None:
         """Initialize mock."""
-        self._now = now
-        self._change = change
+        self._now_ns = int(now.timestamp()) * NS_PER_SECOND
+        self._change_ns = change // timedelta(microseconds=1) * 1000
+        self.anchors = 0
 
-    def get_timestamp(self) -> Decimal:
-        """Get timestamp."""
-        self._now = self._now + self._change
-        return Decimal(self._now.timestamp())
+    def anchor(self) -> None:
+        """Anchor the clock."""
+        self.anchors += 1
+
+    def now_ns(self) -> int:
+        """Get the time in nanoseconds."""
+        self._now_ns += self._change_ns
+        return self._now_ns
 
 
 def test_init() -> None:
@@ -40,9 +46,8 @@ def test_start() -> None:
 
 def test_stop() -> None:
     """Test stopping a time meter."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
     meter.start()
     meter.stop()
     assert meter.measuring is False
@@ -51,9 +56,8 @@ def test_stop() -> None:
 
 def test_update() -> None:
     """Test updating a time meter."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
     meter.start()
     meter.update()
     assert meter.measured_value == Decimal(HOUR)
@@ -72,9 +76,8 @@ def test_update() -> None:
 
 def test_reset_when_measuring() -> None:
     """Test resetting a time meter when measuring."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
 
     meter.start()
     meter.update()
@@ -88,9 +91,8 @@ def test_reset_when_measuring() -> None:
 
 def test_reset_when_not_measuring() -> None:
     """Test resetting a time meter when not measuring."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
 
     meter.start()
     meter.update()
@@ -103,9 +105,8 @@ def test_reset_when_not_measuring() -> None:
 
 def test_store_and_restore() -> None:
     """Test storing and restoring a counter meter."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
 
     meter.start()
     meter.update()
@@ -113,8 +114,7 @@ def test_store_and_restore() -> None:
     assert meter.measured_value == Decimal(HOUR)
     data = meter.to_dict()
 
-    meter2 = TimeMeter()
-    meter2.get_timestamp = mock.get_timestamp
+    meter2 = TimeMeter(clock=mock)
 
     meter2.from_dict(data)
     assert meter2.measuring is True
@@ -127,8 +127,7 @@ def test_store_and_restore() -> None:
     assert isinstance(meter2.measured_value, Decimal)
     data = meter2.to_dict()
 
-    meter3 = TimeMeter()
-    meter3.get_timestamp = mock.get_timestamp
+    meter3 = TimeMeter(clock=mock)
     meter3.from_dict(data)
     assert meter3.measuring is False
     assert meter3.measured_value == Decimal(HOUR * 4)
@@ -136,9 +135,8 @@ def test_store_and_restore() -> None:
 
 def test_calibrate() -> None:
     """Test calibrating a time meter."""
-    meter = TimeMeter()
-    mock = DatetimeMock(datetime.now(), timedelta(hours=1))
-    meter.get_timestamp = mock.get_timestamp
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
 
     meter.start()
     meter.update()
@@ -153,3 +151,83 @@ def test_calibrate() -> None:
     assert meter.measured_value == Decimal(HOUR * 5)
     meter.calibrate(Decimal(HOUR) * 6)
     assert meter.measured_value == Decimal(HOUR * 6)
+
+
+def test_lazy_measured_value_on_read() -> None:
+    """Test that a lazy time meter calculates the measured value when read."""
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(lazy=True, clock=mock)
+    assert meter.lazy is True
+
+    meter.start()
+    meter.update()  # does not touch the timestamp
+    assert meter.measured_value == Decimal(HOUR)
+    assert meter.measured_value == Decimal(HOUR * 2)
+    meter.stop()
+    assert meter.measured_value == Decimal(HOUR * 3)
+    assert meter.measured_value == Decimal(HOUR * 3)
+    meter.start()
+    assert meter.measured_value == Decimal(HOUR * 4)
+    meter.reset()
+    assert meter.prev_measured_value == Decimal(HOUR * 5)
+    assert meter.measured_value == Decimal(HOUR)
+
+
+def test_start_anchors_clock() -> None:
+    """Test that each session start anchors the clock."""
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
+    meter.start()
+    meter.stop()
+    meter.start()
+    assert mock.anchors == 2
+
+
+def test_stored_values_are_bounded() -> None:
+    """Test that stored timestamps do not contain float artifacts."""
+    mock = ClockMock(datetime.now(), timedelta(seconds=1.5))
+    meter = TimeMeter(clock=mock)
+    meter.calibrate(Decimal("0.25"))
+    meter.start()
+    meter.update()
+    data = meter.to_dict()
+    assert data["measured_value"] == "1.75"
+    assert data["session_start_measured_value"] == "0.25"
+    assert len(data["session_start_value"]) <= len("1707724800.123456789")
+
+
+def test_restore_legacy_float_timestamps() -> None:
+    """Test restoring timestamps that were stored from a float."""
+    meter = TimeMeter()
+    meter.from_dict(
+        {
+            "measured_value": "12.5",
+            "prev_measured_value": "3600",
+            "measuring": False,
+            "session_start_value": "1707724800.12345678901234567890123456789",
+            "session_start_measured_value": "0",
+        }
+    )
+    assert meter.measured_value == Decimal("12.5")
+    assert meter.prev_measured_value == Decimal(HOUR)
+    assert meter.to_dict()["session_start_value"] == "1707724800.123456789"
+
+
+def test_backdated_start_and_stop() -> None:
+    """Test that a back-dated start and stop count from the actual moments."""
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
+    meter.start(Backdate(HOUR // 2 * NS_PER_SECOND, None, 0))
+    assert meter.measured_value == Decimal(HOUR + HOUR // 2)
+    meter.stop(Backdate(HOUR // 4 * NS_PER_SECOND, None, 0))
+    assert meter.measuring is False
+    assert meter.measured_value == Decimal(2 * HOUR + HOUR // 4)
+
+
+def test_backdated_stop_not_before_start() -> None:
+    """Test that a stop is never back-dated to before the start."""
+    mock = ClockMock(datetime.now(), timedelta(hours=1))
+    meter = TimeMeter(clock=mock)
+    meter.start()
+    meter.stop(Backdate(2 * HOUR * NS_PER_SECOND, None, 0))
+    assert meter.measured_value == Decimal(0)
@@ -1,6 +1,7 @@
 """Tests for MeasureIt time window class."""
 
-from datetime import datetime
+import random
+from datetime import datetime, timedelta
 
 import pytest
 from homeassistant.util import dt as dt_util
@@ -201,3 +202,166 @@ def test_next_change_always_active() -> None:
     current_time = datetime(2023, 4, 1, 23, 0, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
     with pytest.raises(AssertionError):
         tw.next_change(current_time)
+
+
+def test_full_coverage_is_always_active() -> None:
+    """Test that a window that covers the whole week is always active."""
+    tw = TimeWindow(["0", "1", "2", "3", "4", "5", "6"], "08:00:00", "08:00:00")
+    assert tw.always_active is True
+    assert tw.is_active(datetime(2023, 4, 3, 8, 0, tzinfo=TZ)) is True
+
+
+def test_next_change_skips_touching_ranges() -> None:
+    """Test that next_change returns a moment the state really changes."""
+    tw = TimeWindow(["0", "1", "2"], "00:00:00", "00:00:00")
+    current_time = datetime(2023, 4, 3, 10, 0, tzinfo=TZ)  # monday
+    assert tw.next_change(current_time) == datetime(2023, 4, 6, 0, 0, tzinfo=TZ)
+
+
+def test_cross_midnight_inactive_at_end() -> None:
+    """Test that a window that crosses midnight is not active at its end."""
+    tw = TimeWindow(["4"], "22:00:00", "02:00:00")  # friday
+    end = datetime(2023, 4, 8, 2, 0, 0, tzinfo=TZ)
+    assert tw.is_active(end - timedelta(microseconds=1)) is True
+    assert tw.is_active(end) is False
+    assert tw.next_change(end) == datetime(2023, 4, 14, 22, 0, 0, tzinfo=TZ)
+
+
+def _reference_is_active(tw: TimeWindow, tznow: datetime) -> bool:
+    """Return if the window is active, as computed before it was compiled."""
+    check_time = tznow.time()
+    if tw.start < tw.end:
+        if check_time >= tw.start and check_time < tw.end:
+            return tznow.weekday() in tw.days
+    elif check_time >= tw.start or check_time <= tw.end:
+        if check_time < tw.start:
+            return (tznow.weekday() - 1) % 7 in tw.days
+        return tznow.weekday() in tw.days
+    return False
+
+
+def _reference_next_change(tw: TimeWindow, tznow: datetime) -> datetime:
+    """Return the next change, as computed before the window was compiled."""
+    if _reference_is_active(tw, tznow):
+        if tznow.time() < tw.end:
+            return datetime.combine(tznow.date(), tw.end, tznow.tzinfo)
+        return datetime.combine(tznow.date() + timedelta(days=1), tw.end, tznow.tzinfo)
+    if tznow.time() < tw.start and tznow.weekday() in tw.days:
+        return datetime.combine(tznow.date(), tw.start, tznow.tzinfo)
+    for days_ahead in range(1, 8):
+        next_day = tznow + timedelta(days=days_ahead)
+        if next_day.weekday() in tw.days:
+            return datetime.combine(next_day.date(), tw.start, tznow.tzinfo)
+    raise AssertionError
+
+
+def test_compiled_window_matches_reference() -> None:
+    """
+    Test the compiled window against the previous implementation.
+
+    The previous implementation was also active at the exact end of a window that
+    crosses midnight, so states are compared just after every moment. It could
+    return a next change at which the state stays the same (between touching
+    ranges), so its changes are followed until the state really changes.
+    """
+    half_second = timedelta(microseconds=500000)
+    rng = random.Random(42)
+    times = ["00:00:00", "02:00:00", "02:30:00", "09:15:30", "17:00:00", "23:59:59"]
+    for _ in range(200):
+        days = rng.sample([str(day) for day in range(7)], rng.randint(1, 7))
+        tw = TimeWindow(days, rng.choice(times), rng.choice(times))
+        if tw.always_active:
+            continue
+        moment = datetime(2024, 3, 25, tzinfo=TZ) + timedelta(
+            seconds=rng.randrange(14 * 86400)
+        )
+        for now in (moment, moment + half_second):
+            active = tw.is_active(now)
+            assert active == _reference_is_active(tw, now + half_second)
+            change = _reference_next_change(tw, now)
+            while _reference_is_active(tw, change + half_second) == active:
+                change = _reference_next_change(tw, change + half_second)
+            assert tw.next_change(now) == change
+
+
+def test_additional_ranges() -> None:
+    """Test a time window with a split range and a range on other days."""
+    tw = TimeWindow(
+        ["0", "1", "2", "3", "4"],
+        "07:00:00",
+        "09:00:00",
+        ["17:00-21:00", "sat,sun 10:00:00-14:00:00"],
+    )
+    monday = datetime(2023, 4, 3, tzinfo=TZ)
+    assert tw.is_active(monday.replace(hour=8)) is True
+    assert tw.is_active(monday.replace(hour=12)) is False
+    assert tw.is_active(monday.replace(hour=18)) is True
+    assert tw.next_change(monday.replace(hour=12)) == monday.replace(hour=17)
+    saturday = datetime(2023, 4, 8, tzinfo=TZ)
+    assert tw.is_active(saturday.replace(hour=8)) is False
+    assert tw.is_active(saturday.replace(hour=11)) is True
+    assert tw.next_change(saturday.replace(hour=11)) == saturday.replace(hour=14)
+
+
+def test_invalid_additional_range() -> None:
+    """Test that invalid additional ranges are rejected."""
+    for time_range in ["07:00", "someday 07:00-09:00", "07:00-25:00"]:
+        with pytest.raises(ValueError):
+            TimeWindow(["0"], "00:00:00", "02:00:00", [time_range])
+
+
+def test_excluded_dates() -> None:
+    """Test that a time window is never active on excluded dates."""
+    tw = TimeWindow(
+        ["0", "1", "2", "3", "4", "5", "6"],
+        "22:00:00",
+        "06:00:00",
+        excluded_dates=["2023-04-10", "2023-04-11"],  # monday, tuesday
+    )
+    assert tw.always_active is False
+    saturday = datetime(2023, 4, 8, 7, 0, tzinfo=TZ)
+    assert tw.is_active(saturday) is False
+    assert tw.next_change(saturday) == datetime(2023, 4, 8, 22, 0, tzinfo=TZ)
+    # The window of sunday night stops at the start of the excluded monday
+    sunday = datetime(2023, 4, 9, 23, 0, tzinfo=TZ)
+    assert tw.is_active(sunday) is True
+    assert tw.next_change(sunday) == datetime(2023, 4, 10, 0, 0, tzinfo=TZ)
+    # The window of tuesday night starts at the end of the excluded dates
+    assert tw.is_active(datetime(2023, 4, 11, 23, 0, tzinfo=TZ)) is False
+    assert tw.next_change(datetime(2023, 4, 10, 0, 0, tzinfo=TZ)) == datetime(
+        2023, 4, 12, 0, 0, tzinfo=TZ
+    )
+    assert tw.is_active(datetime(2023, 4, 12, 0, 0, tzinfo=TZ)) is True
+    assert tw.next_change(datetime(2023, 4, 12, 0, 0, tzinfo=TZ)) == datetime(
+        2023, 4, 12, 6, 0, tzinfo=TZ
+    )
+
+
+def test_excluded_dates_of_always_active_window() -> None:
+    """Test a window that is only inactive on excluded dates."""
+    tw = TimeWindow(
+        ["0", "1", "2", "3", "4", "5", "6"],
+        "00:00:00",
+        "00:00:00",
+        excluded_dates=["2023-12-25"],
+    )
+    assert tw.always_active is False
+    assert tw.is_active(datetime(2023, 12, 24, 12, 0, tzinfo=TZ)) is True
+    assert tw.is_active(datetime(2023, 12, 25, 12, 0, tzinfo=TZ)) is False
+    assert tw.next_change(datetime(2023, 12, 24, 12, 0, tzinfo=TZ)) == datetime(
+        2023, 12, 25, 0, 0, tzinfo=TZ
+    )
+    assert tw.next_change(datetime(2023, 12, 25, 12, 0, tzinfo=TZ)) == datetime(
+        2023, 12, 26, 0, 0, tzinfo=TZ
+    )
+    assert tw.next_change(datetime(2023, 12, 26, 12, 0, tzinfo=TZ)) is None
+
+
+def test_key_of_equivalent_windows() -> None:
+    """Test that windows that are active at the same moments have the same key."""
+    tw = TimeWindow(["0", "1"], "07:00:00", "09:00:00", ["17:00-21:00"])
+    assert (
+        TimeWindow(["1", "0"], "17:00:00", "21:00:00", ["mon,tue 07:00-09:00"]).key
+        == tw.key
+    )
+    assert TimeWindow(["0", "1"], "07:00:00", "09:00:00").key != tw.key
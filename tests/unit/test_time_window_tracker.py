@@ -0,0 +1,68 @@
+"""Tests for the shared MeasureIt time window tracker."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.time_window import TimeWindow
+from custom_components.measureit.time_window_tracker import (
+    MeasureItTimeWindowTracker,
+    async_get_time_window_tracker,
+)
+from custom_components.measureit.timer_scheduler import async_get_timer_scheduler
+
+
+def test_get_time_window_tracker_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same tracker."""
+    assert async_get_time_window_tracker(hass) is async_get_time_window_tracker(hass)
+
+
+def test_intern_identical_windows(hass: HomeAssistant) -> None:
+    """Test that identical time windows are interned into one."""
+    tracker = MeasureItTimeWindowTracker(hass)
+    window = tracker.async_intern(TimeWindow(["0", "1"], "07:00:00", "23:00:00"))
+    assert tracker.async_intern(TimeWindow(["1", "0"], "07:00:00", "23:00:00")) is (
+        window
+    )
+    assert (
+        tracker.async_intern(TimeWindow(["0", "1"], "07:00:00", "22:00:00"))
+        is not window
+    )
+
+
+async def test_one_timer_for_identical_windows(hass: HomeAssistant) -> None:
+    """Test that subscribers of identical windows share one scheduled change."""
+    tracker = MeasureItTimeWindowTracker(hass)
+    timer_scheduler = async_get_timer_scheduler(hass)
+    window = TimeWindow(["0", "1"], "07:00:00", "23:00:00")
+    actions = [MagicMock() for _ in range(3)]
+    untracks = [
+        tracker.async_track(TimeWindow(["0", "1"], "07:00:00", "23:00:00"), action)
+        for action in actions
+    ]
+    assert tracker.tracked_windows == 1
+    assert timer_scheduler.pending == 1
+
+    change = window.next_change(dt_util.now())
+    async_fire_time_changed(hass, change)
+    await hass.async_block_till_done()
+    for action in actions:
+        action.assert_called_once_with(change)
+    assert timer_scheduler.pending == 1
+
+    for untrack in untracks:
+        untrack()
+    untracks[0]()
+    assert tracker.tracked_windows == 0
+    assert timer_scheduler.pending == 0
+
+
+def test_always_active_window_is_not_tracked(hass: HomeAssistant) -> None:
+    """Test that a window that never changes cannot be tracked."""
+    tracker = MeasureItTimeWindowTracker(hass)
+    window = TimeWindow(["0", "1", "2", "3", "4", "5", "6"], "00:00:00", "00:00:00")
+    with pytest.raises(ValueError):
+        tracker.async_track(window, MagicMock())
@@ -0,0 +1,103 @@
+"""Tests for the shared MeasureIt timer scheduler."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.timer_scheduler import (
+    MeasureItTimerScheduler,
+    async_get_timer_scheduler,
+)
+
+
+def test_get_timer_scheduler_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same scheduler."""
+    assert async_get_timer_scheduler(hass) is async_get_timer_scheduler(hass)
+
+
+async def test_actions_with_same_deadline_run_together(hass: HomeAssistant) -> None:
+    """Test that all actions of a deadline run on a single timer."""
+    scheduler = MeasureItTimerScheduler(hass)
+    deadline = dt_util.now() + timedelta(minutes=1)
+    later = deadline + timedelta(minutes=1)
+    actions = [MagicMock() for _ in range(3)]
+    later_action = MagicMock()
+    scheduler.async_schedule(later, later_action)
+    for action in actions:
+        scheduler.async_schedule(deadline, action)
+    assert scheduler.pending == 4
+    assert scheduler.active is True
+
+    async_fire_time_changed(hass, deadline)
+    await hass.async_block_till_done()
+    for action in actions:
+        action.assert_called_once_with(dt_util.as_local(deadline))
+    later_action.assert_not_called()
+    assert scheduler.pending == 1
+
+    async_fire_time_changed(hass, later)
+    await hass.async_block_till_done()
+    later_action.assert_called_once_with(dt_util.as_local(later))
+    assert scheduler.pending == 0
+    assert scheduler.active is False
+
+
+async def test_cancel(hass: HomeAssistant) -> None:
+    """Test that cancelled actions do not run."""
+    scheduler = MeasureItTimerScheduler(hass)
+    deadline = dt_util.now() + timedelta(minutes=1)
+    cancelled = MagicMock()
+    action = MagicMock()
+    cancel = scheduler.async_schedule(deadline, cancelled)
+    cancel_action = scheduler.async_schedule(deadline + timedelta(minutes=1), action)
+    cancel()
+    cancel()
+    assert scheduler.pending == 1
+
+    async_fire_time_changed(hass, deadline + timedelta(minutes=1))
+    await hass.async_block_till_done()
+    cancelled.assert_not_called()
+    action.assert_called_once()
+    # Cancelling an action that already ran is harmless
+    cancel_action()
+    assert scheduler.pending == 0
+    assert scheduler.active is False
+
+
+async def test_action_cancels_action_with_same_deadline(hass: HomeAssistant) -> None:
+    """Test that an action can cancel another action of the same deadline."""
+    scheduler = MeasureItTimerScheduler(hass)
+    deadline = dt_util.now() + timedelta(minutes=1)
+    second = MagicMock()
+    first = MagicMock(side_effect=lambda _: cancel_second())
+    scheduler.async_schedule(deadline, first)
+    cancel_second = scheduler.async_schedule(deadline, second)
+
+    async_fire_time_changed(hass, deadline)
+    await hass.async_block_till_done()
+    first.assert_called_once()
+    second.assert_not_called()
+    assert scheduler.pending == 0
+
+
+def test_cancelled_entries_are_purged(hass: HomeAssistant) -> None:
+    """Test that the heap does not grow with cancelled entries."""
+    scheduler = MeasureItTimerScheduler(hass)
+    deadline = dt_util.now() + timedelta(hours=1)
+    first = scheduler.async_schedule(deadline, MagicMock())
+    cancels = [
+        scheduler.async_schedule(deadline + timedelta(minutes=index), MagicMock())
+        for index in range(1, 11)
+    ]
+    for cancel in cancels[:6]:
+        cancel()
+    assert scheduler.pending == 5
+    assert len(scheduler._heap) == 5
+    first()
+    for cancel in cancels[6:]:
+        cancel()
+    assert scheduler.pending == 0
+    assert scheduler.active is False
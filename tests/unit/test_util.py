@@ -0,0 +1,167 @@
+"""Tests for MeasureIt utilities."""
+
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.util import (
+    RENDER_CACHE_SIZE,
+    RENDERER_STATS,
+    create_renderer,
+    is_pure_template,
+    seconds_until_render_change,
+)
+
+
+@pytest.mark.parametrize(
+    ("renderer", "value", "expected"),
+    [
+        (lambda value: round(value), Decimal(10), 1),
+        (lambda value: int(value / 60), Decimal(30), 30),
+        (lambda value: int(value / 3600), Decimal(0), 3600),
+        (lambda value: int(value / 3600), Decimal("3599.5"), 1),
+        (lambda value: int(value / 86400), Decimal(1000), 85400),
+    ],
+)
+def test_seconds_until_render_change(
+    renderer: Callable[[Decimal], Any], value: Decimal, expected: int
+) -> None:
+    """Test finding the first second at which the rendered value changes."""
+    assert seconds_until_render_change(renderer, value, 86400) == expected
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(Decimal(0), 72), (Decimal(30), 78), (Decimal(71), 73), (Decimal(72), 72)],
+)
+def test_seconds_until_render_change_after_minimum(
+    value: Decimal, expected: int
+) -> None:
+    """Test finding the first change at or after a minimum number of seconds."""
+    assert (
+        seconds_until_render_change(lambda value: int(value / 36), value, 3600, 60)
+        == expected
+    )
+
+
+def test_seconds_until_render_change_bypasses_memory(hass: HomeAssistant) -> None:
+    """Test that probing does not fill the memory of a memoizing renderer."""
+    renderer = create_renderer(hass, "{{ (value / 3600) | int ~ ' h' }}")
+    with patch.object(
+        Template, "async_render", autospec=True, side_effect=Template.async_render
+    ) as render:
+        assert renderer(Decimal(10)) == "0 h"
+        assert seconds_until_render_change(renderer, Decimal(10), 86400) == 3590
+        probes = render.call_count
+        assert renderer(Decimal(10)) == "0 h"
+        assert render.call_count == probes
+
+
+def test_seconds_until_render_change_without_change() -> None:
+    """Test a renderer of which the output never changes."""
+    assert seconds_until_render_change(lambda _: "constant", Decimal(0), 3600) is None
+
+
+def test_create_renderer_compiles_arithmetic(hass: HomeAssistant) -> None:
+    """Test that arithmetic templates take the compiled path."""
+    compiled, jinja = RENDERER_STATS.compiled, RENDERER_STATS.jinja
+    renderer = create_renderer(hass, "{{ (value / 3600) | round(2) }}")
+    assert renderer(Decimal(5400)) == "1.5"
+    assert (RENDERER_STATS.compiled, RENDERER_STATS.jinja) == (compiled + 1, jinja)
+
+    renderer = create_renderer(hass, "{{ value | round(1) }} h")
+    assert renderer(Decimal("1.25")) == "1.2 h"
+    assert (RENDERER_STATS.compiled, RENDERER_STATS.jinja) == (compiled + 1, jinja + 1)
+
+
+def test_create_renderer_returns_value_on_error(hass: HomeAssistant) -> None:
+    """Test that the value is returned when a compiled template fails, like Jinja."""
+    renderer = create_renderer(hass, "{{ value * 0.23 }}")
+    assert renderer(Decimal(10)) == Decimal(10)
+
+
+@pytest.mark.parametrize(
+    ("template", "pure"),
+    [
+        ("{{ value | round(1) }} h", True),
+        ("{% if value is number %}{{ (value / 60) | int }} min{% endif %}", True),
+        ("{% set minutes = value // 60 %}{{ minutes | multiply(2) }}", True),
+        ("{{ value * states('sensor.price') | float(0) }}", False),
+        ("{{ value * states.sensor.price.state | float(0) }}", False),
+        ("{{ value if now().hour > 12 else 0 }}", False),
+        ("{{ value | timestamp_custom('%H:%M') }}", False),
+        ("{{ 'sensor.price' | is_state('on') }}", False),
+        ("{{ value is is_state('on') }}", False),
+        ("{{ value", False),
+    ],
+)
+def test_is_pure_template(template: str, *, pure: bool) -> None:
+    """Test detecting templates that only depend on the value."""
+    assert is_pure_template(template) is pure
+
+
+def test_renderer_memoizes_pure_templates(hass: HomeAssistant) -> None:
+    """Test that a pure template is rendered once per distinct input."""
+    memoized = RENDERER_STATS.memoized
+    with patch.object(
+        Template, "async_render", autospec=True, side_effect=Template.async_render
+    ) as render:
+        renderer = create_renderer(hass, "{{ value | round(1) }} h")
+        assert RENDERER_STATS.memoized == memoized + 1
+        assert renderer(Decimal("1.25")) == "1.2 h"
+        assert renderer(Decimal("1.25")) == "1.2 h"
+        assert renderer(Decimal(2)) == "2.0 h"
+        assert renderer(Decimal("1.25")) == "1.2 h"
+        assert render.call_count == 2
+
+        # Equal numbers with another representation are rendered apart
+        renderer = create_renderer(hass, "{{ value }} h")
+        assert renderer(Decimal(1)) == "1 h"
+        assert renderer(Decimal("1.0")) == "1.0 h"
+        assert render.call_count == 4
+
+        # The cache is bounded, the oldest inputs are rendered again
+        for index in range(RENDER_CACHE_SIZE + 1):
+            renderer(Decimal(index + 10))
+        assert render.call_count == 4 + RENDER_CACHE_SIZE + 1
+        renderer(Decimal(10))
+        assert render.call_count == 4 + RENDER_CACHE_SIZE + 2
+
+
+def test_renderer_memoizes_none(hass: HomeAssistant) -> None:
+    """Test that a render output of None is remembered as well."""
+    with patch.object(
+        Template, "async_render", autospec=True, return_value=None
+    ) as render:
+        renderer = create_renderer(hass, "{{ value | round(1) }} h")
+        assert renderer(Decimal(1)) is None
+        assert renderer(Decimal(2)) is None
+        assert renderer(Decimal(1)) is None
+        assert render.call_count == 2
+
+
+def test_renderer_does_not_memoize_external_state(hass: HomeAssistant) -> None:
+    """Test that templates that use other entities are rendered every time."""
+    memoized = RENDERER_STATS.memoized
+    renderer = create_renderer(
+        hass, "{{ value | float * states('sensor.price') | float(0) }} EUR"
+    )
+    assert RENDERER_STATS.memoized == memoized
+    hass.states.async_set("sensor.price", "2")
+    assert renderer(Decimal(3)) == "6.0 EUR"
+    hass.states.async_set("sensor.price", "3")
+    assert renderer(Decimal(3)) == "9.0 EUR"
+
+
+def test_renderer_does_not_memoize_errors(hass: HomeAssistant) -> None:
+    """Test that a failing render is logged every time."""
+    renderer = create_renderer(hass, "{{ value | round(1) }} {{ value.unknown() }}")
+    with patch("custom_components.measureit.util._LOGGER") as logger:
+        assert renderer(Decimal(1)) == Decimal(1)
+        assert renderer(Decimal(1)) == Decimal(1)
+    assert logger.exception.call_count == 2
@@ -0,0 +1,100 @@
+"""Tests for MeasureIt compiled value templates."""
+
+from decimal import Decimal
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.value_expression import compile_value_template
+
+TEMPLATES = [
+    "{{ value }}",
+    "{{ value / 3600 }}",
+    "{{value/60}}",
+    "{{ value | round(2) }}",
+    "{{ value | round }}",
+    "{{ (value / 3600) | round(1) }}",
+    "{{ (value * 0.23) | round(2) }}",
+    "{{ value * 0.23 | round(2) }}",
+    "{{ (value | float * 0.23) | round(2) }}",
+    "{{ value | float / 1000 }}",
+    "{{ value | int // 60 }}",
+    "{{ (value % 3600) // 60 }}",
+    "{{ value / 3600 | round(2, 'floor') }}",
+    "{{ (value / 3600) | round(2, 'ceil') }}",
+    "{{ value | round(2,) }}",
+    "{{ (value / 7) | round(0, 'half') }}",
+    "{{ (value - 100) | abs }}",
+    "{{ value + 1.5 - 2 * 3 }}",
+    "{{ value | float(0) | round(3) }}",
+    "{{ value | int(0) }}",
+    " {{ (value / 60) | int }} ",
+]
+VALUES = [
+    Decimal(0),
+    Decimal(1),
+    Decimal("3599.5"),
+    Decimal(7200),
+    Decimal("123.456789"),
+    Decimal("-42.5"),
+    Decimal("1E+3"),
+    Decimal("0.000001"),
+]
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ value }} kWh",
+        "{{ value * -1 }}",
+        "{{ -value }}",
+        "{{ value ** 2 }}",
+        "{{ value | round(2, 'up') }}",
+        "{{ value | round(2.5) }}",
+        "{{ value | multiply(2) }}",
+        "{{ states('sensor.x') }}",
+        "{{ value | float(value) }}",
+        "{{ (value }}",
+        "{{ 1e3 * value }}",
+        "{% if value > 1 %}1{% endif %}",
+        "{{ value }}{{ value }}",
+        "value / 60",
+    ],
+)
+def test_unrecognized(template: str) -> None:
+    """Test that other templates are not compiled."""
+    assert compile_value_template(template) is None
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ value | round(2 'floor') }}",
+        "{{ value | round(, 2) }}",
+        "{{ value | round(2,, 'floor') }}",
+        "{{ value | round(2 }}",
+    ],
+)
+async def test_invalid_syntax_not_compiled(hass: HomeAssistant, template: str) -> None:
+    """Test that templates Jinja rejects are not compiled either."""
+    with pytest.raises(TemplateError):
+        Template(template, hass).ensure_valid()
+    assert compile_value_template(template) is None
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+async def test_same_output_as_jinja(hass: HomeAssistant, template: str) -> None:
+    """Test that compiled templates render the same text as Jinja."""
+    expression = compile_value_template(template)
+    assert expression is not None
+    jinja = Template(template, hass)
+    for value in VALUES:
+        try:
+            expected = jinja.async_render({"value": value}, parse_result=False)
+        except TemplateError:
+            with pytest.raises((ArithmeticError, TypeError, ValueError)):
+                expression(value)
+            continue
+        assert expression(value) == expected, value
@@ -0,0 +1,169 @@
+"""Tests for the shared MeasureIt write scheduler."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.write_scheduler import (
+    MeasureItWriteScheduler,
+    async_get_write_scheduler,
+)
+
+
+def test_get_write_scheduler_is_shared(hass: HomeAssistant) -> None:
+    """Test that all callers get the same scheduler."""
+    assert async_get_write_scheduler(hass) is async_get_write_scheduler(hass)
+
+
+async def test_writes_once_per_loop_turn(hass: HomeAssistant) -> None:
+    """Test that all writes of one loop turn result in a single write."""
+    scheduler = MeasureItWriteScheduler(hass)
+    writer = MagicMock()
+    for _ in range(10):
+        scheduler.async_schedule(writer)
+    assert scheduler.dirty_writers == 1
+    writer.async_write_scheduled_state.assert_not_called()
+    await hass.async_block_till_done()
+    assert scheduler.dirty_writers == 0
+    writer.async_write_scheduled_state.assert_called_once_with()
+    scheduler.async_schedule(writer)
+    await hass.async_block_till_done()
+    assert writer.async_write_scheduled_state.call_count == 2
+    assert scheduler.budget(None) is None
+    assert scheduler.queue_depth(None) == 0
+    assert scheduler.deferred_writes(None) == 0
+
+
+async def test_budget_per_entry(hass: HomeAssistant) -> None:
+    """Test that the budget of one config entry does not throttle another."""
+    scheduler = MeasureItWriteScheduler(hass)
+    scheduler.async_set_budget("entry_1", 1)
+    scheduler.async_set_budget("entry_2", None)
+    assert scheduler.budget("entry_1") == 1
+    assert scheduler.budget("entry_2") is None
+    throttled = [MagicMock() for _ in range(2)]
+    unlimited = [MagicMock() for _ in range(2)]
+    for writer in throttled:
+        scheduler.async_schedule(writer, "entry_1")
+    for writer in unlimited:
+        scheduler.async_schedule(writer, "entry_2")
+    await hass.async_block_till_done()
+    assert scheduler.queue_depth("entry_1") == 1
+    assert scheduler.deferred_writes("entry_1") == 1
+    assert scheduler.queue_depth("entry_2") == 0
+    for writer in unlimited:
+        writer.async_write_scheduled_state.assert_called_once_with()
+    throttled[1].async_write_scheduled_state.assert_not_called()
+
+    scheduler.async_set_budget("entry_1", 0)
+    assert scheduler.budget("entry_1") is None
+    assert scheduler.queue_depth("entry_1") == 0
+    throttled[1].async_write_scheduled_state.assert_called_once_with()
+
+
+async def test_budget_defers_writes_round_robin(hass: HomeAssistant) -> None:
+    """Test that writes over budget are deferred and drained in order."""
+    scheduler = MeasureItWriteScheduler(hass)
+    writers = [MagicMock(name=f"writer_{index}") for index in range(4)]
+    order = []
+    for writer in writers:
+        writer.async_write_scheduled_state.side_effect = (
+            lambda writer=writer: order.append(writer)
+        )
+
+    with patch(
+        "custom_components.measureit.write_scheduler.monotonic",
+        return_value=100.0,
+    ) as monotonic:
+        scheduler.async_set_budget("entry", 2)
+        for writer in writers:
+            scheduler.async_schedule(writer, "entry")
+        await hass.async_block_till_done()
+        # The first deferred writer is dirty again, but keeps its place in the queue
+        scheduler.async_schedule(writers[2], "entry")
+        await hass.async_block_till_done()
+        assert order == writers[:2]
+        assert scheduler.queue_depth("entry") == 2
+        assert scheduler.deferred_writes("entry") == 2
+
+        monotonic.return_value = 100.5
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+        await hass.async_block_till_done()
+        assert order == writers[:3]
+        assert scheduler.queue_depth("entry") == 1
+
+        monotonic.return_value = 101.5
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+        await hass.async_block_till_done()
+        assert order == writers
+        assert scheduler.queue_depth("entry") == 0
+
+
+async def test_removing_budget_drains_queue(hass: HomeAssistant) -> None:
+    """Test that all pending writes happen when the budget is removed."""
+    scheduler = MeasureItWriteScheduler(hass)
+    scheduler.async_set_budget("entry", 1)
+    writers = [MagicMock() for _ in range(3)]
+    for writer in writers:
+        scheduler.async_schedule(writer, "entry")
+    await hass.async_block_till_done()
+    scheduler.async_cancel(writers[2])
+    assert scheduler.queue_depth("entry") == 1
+    scheduler.async_set_budget("entry", None)
+    assert scheduler.queue_depth("entry") == 0
+    for writer in writers[:2]:
+        writer.async_write_scheduled_state.assert_called_once_with()
+    writers[2].async_write_scheduled_state.assert_not_called()
+
+
+async def test_fractional_budget_writes(hass: HomeAssistant) -> None:
+    """Test that a budget below one write per second still writes."""
+    scheduler = MeasureItWriteScheduler(hass)
+    writers = [MagicMock() for _ in range(2)]
+    with patch(
+        "custom_components.measureit.write_scheduler.monotonic",
+        return_value=100.0,
+    ) as monotonic:
+        scheduler.async_set_budget("entry", 0.5)
+        for writer in writers:
+            scheduler.async_schedule(writer, "entry")
+        await hass.async_block_till_done()
+        assert scheduler.queue_depth("entry") == 2
+
+        monotonic.return_value = 101.0
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+        await hass.async_block_till_done()
+        writers[0].async_write_scheduled_state.assert_called_once_with()
+        assert scheduler.queue_depth("entry") == 1
+
+        monotonic.return_value = 103.0
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        writers[1].async_write_scheduled_state.assert_called_once_with()
+        assert scheduler.queue_depth("entry") == 0
+
+
+async def test_flush_writes_pending_state(hass: HomeAssistant) -> None:
+    """Test that a flush writes a dirty or deferred writer right away."""
+    scheduler = MeasureItWriteScheduler(hass)
+    writers = [MagicMock() for _ in range(2)]
+    scheduler.async_flush(writers[0])
+    writers[0].async_write_scheduled_state.assert_not_called()
+
+    scheduler.async_schedule(writers[0])
+    scheduler.async_flush(writers[0])
+    writers[0].async_write_scheduled_state.assert_called_once_with()
+    await hass.async_block_till_done()
+    writers[0].async_write_scheduled_state.assert_called_once_with()
+
+    scheduler.async_set_budget("entry", 1)
+    for writer in writers:
+        scheduler.async_schedule(writer, "entry")
+    await hass.async_block_till_done()
+    assert scheduler.queue_depth("entry") == 1
+    scheduler.async_flush(writers[1])
+    assert scheduler.queue_depth("entry") == 0
+    writers[1].async_write_scheduled_state.assert_called_once_with()